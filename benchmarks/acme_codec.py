@@ -0,0 +1,95 @@
+import argparse
+import json
+import statistics
+import time
+from pathlib import Path
+
+from jwcrypto import jws as _jws
+from starlette.responses import JSONResponse
+
+from vism.util import b64u_decode
+from vism_acme.middleware import AcmeProtectedHeader, AcmeProtectedPayload
+from vism_acme.middleware.jwt import AcmeJWSEnvelope
+from vism_acme.util import codec
+from vism_acme.util.codec import AcmeJSONResponse
+
+FIXTURES = Path(__file__).parent / "fixtures" / "acme_requests.json"
+
+ORDER_RESPONSE = {
+    "status": "pending",
+    "expires": "2026-01-01T00:00:00+00:00",
+    "identifiers": [{"type": "dns", "value": "www.example.com"}, {"type": "dns", "value": "example.com"}],
+    "authorizations": [
+        "https://acme.example.internal/authz/1a2b3c4d-5e6f-4a8b-9c0d-1e2f3a4b5c6d",
+        "https://acme.example.internal/authz/3c4d5e6f-7a8b-4c0d-9e2f-3a4b5c6d7e8f",
+    ],
+    "finalize": "https://acme.example.internal/order/0f1e2d3c-4b5a-6978-8a9b-0c1d2e3f4a5b/finalize",
+}
+
+
+# Reproduces the envelope parsing used before the codec module: stdlib json, padding-tolerant
+# base64url decoding and the validating pydantic constructors.
+def legacy_parse(raw: bytes):
+    envelope_json = json.loads(raw)
+    encoded_protected = envelope_json.get("protected", None)
+    encoded_payload = envelope_json.get("payload", None)
+    encoded_signature = envelope_json.get("signature", None)
+
+    payload = None
+    if encoded_payload:
+        payload = AcmeProtectedPayload(**json.loads(b64u_decode(encoded_payload).decode("utf-8")))
+
+    headers = AcmeProtectedHeader(**json.loads(b64u_decode(encoded_protected).decode("utf-8")))
+    if headers.jwk:
+        j = _jws.JWS()
+        j.deserialize(".".join([encoded_protected, encoded_payload, encoded_signature]))
+        j.verify(headers.jwk)
+
+    return headers, payload
+
+
+def fast_parse(raw: bytes):
+    envelope = AcmeJWSEnvelope.parse(raw)
+    return envelope.headers, envelope.payload
+
+
+def measure(function, argument, iterations: int) -> list[float]:
+    timings = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        function(argument)
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+def report(label: str, legacy: list[float], fast: list[float]):
+    legacy_mean = statistics.mean(legacy) * 1e6
+    fast_mean = statistics.mean(fast) * 1e6
+    print(f"{label:<24} {legacy_mean:>10.1f} {fast_mean:>10.1f} {legacy_mean / fast_mean:>8.2f}x")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="JSON and base64url decoding cost on the ACME request path.")
+    parser.add_argument("--iterations", type=int, default=2000)
+    args = parser.parse_args()
+
+    fixtures = json.loads(FIXTURES.read_text())
+    print(f"orjson: {'enabled' if codec.orjson is not None else 'not installed, using stdlib json'}")
+    print(f"{'request':<24} {'legacy us':>10} {'codec us':>10} {'speedup':>9}")
+
+    for fixture in fixtures:
+        raw = json.dumps(fixture["body"]).encode()
+        if legacy_parse(raw) != fast_parse(raw):
+            raise RuntimeError(f"{fixture['client']} {fixture['request']} parsed differently")
+
+        legacy = measure(legacy_parse, raw, args.iterations)
+        fast = measure(fast_parse, raw, args.iterations)
+        report(f"{fixture['client']} {fixture['request']}", legacy, fast)
+
+    legacy = measure(JSONResponse, ORDER_RESPONSE, args.iterations)
+    fast = measure(AcmeJSONResponse, ORDER_RESPONSE, args.iterations)
+    report("order response render", legacy, fast)
+
+
+if __name__ == '__main__':
+    main()
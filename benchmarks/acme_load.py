@@ -0,0 +1,111 @@
+import argparse
+import asyncio
+import os
+import secrets
+import socket
+import time
+from collections import Counter
+
+import httpx
+import uvicorn
+
+from tests.conftest import BENCH_DOMAIN, FakeCa, FlowError, QueryCounter, ResponderFarm, SimulatedClient, Stats, build_controller
+
+
+def percentile(values: list[float], fraction: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+async def run(args) -> Stats:
+    farm = ResponderFarm()
+    ca = FakeCa(args.ca_latency)
+    controller = build_controller(args.config, farm, ca)
+    queries = QueryCounter(controller.database.engine)
+    stats = Stats()
+
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM, socket.IPPROTO_TCP)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind(("127.0.0.1", 0))
+    base_url = f"http://127.0.0.1:{sock.getsockname()[1]}"
+    server = uvicorn.Server(uvicorn.Config(queries.wrap(controller.api), log_level="warning", backlog=args.concurrency * 2))
+    server_task = asyncio.create_task(server.serve(sockets=[sock]))
+    while not server.started:
+        if server_task.done():
+            await server_task
+            raise RuntimeError("vism_acme failed to start")
+        await asyncio.sleep(0.01)
+
+    run_id = secrets.token_hex(4)
+    http = httpx.AsyncClient(
+        base_url=base_url,
+        timeout=httpx.Timeout(args.request_timeout),
+        limits=httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency),
+        trust_env=False,
+    )
+    clients = [
+        SimulatedClient(http, stats, farm, f"c{index}-{run_id}.{BENCH_DOMAIN}", args.poll_interval, args.poll_timeout)
+        for index in range(args.clients)
+    ]
+    semaphore = asyncio.Semaphore(args.concurrency)
+
+    async def drive(client: SimulatedClient):
+        async with semaphore:
+            try:
+                await client.run()
+                stats.issued += 1
+            except FlowError as e:
+                stats.failures[str(e)] += 1
+            except httpx.HTTPError as e:
+                stats.failures[e.__class__.__name__] += 1
+
+    start = time.perf_counter()
+    try:
+        await asyncio.gather(*(drive(client) for client in clients))
+        elapsed = time.perf_counter() - start
+    finally:
+        await http.aclose()
+        server.should_exit = True
+        await server_task
+
+    report(stats, queries.counts, elapsed, ca, farm)
+    return stats
+
+
+def report(stats: Stats, query_counts: Counter, elapsed: float, ca: FakeCa, farm: ResponderFarm):
+    total_requests = sum(len(latencies) for latencies in stats.latencies.values())
+    print(f"{'endpoint':<14} {'requests':>9} {'errors':>7} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'db q/req':>9}")
+    for endpoint, latencies in sorted(stats.latencies.items(), key=lambda item: -len(item[1])):
+        print(
+            f"{endpoint:<14} {len(latencies):>9} {stats.errors[endpoint]:>7} "
+            f"{percentile(latencies, 0.5) * 1e3:>9.2f} {percentile(latencies, 0.95) * 1e3:>9.2f} "
+            f"{percentile(latencies, 0.99) * 1e3:>9.2f} {query_counts[endpoint] / len(latencies):>9.2f}"
+        )
+
+    print()
+    print(f"wall time        {elapsed:.2f}s")
+    print(f"throughput       {total_requests / elapsed:.1f} requests/s, {stats.issued / elapsed:.1f} certificates/s")
+    print(f"issued           {stats.issued} ({ca.signed} signed by the fake CA, {farm.requests} HTTP-01 fetches)")
+    print(f"db queries       {sum(query_counts.values())} total, {sum(query_counts.values()) / max(total_requests, 1):.2f} per request")
+    for failure, count in stats.failures.most_common():
+        print(f"failed flow      {count} x {failure}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="End-to-end ACME issuance load test against a local database.")
+    parser.add_argument("--config", default=os.environ.get("CONFIG_FILE_PATH", "./acme_config.yaml"), help="ACME config whose database section is used.")
+    parser.add_argument("--clients", type=int, default=1000, help="Simulated ACME clients, one certificate each.")
+    parser.add_argument("--concurrency", type=int, default=200, help="Clients in flight at the same time.")
+    parser.add_argument("--poll-interval", type=float, default=0.05)
+    parser.add_argument("--poll-timeout", type=float, default=60)
+    parser.add_argument("--request-timeout", type=float, default=30)
+    parser.add_argument("--ca-latency", type=float, default=0.0, help="Seconds the fake CA waits before signing.")
+    args = parser.parse_args()
+
+    stats = asyncio.run(run(args))
+    if stats.failures:
+        raise SystemExit(1)
+
+
+if __name__ == '__main__':
+    main()
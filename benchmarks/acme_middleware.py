@@ -0,0 +1,201 @@
+import argparse
+import asyncio
+import base64
+import json
+import statistics
+import time
+from types import SimpleNamespace
+
+from starlette.applications import Starlette
+from starlette.middleware import Middleware
+from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.requests import Request
+from starlette.responses import JSONResponse, Response
+from starlette.routing import Route
+
+from vism_acme.middleware import AcmeMiddleware
+from vism_acme.schema.response import ACMEProblemResponse
+from vism_acme.util.nonce import NonceManager
+
+SKIP_PATHS = ["/directory", "/new-nonce", "/health"]
+JWK_PATHS = ["/new-account", "/revoke-cert"]
+KID_PATHS = ["/account/", "/new-order", "/authz"]
+ACCOUNT_KID = "acct-benchmark"
+
+
+class InMemoryAccounts:
+    def __init__(self):
+        self.account = SimpleNamespace(id="b8e2d8c6-2f0b-4a53-9a51-3c8c0d2a6f10", kid=ACCOUNT_KID, status="valid")
+
+    async def get_account_by_kid(self, kid: str):
+        return self.account if kid == ACCOUNT_KID else None
+
+    async def get_account_by_jwk(self, jwk):
+        return None
+
+
+# The two BaseHTTPMiddleware classes below reproduce the request pipeline that
+# AcmeMiddleware replaced, so both can be measured against the same endpoint.
+class LegacyJWSMiddleware(BaseHTTPMiddleware):
+    def __init__(self, app, skip_paths: list, controller):
+        super().__init__(app)
+        self.skip_paths = skip_paths
+        self.controller = controller
+
+    async def dispatch(self, request: Request, call_next):
+        if any(request.url.path.startswith(path) for path in self.skip_paths):
+            return await call_next(request)
+
+        if request.method != "POST":
+            return await call_next(request)
+
+        try:
+            request.state.jws_envelope = AcmeMiddleware._parse_jws_envelope(await request.body())
+        except ACMEProblemResponse as exc:
+            return JSONResponse(status_code=exc.status_code, content=exc.error_json)
+
+        return await call_next(request)
+
+
+class LegacyAccountMiddleware(BaseHTTPMiddleware):
+    def __init__(self, app, jwk_paths: list, kid_paths: list, controller):
+        super().__init__(app)
+        self.jwk_paths = jwk_paths
+        self.kid_paths = kid_paths
+        self.controller = controller
+
+    async def dispatch(self, request: Request, call_next):
+        if not hasattr(request.state, "jws_envelope") or request.method != "POST":
+            return await call_next(request)
+
+        jws_envelope = request.state.jws_envelope
+        if any(request.url.path.startswith(path) for path in self.jwk_paths) and not jws_envelope.headers.jwk:
+            return JSONResponse(status_code=400, content={})
+        if any(request.url.path.startswith(path) for path in self.kid_paths) and not jws_envelope.headers.kid:
+            return JSONResponse(status_code=400, content={})
+
+        account = await self.controller.database.get_account_by_kid(jws_envelope.headers.kid)
+        if not await self.controller.nonce_manager.pop_nonce(jws_envelope.headers.nonce, account.id):
+            return JSONResponse(status_code=400, content={})
+
+        request.state.nonce = jws_envelope.headers.nonce
+        request.state.account = account
+        return await call_next(request)
+
+
+async def endpoint(request: Request):
+    return Response(b"", status_code=201)
+
+
+def build_app(stack: str, controller) -> Starlette:
+    middleware = []
+    if stack == "legacy":
+        middleware = [
+            Middleware(LegacyJWSMiddleware, skip_paths=SKIP_PATHS, controller=controller),
+            Middleware(LegacyAccountMiddleware, jwk_paths=JWK_PATHS, kid_paths=KID_PATHS, controller=controller),
+        ]
+    if stack == "asgi":
+        middleware = [
+            Middleware(AcmeMiddleware, skip_paths=SKIP_PATHS, jwk_paths=JWK_PATHS, kid_paths=KID_PATHS, controller=controller),
+        ]
+
+    return Starlette(routes=[Route("/new-order", endpoint, methods=["POST"])], middleware=middleware)
+
+
+def b64u(data: bytes) -> str:
+    return base64.urlsafe_b64encode(data).rstrip(b"=").decode("ascii")
+
+
+def build_body(nonce: str) -> bytes:
+    protected = {"alg": "ES256", "nonce": nonce, "url": "http://bench/new-order", "kid": f"http://bench/account/{ACCOUNT_KID}"}
+    payload = {"identifiers": [{"type": "dns", "value": "www.example.com"}]}
+    return json.dumps({
+        "protected": b64u(json.dumps(protected).encode()),
+        "payload": b64u(json.dumps(payload).encode()),
+        "signature": b64u(b"\x00" * 64),
+    }).encode()
+
+
+async def call(app: Starlette, body: bytes) -> int:
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "POST",
+        "scheme": "http",
+        "path": "/new-order",
+        "raw_path": b"/new-order",
+        "root_path": "",
+        "query_string": b"",
+        "headers": [(b"host", b"bench"), (b"content-type", b"application/jose+json"), (b"content-length", str(len(body)).encode())],
+        "client": ("127.0.0.1", 50000),
+        "server": ("bench", 80),
+    }
+    sent = False
+    status = 0
+
+    async def receive():
+        nonlocal sent
+        if sent:
+            await asyncio.sleep(3600)
+        sent = True
+        return {"type": "http.request", "body": body, "more_body": False}
+
+    async def send(message):
+        nonlocal status
+        if message["type"] == "http.response.start":
+            status = message["status"]
+
+    await app(scope, receive, send)
+    return status
+
+
+async def run_stack(stack: str, requests: int, warmup: int) -> list[float]:
+    controller = SimpleNamespace(
+        config=SimpleNamespace(retry_after_seconds="5", nonce_ttl_seconds="300"),
+        database=InMemoryAccounts(),
+    )
+    controller.nonce_manager = NonceManager(controller.config)
+    app = build_app(stack, controller)
+
+    bodies = [build_body(await controller.nonce_manager.new_nonce()) for _ in range(requests + warmup)]
+    timings = []
+    for index, body in enumerate(bodies):
+        start = time.perf_counter()
+        status = await call(app, body)
+        elapsed = time.perf_counter() - start
+        if status != 201:
+            raise RuntimeError(f"{stack} stack answered {status}")
+        if index >= warmup:
+            timings.append(elapsed)
+
+    return timings
+
+
+def percentile(values: list[float], fraction: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Per-request overhead of the ACME request middleware.")
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--warmup", type=int, default=500)
+    args = parser.parse_args()
+
+    results = {}
+    for stack in ["bare", "legacy", "asgi"]:
+        results[stack] = await run_stack(stack, args.requests, args.warmup)
+
+    bare_mean = statistics.mean(results["bare"])
+    print(f"{'stack':<8} {'mean us':>10} {'p50 us':>10} {'p99 us':>10} {'overhead us':>12}")
+    for stack, timings in results.items():
+        mean = statistics.mean(timings)
+        print(
+            f"{stack:<8} {mean * 1e6:>10.1f} {percentile(timings, 0.5) * 1e6:>10.1f} "
+            f"{percentile(timings, 0.99) * 1e6:>10.1f} {(mean - bare_mean) * 1e6:>12.1f}"
+        )
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
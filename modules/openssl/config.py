@@ -140,6 +140,7 @@ class OpenSSLKeyConfig:
     password: str
     algorithm: str
     bits: int = 4096
+    curve: str = None
 
 @dataclass
 class OpenSSLModuleArgs(ModuleArgsConfig):
@@ -20,10 +20,10 @@ class OpenSSLData(ModuleData):
 
     @classmethod
     def get_by_cert_serial(cls, db, cert_serial: str) -> Optional['OpenSSLData']:
-        with db._get_session() as session:
+        with db.get_session() as session:
             return session.query(cls).filter(cls.cert_serial == cert_serial).first()
 
     @classmethod
     def get_by_cert_name(cls, db, cert_name: str) -> Optional['OpenSSLData']:
-        with db._get_session() as session:
+        with db.get_session() as session:
             return session.query(cls).filter(cls.cert_name == cert_name).first()
\ No newline at end of file
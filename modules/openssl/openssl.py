@@ -166,6 +166,8 @@ class OpenSSL(CryptoModule):
         command = f"{self.openssl_path} genpkey -config /tmp/{cert_config.name}/{cert_config.name}.conf -algorithm {key_config.algorithm}"
         if key_config.algorithm == "RSA" and key_config.bits:
             command += f" -pkeyopt rsa_keygen_bits:{key_config.bits}"
+        if key_config.algorithm == "EC" and key_config.curve:
+            command += f" -pkeyopt ec_paramgen_curve:{key_config.curve}"
         if key_config.password:
             command += f" -aes-256-cbc -pass pass:{key_config.password}"
 
@@ -0,0 +1,308 @@
+import asyncio
+import base64
+import contextvars
+import json
+import os
+import tempfile
+import time
+from collections import Counter, defaultdict
+from contextlib import asynccontextmanager
+from datetime import datetime, timedelta, timezone
+from typing import Iterator, Optional
+from urllib.parse import urlsplit
+
+import pytest
+import yaml
+from cryptography import x509
+from cryptography.hazmat.primitives import hashes, serialization
+from cryptography.hazmat.primitives.asymmetric import ec
+from cryptography.x509.oid import NameOID
+from jwcrypto import jwk as _jwk, jws as _jws
+from sqlalchemy import event
+from starlette.datastructures import Headers
+from starlette.responses import PlainTextResponse
+
+from vism_acme.util.dns import DnsResolver
+
+# Tests that drive the ACME API skip themselves with pytest.importorskip("httpx").
+try:
+    import httpx
+except ImportError:
+    httpx = None
+
+BENCH_DOMAIN = "bench.test"
+CURRENT_ENDPOINT: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar("bench_endpoint", default=None)
+
+
+def b64u(data: bytes) -> str:
+    return base64.urlsafe_b64encode(data).rstrip(b"=").decode("ascii")
+
+
+def endpoint_label(path: str) -> str:
+    parts = path.strip("/").split("/")
+    if parts[0] == "order" and len(parts) == 3:
+        return parts[2]
+    return parts[0]
+
+
+# Every simulated client gets a name under BENCH_DOMAIN, pointed at the address the clients connect from.
+class BenchResolver(DnsResolver):
+    @staticmethod
+    def _getaddrinfo(domain: str) -> set[str]:
+        if domain.endswith(f".{BENCH_DOMAIN}"):
+            return {"127.0.0.1"}
+        return DnsResolver._getaddrinfo(domain)
+
+
+class FakeCa:
+    def __init__(self, latency_seconds: float):
+        self.latency_seconds = latency_seconds
+        self.key = ec.generate_private_key(ec.SECP256R1())
+        self.name = x509.Name([x509.NameAttribute(NameOID.COMMON_NAME, "vism benchmark CA")])
+        self.signed = 0
+
+    async def sign(self, ca_name: str, csr_pem: str, module_args: dict = None) -> str:
+        if self.latency_seconds:
+            await asyncio.sleep(self.latency_seconds)
+
+        csr = x509.load_pem_x509_csr(csr_pem.encode("utf-8"))
+        now = datetime.now(timezone.utc)
+        certificate = (
+            x509.CertificateBuilder()
+            .subject_name(csr.subject)
+            .issuer_name(self.name)
+            .public_key(csr.public_key())
+            .serial_number(x509.random_serial_number())
+            .not_valid_before(now)
+            .not_valid_after(now + timedelta(days=1))
+            .add_extension(csr.extensions.get_extension_for_class(x509.SubjectAlternativeName).value, critical=False)
+            .sign(self.key, hashes.SHA256())
+        )
+        self.signed += 1
+        return certificate.public_bytes(serialization.Encoding.PEM).decode("utf-8")
+
+    async def close(self):
+        pass
+
+
+# One ASGI app answering HTTP-01 requests for every simulated host, routed on the Host header.
+class ResponderFarm:
+    def __init__(self):
+        self.key_authorizations: dict[tuple[str, str], str] = {}
+        self.requests = 0
+
+    def publish(self, host: str, token: str, key_authorization: str):
+        self.key_authorizations[(host, token)] = key_authorization
+
+    async def __call__(self, scope, receive, send):
+        self.requests += 1
+        host = Headers(scope=scope).get("host", "").split(":")[0]
+        key_authorization = self.key_authorizations.get((host, scope["path"].rsplit("/", 1)[-1]))
+        if key_authorization is None:
+            response = PlainTextResponse("", status_code=404)
+        else:
+            response = PlainTextResponse(key_authorization)
+        await response(scope, receive, send)
+
+
+# Statements run by background work (validation, signing) are charged to the request that scheduled it.
+class QueryCounter:
+    def __init__(self, engine):
+        self.counts: Counter = Counter()
+        event.listen(engine.sync_engine, "before_cursor_execute", self.on_execute)
+
+    def on_execute(self, *args):
+        self.counts[CURRENT_ENDPOINT.get() or "other"] += 1
+
+    def wrap(self, app):
+        async def counted_app(scope, receive, send):
+            if scope["type"] == "http":
+                CURRENT_ENDPOINT.set(endpoint_label(scope["path"]))
+            await app(scope, receive, send)
+
+        return counted_app
+
+
+class Stats:
+    def __init__(self):
+        self.latencies: dict[str, list[float]] = defaultdict(list)
+        self.errors: Counter = Counter()
+        self.failures: Counter = Counter()
+        self.issued = 0
+
+    def observe(self, endpoint: str, seconds: float, status_code: int):
+        self.latencies[endpoint].append(seconds)
+        if status_code >= 400:
+            self.errors[endpoint] += 1
+
+
+class FlowError(Exception):
+    pass
+
+
+class SimulatedClient:
+    def __init__(self, http: "httpx.AsyncClient", stats: Stats, farm: ResponderFarm, domain: str, poll_interval: float, poll_timeout: float):
+        self.http = http
+        self.stats = stats
+        self.farm = farm
+        self.domain = domain
+        self.poll_interval = poll_interval
+        self.poll_timeout = poll_timeout
+        self.key = _jwk.JWK.generate(kty="EC", crv="P-256")
+        self.public_jwk = json.loads(self.key.export_public())
+        self.thumbprint = self.key.thumbprint()
+        self.csr_der = self._build_csr()
+        self.kid = None
+        self.nonce = None
+
+    async def run(self):
+        directory = (await self.request("GET", "/directory")).json()
+        await self.request("HEAD", directory["newNonce"])
+
+        account = await self.post(directory["newAccount"], {"termsOfServiceAgreed": True}, use_jwk=True)
+        self.kid = account.headers["Location"]
+
+        response = await self.post(directory["newOrder"], {"identifiers": [{"type": "dns", "value": self.domain}]})
+        order_url = response.headers["Location"]
+        order = response.json()
+
+        for authz_url in order["authorizations"]:
+            authz = (await self.post(authz_url, None)).json()
+            challenge = next(challenge for challenge in authz["challenges"] if challenge["type"] == "http-01")
+            self.farm.publish(self.domain, challenge["token"], f"{challenge['token']}.{self.thumbprint}")
+            await self.post(challenge["url"], {})
+            await self.poll(authz_url)
+
+        await self.post(order["finalize"], {"csr": b64u(self.csr_der)})
+        order = await self.poll(order_url)
+        await self.post(order["certificate"], None)
+
+    async def request(self, method: str, url: str, **kwargs) -> "httpx.Response":
+        start = time.perf_counter()
+        response = await self.http.request(method, url, **kwargs)
+        self.stats.observe(endpoint_label(urlsplit(url).path), time.perf_counter() - start, response.status_code)
+        if "Replay-Nonce" in response.headers:
+            self.nonce = response.headers["Replay-Nonce"]
+        return response
+
+    async def post(self, url: str, payload: Optional[dict], use_jwk: bool = False) -> "httpx.Response":
+        for _ in range(3):
+            if not self.nonce:
+                await self.request("HEAD", "/new-nonce")
+
+            protected = {"alg": "ES256", "nonce": self.nonce, "url": url}
+            if use_jwk:
+                protected["jwk"] = self.public_jwk
+            else:
+                protected["kid"] = self.kid
+            self.nonce = None
+
+            token = _jws.JWS(b"" if payload is None else json.dumps(payload).encode("utf-8"))
+            token.add_signature(self.key, None, json.dumps(protected))
+            response = await self.request("POST", url, content=token.serialize(), headers={"Content-Type": "application/jose+json"})
+            if response.status_code == 400 and response.json().get("type", "").endswith(":badNonce"):
+                continue
+            if response.status_code >= 400:
+                raise FlowError(f"{endpoint_label(urlsplit(url).path)} {response.status_code}")
+            return response
+
+        raise FlowError(f"{endpoint_label(urlsplit(url).path)} badNonce")
+
+    async def poll(self, url: str) -> dict:
+        deadline = time.perf_counter() + self.poll_timeout
+        while True:
+            resource = (await self.post(url, None)).json()
+            if resource["status"] == "valid":
+                return resource
+            if resource["status"] not in ["pending", "ready", "processing"]:
+                raise FlowError(f"{endpoint_label(urlsplit(url).path)} {resource['status']}")
+            if time.perf_counter() > deadline:
+                raise FlowError(f"{endpoint_label(urlsplit(url).path)} timeout")
+            await asyncio.sleep(self.poll_interval)
+
+    def _build_csr(self) -> bytes:
+        key = ec.generate_private_key(ec.SECP256R1())
+        csr = (
+            x509.CertificateSigningRequestBuilder()
+            .subject_name(x509.Name([x509.NameAttribute(NameOID.COMMON_NAME, self.domain)]))
+            .add_extension(x509.SubjectAlternativeName([x509.DNSName(self.domain)]), critical=False)
+            .sign(key, hashes.SHA256())
+        )
+        return csr.public_bytes(serialization.Encoding.DER)
+
+
+# The database section of the given config is kept; everything that would reach outside the
+# process or throttle the run is replaced.
+def write_bench_config(config_file_path: str) -> str:
+    with open(config_file_path, "r") as file:
+        raw_config = yaml.safe_load(file) or {}
+
+    acme_config = raw_config.get("vism_acme", {})
+    acme_config["profiles"] = [{"name": "bench", "ca": "bench", "default": True}]
+    acme_config["validation_queue"] = {"enabled": False}
+    acme_config["sweeper"] = {"enabled": False}
+    acme_config["rate_limits"] = {"enabled": False}
+
+    fd, path = tempfile.mkstemp(prefix="vism-bench-", suffix=".yaml")
+    with os.fdopen(fd, "w") as file:
+        yaml.safe_dump({"vism_acme": acme_config}, file)
+    return path
+
+
+def build_controller(config_file_path: str, farm: ResponderFarm, ca: FakeCa):
+    from vism_acme.controller import VismACMEController
+
+    bench_config_path = write_bench_config(config_file_path)
+    previous_config_file_path = os.environ.get("CONFIG_FILE_PATH")
+    os.environ["CONFIG_FILE_PATH"] = bench_config_path
+    try:
+        controller = VismACMEController()
+    finally:
+        os.unlink(bench_config_path)
+        if previous_config_file_path is None:
+            del os.environ["CONFIG_FILE_PATH"]
+        else:
+            os.environ["CONFIG_FILE_PATH"] = previous_config_file_path
+
+    controller.resolver.close()
+    controller.resolver = BenchResolver(controller.config.dns)
+    controller.ca_client = ca
+    controller.http01_client.client = httpx.AsyncClient(transport=httpx.ASGITransport(app=farm), trust_env=False)
+    return controller
+
+
+# CONFIG_FILE_PATH points the ACME tests at an existing database; without it they start a throwaway Postgres of their own.
+@pytest.fixture(scope="session")
+def acme_config_path(tmp_path_factory) -> Iterator[str]:
+    if "CONFIG_FILE_PATH" in os.environ:
+        yield os.environ["CONFIG_FILE_PATH"]
+        return
+
+    pgserver = pytest.importorskip("pgserver", reason="the ACME tests need CONFIG_FILE_PATH or pgserver from requirements-test.txt")
+    pgdata = tmp_path_factory.mktemp("pgdata")
+    server = pgserver.get_server(pgdata, cleanup_mode="delete")
+    server.psql("CREATE DATABASE vism_acme;")
+
+    config_path = tmp_path_factory.mktemp("config") / "acme_config.yaml"
+    with open(config_path, "w") as file:
+        yaml.safe_dump({"vism_acme": {"database": {"host": str(pgdata), "port": 5432, "database": "vism_acme", "username": "postgres"}}}, file)
+    try:
+        yield str(config_path)
+    finally:
+        server.cleanup()
+
+
+@asynccontextmanager
+async def running_controller(config_file_path: str, farm: ResponderFarm, ca: FakeCa):
+    controller = build_controller(config_file_path, farm, ca)
+    lifespan = controller.lifespan(controller.api)
+    await lifespan.__aenter__()
+    try:
+        yield controller
+    finally:
+        await lifespan.__aexit__(None, None, None)
+
+
+# In-process requests return once the background tasks (validation, signing) they scheduled are done.
+def in_process_client(app) -> "httpx.AsyncClient":
+    return httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://acme.test")
@@ -0,0 +1,86 @@
+import asyncio
+import os
+
+import pytest
+
+pytest.importorskip("httpx")
+from tests.conftest import BENCH_DOMAIN, FakeCa, QueryCounter, ResponderFarm, SimulatedClient, Stats, b64u, in_process_client, running_controller
+
+# Statements per request, including the background work (validation, signing) the request schedules.
+# A change here is a change in database round trips per request: update it on purpose, not to make the test pass.
+EXPECTED_STATEMENTS = {
+    "GET /directory": 0,
+    "HEAD /new-nonce": 0,
+    "POST /new-account": 3,
+    "POST /account/{account_kid}": 4,
+    "POST /new-order": 6,
+    "POST /authz/{authz_id}": 2,
+    "POST /challenge/{challenge_id}": 5,
+    "POST /order/{order_id}/finalize": 7,
+    "POST /order/{order_id}": 3,
+    "POST /order/{order_id}/certificate": 2,
+    "POST /orders/{account_kid}": 2,
+    "POST /account/{account_kid}/orders": 2,
+}
+
+
+# Requests run one at a time and in-process, so the statements of one request are the growth of the total.
+class MeasuredClient(SimulatedClient):
+    def __init__(self, queries: QueryCounter, *args):
+        super().__init__(*args)
+        self.queries = queries
+        self.statements: dict[str, int] = {}
+
+    async def measure(self, route: str, call):
+        before = sum(self.queries.counts.values())
+        response = await call
+        self.statements[route] = sum(self.queries.counts.values()) - before
+        return response
+
+    async def run(self):
+        directory = (await self.measure("GET /directory", self.request("GET", "/directory"))).json()
+        await self.measure("HEAD /new-nonce", self.request("HEAD", directory["newNonce"]))
+
+        account = await self.measure("POST /new-account", self.post(directory["newAccount"], {"termsOfServiceAgreed": True}, use_jwk=True))
+        self.kid = account.headers["Location"]
+        await self.measure("POST /account/{account_kid}", self.post(self.kid, {"contact": [f"mailto:admin@{self.domain}"]}))
+
+        response = await self.measure("POST /new-order", self.post(directory["newOrder"], {"identifiers": [{"type": "dns", "value": self.domain}]}))
+        order_url = response.headers["Location"]
+        order = response.json()
+
+        authz_url = order["authorizations"][0]
+        authz = (await self.measure("POST /authz/{authz_id}", self.post(authz_url, None))).json()
+        challenge = next(challenge for challenge in authz["challenges"] if challenge["type"] == "http-01")
+        self.farm.publish(self.domain, challenge["token"], f"{challenge['token']}.{self.thumbprint}")
+        await self.measure("POST /challenge/{challenge_id}", self.post(challenge["url"], {}))
+        assert (await self.post(authz_url, None)).json()["status"] == "valid"
+
+        await self.measure("POST /order/{order_id}/finalize", self.post(order["finalize"], {"csr": b64u(self.csr_der)}))
+        order = (await self.measure("POST /order/{order_id}", self.post(order_url, None))).json()
+        assert order["status"] == "valid"
+        await self.measure("POST /order/{order_id}/certificate", self.post(order["certificate"], None))
+
+        await self.measure("POST /orders/{account_kid}", self.post(account.json()["orders"], None))
+        await self.measure("POST /account/{account_kid}/orders", self.post(f"{self.kid}/orders", None))
+
+
+async def measure_routes(config_file_path: str) -> dict[str, int]:
+    farm = ResponderFarm()
+    async with running_controller(config_file_path, farm, FakeCa(0)) as controller:
+        queries = QueryCounter(controller.database.engine)
+        async with in_process_client(queries.wrap(controller.api)) as http:
+            client = MeasuredClient(queries, http, Stats(), farm, f"queries-{os.getpid()}.{BENCH_DOMAIN}", 0, 0)
+            await client.run()
+
+    return client.statements
+
+
+@pytest.fixture(scope="module")
+def route_statements(acme_config_path):
+    return asyncio.run(measure_routes(acme_config_path))
+
+
+@pytest.mark.parametrize("route", EXPECTED_STATEMENTS)
+def test_route_statement_count(route_statements, route):
+    assert route_statements[route] == EXPECTED_STATEMENTS[route]
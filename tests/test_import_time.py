@@ -0,0 +1,65 @@
+import os
+import subprocess
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Generous enough for a cold CI runner; a heavy dependency creeping back in costs far more than the margin.
+IMPORT_BUDGET_SECONDS = 1.0
+
+# What loading configuration, the CLI or a module under test must not pay for.
+HEAVY_PACKAGES = [
+    "asyncpg",
+    "fastapi",
+    "httpx",
+    "opentelemetry",
+    "prometheus_client",
+    "psycopg2",
+    "sqlalchemy",
+    "uvicorn",
+    "vism.metrics",
+    "vism.tracing",
+    "vism_acme.controller",
+    "vism_acme.db",
+    "vism_ca.api",
+    "vism_ca.ca",
+]
+
+
+# `-X importtime` writes "self [us] | cumulative [us] | package" to stderr, nested imports indented under their importer.
+def import_profile(*args: str) -> tuple[list[str], float]:
+    result = subprocess.run([sys.executable, "-X", "importtime", *args], capture_output=True, text=True, check=True, cwd=ROOT)
+    modules = []
+    total_us = 0
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, package = line.removeprefix("import time:").split("|")
+        modules.append(package.strip())
+        if not package.startswith("  "):
+            total_us += int(cumulative)
+    return modules, total_us / 1e6
+
+
+def heavy_imports(modules: list[str]) -> list[str]:
+    return sorted(
+        module for module in modules
+        if any(module == package or module.startswith(f"{package}.") for package in HEAVY_PACKAGES)
+    )
+
+
+@pytest.mark.parametrize("module", ["vism_acme", "vism_acme.config", "vism_ca.config"])
+def test_config_import_stays_light(module):
+    modules, seconds = import_profile("-c", f"import {module}")
+
+    assert heavy_imports(modules) == []
+    assert seconds < IMPORT_BUDGET_SECONDS
+
+
+def test_cli_help_stays_light():
+    modules, seconds = import_profile("vism.py", "--help")
+
+    assert heavy_imports(modules) == []
+    assert seconds < IMPORT_BUDGET_SECONDS
@@ -0,0 +1,122 @@
+import asyncio
+import os
+import sys
+
+import pytest
+from fastapi import FastAPI
+
+pytest.importorskip("opentelemetry.sdk.trace")
+from opentelemetry import trace
+from opentelemetry.sdk.trace import TracerProvider
+from opentelemetry.sdk.trace.export import SimpleSpanProcessor
+from opentelemetry.sdk.trace.export.in_memory_span_exporter import InMemorySpanExporter
+from opentelemetry.trace import SpanKind
+
+pytest.importorskip("httpx")
+from tests.conftest import BENCH_DOMAIN, FakeCa, ResponderFarm, SimulatedClient, Stats, in_process_client, running_controller
+from vism.tracing import TracingMiddleware, setup_tracing_middleware
+from vism_acme.config import Ca
+from vism_acme.util.ca import CaClient
+
+
+# The global tracer provider can only be installed once per process.
+@pytest.fixture(scope="module")
+def exporter() -> InMemorySpanExporter:
+    exporter = InMemorySpanExporter()
+    provider = TracerProvider()
+    provider.add_span_processor(SimpleSpanProcessor(exporter))
+    trace.set_tracer_provider(provider)
+    return exporter
+
+
+@pytest.fixture
+def spans(exporter: InMemorySpanExporter) -> InMemorySpanExporter:
+    exporter.clear()
+    return exporter
+
+
+def spans_named(exporter: InMemorySpanExporter, name: str) -> list:
+    return [span for span in exporter.get_finished_spans() if span.name == name]
+
+
+async def issue_certificate(config_file_path: str):
+    farm = ResponderFarm()
+    async with running_controller(config_file_path, farm, FakeCa(0)) as controller:
+        async with in_process_client(controller.api) as http:
+            await SimulatedClient(http, Stats(), farm, f"tracing-{os.getpid()}.{BENCH_DOMAIN}", 0, 60).run()
+
+
+def test_acme_flow_spans(spans, acme_config_path):
+    asyncio.run(issue_certificate(acme_config_path))
+
+    assert spans_named(spans, "AcmeMiddleware.verify_jws")
+    assert spans_named(spans, "AcmeMiddleware.get_account")
+    assert spans_named(spans, "AsyncVismDatabase.get_order_view_by_id")
+    assert spans_named(spans, "AsyncVismDatabase.record_order_certificate")
+
+    [validate] = spans_named(spans, "Http01Validator.validate")
+    assert validate.attributes["acme.identifier"].startswith("tracing-")
+    [check] = spans_named(spans, "Http01Validator.check")
+    assert check.parent.span_id == validate.context.span_id
+
+
+def test_ca_client_propagates_context(spans):
+    ca_api = FastAPI()
+
+    @ca_api.post("/certificates/{ca_name}/sign", status_code=201)
+    async def sign(ca_name: str):
+        return {"chain_pem": "chain"}
+
+    setup_tracing_middleware(ca_api)
+
+    async def sign_csr():
+        ca_client = CaClient(Ca(url="http://ca.test"))
+        await ca_client.client.aclose()
+        ca_client.client = in_process_client(ca_api)
+        try:
+            return await ca_client.sign("service_ca", "csr")
+        finally:
+            await ca_client.close()
+
+    assert asyncio.run(sign_csr()) == "chain"
+
+    # FastAPI releases with native telemetry open a server span of their own next to TracingMiddleware's.
+    [client_span] = spans_named(spans, "CaClient.sign")
+    server_spans = [span for span in spans.get_finished_spans() if span.kind == SpanKind.SERVER]
+    assert client_span.kind == SpanKind.CLIENT
+    assert any(middleware.cls is TracingMiddleware for middleware in ca_api.user_middleware)
+    assert any(span.parent is not None and span.parent.span_id == client_span.context.span_id for span in server_spans)
+    assert all(span.context.trace_id == client_span.context.trace_id for span in server_spans)
+
+
+@pytest.mark.skipif(sys.version_info < (3, 12), reason="vism_ca requires Python 3.12")
+def test_certificate_create_span(spans):
+    from vism_ca.ca.crypto.certificate import Certificate
+    from vism_ca.ca.db import CertificateEntity
+
+    class CryptoModule:
+        def cleanup(self, full: bool = False):
+            pass
+
+    certificate = Certificate.__new__(Certificate)
+    certificate.name = "root"
+    certificate.crypto_module = CryptoModule()
+    certificate.db_entity = CertificateEntity(name="root", externally_managed=False, crt_pem="crt", crl_pem="crl")
+
+    assert certificate.create().crt_pem == "crt"
+    [create] = spans_named(spans, "Certificate.create")
+    assert create.attributes["vism.certificate"] == "root"
+
+
+@pytest.mark.skipif(sys.version_info < (3, 12), reason="vism_ca requires Python 3.12")
+def test_chroot_run_command_span(spans, tmp_path):
+    from vism_ca.ca.crypto.chroot import Chroot
+
+    chroot = Chroot(str(tmp_path))
+    chroot.unshare_cmd = []
+
+    assert chroot.run_command("echo hello").stdout == "hello\n"
+    [command] = spans_named(spans, "Chroot.run_command")
+    assert command.attributes["process.executable.name"] == "echo"
+    assert command.attributes["vism.subcommand"] == "hello"
+    assert command.attributes["process.exit.code"] == 0
@@ -1,9 +1,9 @@
 import argparse
+import asyncio
 import logging
+import os
 from typing import Any, Optional
 
-import uvicorn
-
 
 logger = logging.getLogger("cli")
 
@@ -31,21 +31,46 @@ def main() -> Optional[Any]:
     ca_parser = component_subparsers.add_parser('ca', help='CA')
     ca_subparser = ca_parser.add_subparsers(dest='ca_command', required=True, help='ca command')
     status_parser = ca_subparser.add_parser('start', help='Run the CA api')
+    status_parser.add_argument('--dev', action='store_true', help='Run a single worker with auto reload', default=False)
+    ca_subparser.add_parser('bench', help='Benchmark certificate creation and csr signing', add_help=False)
 
     ### Acme ###
     acme_parser = component_subparsers.add_parser('acme', help='ACME')
     acme_subparser = acme_parser.add_subparsers(dest='acme_command', required=True, help='acme command')
     status_parser = acme_subparser.add_parser('start', help='Run the ACME api')
+    status_parser.add_argument('--dev', action='store_true', help='Run a single worker with auto reload', default=False)
+    validator_parser = acme_subparser.add_parser('validator', help='Run the ACME challenge validation worker')
+    migrate_parser = acme_subparser.add_parser('migrate', help='Apply pending ACME database migrations')
 
-    args = parser.parse_args()
+    args, bench_args = parser.parse_known_args()
+    if bench_args and not (args.component == 'ca' and args.ca_command == 'bench'):
+        parser.error(f"unrecognized arguments: {' '.join(bench_args)}")
 
     if args.component == 'ca':
         if args.ca_command == 'start':
-            uvicorn.run("vism_ca.api:app", host="0.0.0.0", port=8000, reload=True)
+            from vism.server import serve
+            from vism_ca.config import APIConfig
+            api_config = APIConfig(os.environ.get('CONFIG_FILE_PATH', './config.yaml'))
+            serve("vism_ca.api:create_app", api_config.api, dev=args.dev, factory=True)
+        if args.ca_command == 'bench':
+            from vism_ca.bench import main as bench
+            bench(bench_args)
 
     if args.component == 'acme':
         if args.acme_command == 'start':
-            uvicorn.run("vism_acme:app", host="0.0.0.0", port=8080, reload=True)
+            from vism.server import serve
+            from vism_acme.config import AcmeConfig
+            acme_config = AcmeConfig(os.environ.get('CONFIG_FILE_PATH', './acme_config.yaml'))
+            serve("vism_acme.controller:create_app", acme_config.server, dev=args.dev, factory=True)
+        if args.acme_command == 'validator':
+            from vism_acme.controller import VismACMEController
+            from vism_acme.validators.queue import ValidationWorker
+            asyncio.run(ValidationWorker(VismACMEController()).run())
+        if args.acme_command == 'migrate':
+            from vism_acme.config import AcmeConfig
+            from vism_acme.db import AsyncVismDatabase
+            acme_config = AcmeConfig(os.environ.get('CONFIG_FILE_PATH', './acme_config.yaml'))
+            asyncio.run(AsyncVismDatabase(acme_config.database).migrate())
 
 
     return None
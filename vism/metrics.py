@@ -0,0 +1,211 @@
+import functools
+import logging
+import os
+import threading
+import time
+from contextlib import nullcontext
+
+logger = logging.getLogger(__name__)
+
+MULTIPROC_DIR_ENV = "PROMETHEUS_MULTIPROC_DIR"
+
+
+# prometheus_client picks its value storage when it is first imported, so it is only imported once a metric is used.
+# By then the server has set PROMETHEUS_MULTIPROC_DIR and forked or spawned the worker that uses it.
+@functools.cache
+def _prometheus_client():
+    try:
+        import prometheus_client
+        import prometheus_client.multiprocess
+    except ImportError:
+        return None
+    return prometheus_client
+
+
+class NoopMetric:
+    def labels(self, *args, **kwargs) -> 'NoopMetric':
+        return self
+
+    def observe(self, value: float):
+        pass
+
+    def inc(self, amount: float = 1):
+        pass
+
+    def dec(self, amount: float = 1):
+        pass
+
+    def set(self, value: float):
+        pass
+
+    def track_inprogress(self):
+        return nullcontext()
+
+
+class LazyMetric:
+    def __init__(self, kind: str, name: str, documentation: str, labelnames: list[str] = (), **kwargs):
+        self.kind = kind
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self.kwargs = kwargs
+        self.lock = threading.Lock()
+        self.metric = None
+
+    def _get(self):
+        if self.metric is None:
+            with self.lock:
+                if self.metric is None:
+                    client = _prometheus_client()
+                    if client is None:
+                        self.metric = NoopMetric()
+                    else:
+                        self.metric = getattr(client, self.kind)(self.name, self.documentation, self.labelnames, **self.kwargs)
+        return self.metric
+
+    def labels(self, *args, **kwargs):
+        return self._get().labels(*args, **kwargs)
+
+    def observe(self, value: float):
+        self._get().observe(value)
+
+    def inc(self, amount: float = 1):
+        self._get().inc(amount)
+
+    def dec(self, amount: float = 1):
+        self._get().dec(amount)
+
+    def set(self, value: float):
+        self._get().set(value)
+
+    def track_inprogress(self):
+        return self._get().track_inprogress()
+
+
+def _histogram(name: str, documentation: str, labelnames: list[str] = ()):
+    return LazyMetric("Histogram", name, documentation, labelnames)
+
+def _counter(name: str, documentation: str, labelnames: list[str] = ()):
+    return LazyMetric("Counter", name, documentation, labelnames)
+
+# Gauges are summed over the live worker processes when running multi-process.
+def _gauge(name: str, documentation: str, labelnames: list[str] = ()):
+    return LazyMetric("Gauge", name, documentation, labelnames, multiprocess_mode="livesum")
+
+
+HTTP_REQUEST_DURATION = _histogram("vism_http_request_duration_seconds", "Time until the response is sent, per route and status.", ["app", "method", "route", "status"])
+DB_QUERY_DURATION = _histogram("vism_db_query_duration_seconds", "Database statement execution time.", ["app", "statement"])
+NONCE_STORE_SIZE = _gauge("vism_nonce_store_size", "Outstanding replay nonces.")
+NONCE_LOOKUPS = _counter("vism_nonce_lookups_total", "Replay nonces presented by clients, by whether they were accepted.", ["result"])
+DNS_LOOKUP_DURATION = _histogram("vism_dns_lookup_duration_seconds", "DNS lookups for client validation, by direction, cache use and outcome.", ["kind", "cache", "outcome"])
+HTTP01_VALIDATION_DURATION = _histogram("vism_http01_validation_duration_seconds", "HTTP-01 challenge checks, by outcome.", ["outcome"])
+CHROOT_COMMAND_DURATION = _histogram("vism_chroot_command_duration_seconds", "Commands run in the CA chroot, by program and subcommand.", ["program", "subcommand"])
+KDF_DURATION = _histogram("vism_kdf_duration_seconds", "Private key encryption key derivations.")
+SIGNING_QUEUE_DEPTH = _gauge("vism_signing_queue_depth", "Signing requests waiting for or being handled by the signer.", ["app"])
+
+
+# Requests rejected before routing (e.g. by the ACME middleware) are matched here so they keep their route label.
+def route_template(scope) -> str:
+    from starlette.routing import Match
+
+    route = scope.get("route")
+    if route is not None:
+        return route.path
+
+    app = scope.get("app")
+    for candidate in getattr(getattr(app, "router", None), "routes", []):
+        match, _ = candidate.matches(scope)
+        if match == Match.FULL:
+            return candidate.path
+
+    return "unmatched"
+
+
+class MetricsMiddleware:
+    def __init__(self, app, app_name: str):
+        self.app = app
+        self.app_name = app_name
+
+    async def __call__(self, scope, receive, send) -> None:
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        start = time.perf_counter()
+        status_code = 500
+        observed = False
+
+        # Background tasks run after the response inside the same call, so the clock stops at the last body chunk.
+        async def send_wrapper(message):
+            nonlocal status_code, observed
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+            if message["type"] == "http.response.body" and not message.get("more_body", False) and not observed:
+                observed = True
+                self._observe(scope, status_code, time.perf_counter() - start)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            if not observed:
+                self._observe(scope, status_code, time.perf_counter() - start)
+
+    def _observe(self, scope, status_code: int, seconds: float):
+        HTTP_REQUEST_DURATION.labels(
+            app=self.app_name,
+            method=scope["method"],
+            route=route_template(scope),
+            status=str(status_code),
+        ).observe(seconds)
+
+
+def _statement_kind(statement: str) -> str:
+    kind = statement.lstrip().split(None, 1)[0].upper() if statement.strip() else ""
+    return kind if kind in ["SELECT", "INSERT", "UPDATE", "DELETE"] else "OTHER"
+
+def instrument_engine(engine, app_name: str):
+    if _prometheus_client() is None:
+        return
+
+    from sqlalchemy import event
+
+    sync_engine = getattr(engine, "sync_engine", engine)
+
+    @event.listens_for(sync_engine, "before_cursor_execute")
+    def before_cursor_execute(connection, cursor, statement, parameters, context, executemany):
+        connection.info.setdefault("vism_query_start", []).append(time.perf_counter())
+
+    @event.listens_for(sync_engine, "after_cursor_execute")
+    def after_cursor_execute(connection, cursor, statement, parameters, context, executemany):
+        started = connection.info["vism_query_start"].pop()
+        DB_QUERY_DURATION.labels(app=app_name, statement=_statement_kind(statement)).observe(time.perf_counter() - started)
+
+    @event.listens_for(sync_engine, "handle_error")
+    def handle_error(context):
+        if context.connection is not None and context.connection.info.get("vism_query_start"):
+            context.connection.info["vism_query_start"].pop()
+
+
+def metrics_endpoint():
+    from starlette.responses import Response
+
+    prometheus_client = _prometheus_client()
+    registry = prometheus_client.REGISTRY
+    if os.environ.get(MULTIPROC_DIR_ENV):
+        registry = prometheus_client.CollectorRegistry()
+        prometheus_client.multiprocess.MultiProcessCollector(registry)
+
+    return Response(prometheus_client.generate_latest(registry), media_type=prometheus_client.CONTENT_TYPE_LATEST)
+
+def setup_metrics(api, app_name: str):
+    if _prometheus_client() is None:
+        logger.warning("Metrics are enabled but prometheus_client is not installed, /metrics is not served.")
+        return
+
+    api.add_middleware(MetricsMiddleware, app_name=app_name)
+    api.add_api_route("/metrics", metrics_endpoint, methods=["GET"], include_in_schema=False)
+
+
+def mark_process_dead(pid: int):
+    if os.environ.get(MULTIPROC_DIR_ENV) and _prometheus_client() is not None:
+        _prometheus_client().multiprocess.mark_process_dead(pid)
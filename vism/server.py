@@ -0,0 +1,123 @@
+import logging
+import os
+import socket
+import tempfile
+
+import uvicorn
+from uvicorn.importer import import_from_string
+
+logger = logging.getLogger(__name__)
+
+
+def serve(app: str, server_config, dev: bool = False, factory: bool = False):
+    if dev:
+        logger.info(f"Starting {app} in development mode with auto reload on {server_config.host}:{server_config.port}")
+        uvicorn.run(app, host=server_config.host, port=server_config.port, reload=True, factory=factory)
+        return
+
+    _prepare_metrics_dir(server_config.workers)
+
+    if server_config.server == "gunicorn":
+        return _serve_gunicorn(app, server_config, factory)
+
+    return _serve_uvicorn(app, server_config, factory)
+
+
+def _serve_uvicorn(app: str, server_config, factory: bool):
+    options = {
+        "factory": factory,
+        "host": server_config.host,
+        "port": server_config.port,
+        "workers": server_config.workers,
+        "loop": server_config.loop,
+        "http": server_config.http,
+        "backlog": server_config.backlog,
+        "timeout_keep_alive": server_config.timeout_keep_alive,
+        "timeout_graceful_shutdown": server_config.timeout_graceful_shutdown,
+    }
+
+    if not server_config.reuse_port:
+        uvicorn.run(app, **options)
+        return
+
+    # uvicorn has no SO_REUSEPORT option of its own; a single worker can be handed a pre-bound socket.
+    if server_config.workers > 1:
+        raise ValueError("reuse_port with more than one worker requires server: gunicorn")
+
+    sock = _bind_reuse_port_socket(server_config.host, server_config.port, server_config.backlog)
+    try:
+        uvicorn.Server(uvicorn.Config(app, **options)).run(sockets=[sock])
+    except KeyboardInterrupt:
+        pass
+
+
+def _serve_gunicorn(app: str, server_config, factory: bool):
+    try:
+        from gunicorn.app.base import BaseApplication
+    except ImportError:
+        raise ValueError("server: gunicorn requires the gunicorn package to be installed")
+
+    try:
+        from uvicorn_worker import UvicornWorker
+    except ImportError:
+        from uvicorn.workers import UvicornWorker
+
+    worker_class = type("VismUvicornWorker", (UvicornWorker,), {
+        "CONFIG_KWARGS": {**UvicornWorker.CONFIG_KWARGS, "loop": server_config.loop, "http": server_config.http},
+    })
+
+    options = {
+        "bind": f"{server_config.host}:{server_config.port}",
+        "workers": server_config.workers,
+        "worker_class": worker_class,
+        "backlog": server_config.backlog,
+        "keepalive": server_config.timeout_keep_alive,
+        "graceful_timeout": server_config.timeout_graceful_shutdown,
+        "reuse_port": server_config.reuse_port,
+    }
+
+    def child_exit(server, worker):
+        from vism.metrics import mark_process_dead
+        mark_process_dead(worker.pid)
+
+    options["child_exit"] = child_exit
+
+    class VismApplication(BaseApplication):
+        def load_config(self):
+            for key, value in options.items():
+                self.cfg.set(key, value)
+
+        def load(self):
+            loaded = import_from_string(app)
+            return loaded() if factory else loaded
+
+    VismApplication().run()
+
+
+# Workers share metrics through files in this directory. prometheus_client reads it on import, so it has to be
+# set before any worker loads the app, and files left by an earlier run would be summed into the new one.
+def _prepare_metrics_dir(workers: int):
+    directory = os.environ.get("PROMETHEUS_MULTIPROC_DIR")
+    if not directory:
+        if workers <= 1:
+            return
+        directory = tempfile.mkdtemp(prefix="vism-metrics-")
+        os.environ["PROMETHEUS_MULTIPROC_DIR"] = directory
+
+    os.makedirs(directory, exist_ok=True)
+    for name in os.listdir(directory):
+        if name.endswith(".db"):
+            os.remove(os.path.join(directory, name))
+
+
+def _bind_reuse_port_socket(host: str, port: int, backlog: int) -> socket.socket:
+    family = socket.AF_INET6 if ":" in host else socket.AF_INET
+    # asyncio only enables TCP_NODELAY on accepted connections when the listening socket says IPPROTO_TCP;
+    # without it every response split over two writes waits out the client's delayed ACK.
+    sock = socket.socket(family, socket.SOCK_STREAM, socket.IPPROTO_TCP)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
+    sock.bind((host, port))
+    sock.listen(backlog)
+    sock.set_inheritable(True)
+    return sock
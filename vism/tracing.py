@@ -0,0 +1,162 @@
+import functools
+import inspect
+import logging
+from contextlib import asynccontextmanager, contextmanager, nullcontext
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from vism.metrics import route_template
+
+try:
+    from opentelemetry import propagate, trace
+    from opentelemetry.trace import SpanKind, Status, StatusCode
+except ImportError:
+    trace = None
+
+logger = logging.getLogger(__name__)
+
+
+# Spans only record once a tracer provider is installed, by setup_tracing or by the opentelemetry-instrument launcher.
+def span(name: str, kind: str = "internal", **attributes):
+    if trace is None:
+        return nullcontext()
+    return trace.get_tracer("vism").start_as_current_span(name, kind=SpanKind[kind.upper()], attributes=attributes)
+
+def inject_context(headers: dict) -> dict:
+    if trace is not None:
+        propagate.inject(headers)
+    return headers
+
+def traced(name: str):
+    def decorator(function):
+        if inspect.iscoroutinefunction(function):
+            @functools.wraps(function)
+            async def async_wrapper(*args, **kwargs):
+                with span(name):
+                    return await function(*args, **kwargs)
+            return async_wrapper
+
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            with span(name):
+                return function(*args, **kwargs)
+        return wrapper
+
+    return decorator
+
+def _traced_context_manager(name: str, function):
+    wrapped = function.__wrapped__
+    if inspect.isasyncgenfunction(wrapped):
+        @asynccontextmanager
+        async def async_wrapper(*args, **kwargs):
+            with span(name):
+                async with function(*args, **kwargs) as value:
+                    yield value
+        return functools.wraps(function)(async_wrapper)
+
+    @contextmanager
+    def wrapper(*args, **kwargs):
+        with span(name):
+            with function(*args, **kwargs) as value:
+                yield value
+    return functools.wraps(function)(wrapper)
+
+# Wraps every public method of a class in a span named after it; context manager methods span the whole block.
+def traced_methods(cls):
+    for attribute, function in list(vars(cls).items()):
+        if attribute.startswith("_") or not inspect.isfunction(function):
+            continue
+
+        name = f"{cls.__name__}.{attribute}"
+        wrapped = getattr(function, "__wrapped__", None)
+        if wrapped is not None and (inspect.isgeneratorfunction(wrapped) or inspect.isasyncgenfunction(wrapped)):
+            setattr(cls, attribute, _traced_context_manager(name, function))
+        else:
+            setattr(cls, attribute, traced(name)(function))
+
+    return cls
+
+
+class TracingMiddleware:
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or trace is None:
+            return await self.app(scope, receive, send)
+
+        headers = {key.decode("latin-1"): value.decode("latin-1") for key, value in scope.get("headers", [])}
+        request_span = trace.get_tracer("vism").start_span(
+            scope["method"],
+            context=propagate.extract(headers),
+            kind=SpanKind.SERVER,
+            attributes={"http.request.method": scope["method"], "url.path": scope["path"]},
+        )
+        ended = False
+
+        def end(status_code: int):
+            nonlocal ended
+            ended = True
+            route = route_template(scope)
+            request_span.update_name(f"{scope['method']} {route}")
+            request_span.set_attribute("http.route", route)
+            request_span.set_attribute("http.response.status_code", status_code)
+            if status_code >= 500:
+                request_span.set_status(Status(StatusCode.ERROR))
+            request_span.end()
+
+        status_code = 500
+
+        # Ends with the response like the latency histogram; background tasks show up as children after it.
+        async def send_wrapper(message: Message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+            if message["type"] == "http.response.body" and not message.get("more_body", False) and not ended:
+                end(status_code)
+
+        try:
+            with trace.use_span(request_span, end_on_exit=False, record_exception=False, set_status_on_exception=False):
+                await self.app(scope, receive, send_wrapper)
+        except Exception as e:
+            if not ended:
+                request_span.record_exception(e)
+            raise
+        finally:
+            if not ended:
+                end(status_code)
+
+
+def setup_tracing(config):
+    if not config.enabled:
+        return
+
+    try:
+        from opentelemetry.sdk.resources import Resource
+        from opentelemetry.sdk.trace import TracerProvider
+        from opentelemetry.sdk.trace.export import BatchSpanProcessor, ConsoleSpanExporter
+    except ImportError:
+        logger.warning("Tracing is enabled but opentelemetry-sdk is not installed, no spans are exported.")
+        return
+
+    if config.exporter == "console":
+        exporter = ConsoleSpanExporter()
+    else:
+        try:
+            from opentelemetry.exporter.otlp.proto.http.trace_exporter import OTLPSpanExporter
+        except ImportError:
+            logger.warning("Tracing exporter otlp requires opentelemetry-exporter-otlp-proto-http, no spans are exported.")
+            return
+        exporter = OTLPSpanExporter(endpoint=config.endpoint) if config.endpoint else OTLPSpanExporter()
+
+    provider = TracerProvider(resource=Resource.create({"service.name": config.service_name}))
+    provider.add_span_processor(BatchSpanProcessor(exporter))
+    trace.set_tracer_provider(provider)
+
+def setup_tracing_middleware(api):
+    if trace is None:
+        logger.warning("Tracing is enabled but opentelemetry-api is not installed, requests are not traced.")
+        return
+
+    api.add_middleware(TracingMiddleware)
@@ -2,6 +2,7 @@ import ipaddress
 import subprocess
 import os
 import base64
+import time
 from cryptography.hazmat.primitives.kdf.pbkdf2 import PBKDF2HMAC
 from cryptography.hazmat.primitives import hashes
 from cryptography.hazmat.backends import default_backend
@@ -23,6 +24,8 @@ def is_valid_subnet(subnet_str):
         return False
 
 def derive_key(password: str, salt: bytes) -> bytes:
+    from vism.metrics import KDF_DURATION
+
     kdf = PBKDF2HMAC(
         algorithm=hashes.SHA256(),
         length=32,
@@ -30,7 +33,10 @@ def derive_key(password: str, salt: bytes) -> bytes:
         iterations=100000,
         backend=default_backend()
     )
-    return kdf.derive(password.encode())
+    start = time.perf_counter()
+    key = kdf.derive(password.encode())
+    KDF_DURATION.observe(time.perf_counter() - start)
+    return key
 
 
 def aes256_encrypt(data: str, password: str) -> str:
@@ -1,4 +1,3 @@
-import socket
 import ipaddress
 import logging
 
@@ -6,8 +5,8 @@ from pydantic import field_validator
 from pydantic.dataclasses import dataclass
 from typing import Optional
 from vism import Config
-from vism.util import is_valid_subnet
 from vism_acme.schema.response import ACMEProblemResponse
+from vism_acme.util.acl import DomainValidationIndex
 
 logger = logging.getLogger(__name__)
 
@@ -19,6 +18,14 @@ class Database:
     username: str = ""
     password: str = ""
 
+    pool_size: int = 5
+    max_overflow: int = 10
+    pool_timeout_seconds: int = 30
+    pool_recycle_seconds: int = 1800
+    pool_pre_ping: bool = True
+
+    migrate_on_startup: bool = True
+
     @field_validator("port")
     @classmethod
     def port_must_be_valid(cls, v):
@@ -26,6 +33,29 @@ class Database:
             raise ValueError("Port must be between 1 and 65535")
         return v
 
+    @field_validator("pool_size")
+    @classmethod
+    def pool_size_must_be_valid(cls, v):
+        if v < 1:
+            raise ValueError("Pool size must be at least 1")
+        return v
+
+    @field_validator("max_overflow", "pool_timeout_seconds")
+    @classmethod
+    def pool_limits_must_be_valid(cls, v):
+        if v < 0:
+            raise ValueError("Pool limits can not be negative")
+        return v
+
+    def engine_kwargs(self) -> dict:
+        return {
+            "pool_size": self.pool_size,
+            "max_overflow": self.max_overflow,
+            "pool_timeout": self.pool_timeout_seconds,
+            "pool_recycle": self.pool_recycle_seconds,
+            "pool_pre_ping": self.pool_pre_ping,
+        }
+
 
 @dataclass
 class Logging:
@@ -56,18 +86,30 @@ class Profile:
     pre_validated: list[DomainValidation] = None
     acl: list[DomainValidation] = None
 
-    def to_dict(self):
-        return {
+    # Identifiers matched by pre_validated get authzs that are already valid, without challenges.
+    # The authz records which rule skipped validation. Off unless a profile opts in.
+    pre_validated_skip_challenges: bool = False
+
+    # Valid authzs the same account completed within this window are attached to new orders
+    # instead of creating fresh challenges. 0 disables reuse.
+    authz_reuse_seconds: int = 0
+
+    def to_dict(self, include_domain_validations: bool = True):
+        profile_dict = {
             "name": self.name,
             "ca": self.ca,
             "module_args": self.module_args,
             "enabled": self.enabled,
             "default": self.default,
             "supported_challenge_types": self.supported_challenge_types,
-            "pre_validated": [dv.to_dict() for dv in self.pre_validated] if self.pre_validated else None,
-            "acl": [dv.to_dict() for dv in self.acl] if self.acl else None,
         }
 
+        if include_domain_validations:
+            profile_dict["pre_validated"] = [dv.to_dict() for dv in self.pre_validated] if self.pre_validated else None
+            profile_dict["acl"] = [dv.to_dict() for dv in self.acl] if self.acl else None
+
+        return profile_dict
+
     @field_validator("supported_challenge_types")
     @classmethod
     def challenge_types_must_be_valid(cls, v):
@@ -79,60 +121,42 @@ class Profile:
 
         return v
 
-    def client_is_valid(self, client_ip: str, domain: str) -> bool:
-        if not self.pre_validated:
-            return False
+    @field_validator("authz_reuse_seconds")
+    @classmethod
+    def authz_reuse_must_be_valid(cls, v):
+        if v < 0:
+            raise ValueError("Profile authz reuse window can not be negative.")
+        return v
 
-        for domain_validation in self.pre_validated:
-            if domain_validation.domain == domain:
-                return self._client_in_dv(client_ip, domain_validation)
+    @property
+    def has_domain_validations(self) -> bool:
+        return bool(self.pre_validated) or bool(self.acl)
 
-        return False
+    def client_is_valid(self, client_ip: str, domain: str, client_hostnames: list[str] = None) -> bool:
+        return self._pre_validated_index.client_matches(domain, client_ip, client_hostnames or [])
 
-    def _client_in_dv(self, client_ip: str, domain: DomainValidation) -> bool | ACMEProblemResponse:
-        client_hostnames = []
-        try:
-            host_by_addr = socket.gethostbyaddr(client_ip)
-            client_hostnames.append(host_by_addr[0])
-            client_hostnames += host_by_addr[1]
-        except socket.herror as e:
-            pass
-        except Exception as e:
-            return ACMEProblemResponse(type="serverInternal", title=f"Unknown error occurred while validating domain", detail=str(e))
-
-        subnets = [subnet for subnet in domain.clients if is_valid_subnet(subnet)]
-        client_ip_in_subnets = False
-        for subnet in subnets:
-            if client_ip in subnet:
-                client_ip_in_subnets = True
-                break
-
-        return set(client_hostnames) & set(domain.clients) or \
-            domain.clients == ["*"] or \
-            client_ip in domain.clients or \
-            client_ip_in_subnets
-
-    def client_is_allowed(self, client_ip: str, domain: str) -> bool | ACMEProblemResponse:
-        if not self.acl:
-            return False
-
-        for domain_validation in self.acl:
-            if domain_validation.domain == domain:
-                return self._client_in_dv(client_ip, domain_validation)
-
-        return False
+    def client_is_allowed(self, client_ip: str, domain: str, client_hostnames: list[str] = None) -> bool:
+        return self._acl_index.client_matches(domain, client_ip, client_hostnames or [])
 
     def __post_init__(self):
         if self.supported_challenge_types is None:
             self.supported_challenge_types = ["http-01"]
 
+        self._pre_validated_index = DomainValidationIndex(self.pre_validated)
+        self._acl_index = DomainValidationIndex(self.acl)
+
 @dataclass
 class Http01:
     port: int = 28080
     follow_redirect: bool = True
+    max_redirects: int = 10
     timeout_seconds: int = 2
+    connect_timeout_seconds: Optional[float] = None
+    read_timeout_seconds: Optional[float] = None
     retries: int = 1
-    retry_delay_seconds: int = 0.1
+    retry_delay_seconds: float = 0.1
+    max_concurrency: int = 100
+    max_concurrency_per_host: int = 2
 
     @field_validator("port")
     @classmethod
@@ -141,10 +165,205 @@ class Http01:
             raise ValueError("Port must be between 1 and 65535")
         return v
 
+    @field_validator("max_concurrency", "max_concurrency_per_host")
+    @classmethod
+    def concurrency_must_be_valid(cls, v):
+        if v < 1:
+            raise ValueError("Concurrency limits must be at least 1")
+        return v
+
+    def __post_init__(self):
+        if self.connect_timeout_seconds is None:
+            self.connect_timeout_seconds = self.timeout_seconds
+        if self.read_timeout_seconds is None:
+            self.read_timeout_seconds = self.timeout_seconds
+
+@dataclass
+class Dns:
+    timeout_seconds: float = 5
+    positive_ttl_seconds: float = 60
+    negative_ttl_seconds: float = 30
+    max_entries: int = 10000
+    max_workers: int = 16
+
+    @field_validator("max_entries", "max_workers")
+    @classmethod
+    def must_be_positive(cls, v):
+        if v < 1:
+            raise ValueError("DNS cache size and worker count must be at least 1")
+        return v
+
+@dataclass
+class ValidationQueue:
+    enabled: bool = False
+    batch_size: int = 20
+    poll_interval_seconds: float = 1
+    lease_seconds: int = 60
+    max_attempts: int = 3
+    retry_backoff_seconds: float = 5
+    max_backoff_seconds: float = 300
+
+    @field_validator("batch_size", "max_attempts", "lease_seconds")
+    @classmethod
+    def must_be_positive(cls, v):
+        if v < 1:
+            raise ValueError("Validation queue batch size, lease and attempts must be at least 1")
+        return v
+
+@dataclass
+class Sweeper:
+    enabled: bool = True
+    interval_seconds: float = 60
+    batch_size: int = 500
+    retention_days: int = 30
+    processing_timeout_seconds: float = 600
+
+    @field_validator("processing_timeout_seconds")
+    @classmethod
+    def processing_timeout_must_be_positive(cls, v):
+        if v <= 0:
+            raise ValueError("Sweeper processing timeout must be positive")
+        return v
+
+    @field_validator("batch_size")
+    @classmethod
+    def batch_size_must_be_valid(cls, v):
+        if v < 1:
+            raise ValueError("Sweeper batch size must be at least 1")
+        return v
+
+@dataclass
+class RateLimit:
+    requests: int
+    period_seconds: float
+
+    @field_validator("requests", "period_seconds")
+    @classmethod
+    def must_be_positive(cls, v):
+        if v <= 0:
+            raise ValueError("Rate limit requests and period must be positive")
+        return v
+
+    @property
+    def rate(self) -> float:
+        return self.requests / self.period_seconds
+
+@dataclass
+class RateLimits:
+    enabled: bool = False
+    backend: str = "memory"
+    max_keys: int = 100000
+    account: Optional[RateLimit] = None
+    ip: Optional[RateLimit] = None
+    identifier: Optional[RateLimit] = None
+
+    @field_validator("backend")
+    @classmethod
+    def backend_must_be_valid(cls, v):
+        if v not in ["memory", "postgres"]:
+            raise ValueError("Rate limit backend must be 'memory' or 'postgres'")
+        return v
+
+    @property
+    def longest_period_seconds(self) -> float:
+        return max((limit.period_seconds for limit in [self.account, self.ip, self.identifier] if limit), default=0)
+
+@dataclass
+class Ca:
+    url: str = "http://127.0.0.1:8000"
+    timeout_seconds: float = 30
+    max_connections: int = 10
+    retry_after_seconds: int = 2
+
+    @field_validator("max_connections")
+    @classmethod
+    def max_connections_must_be_valid(cls, v):
+        if v < 1:
+            raise ValueError("CA connection limit must be at least 1")
+        return v
+
+@dataclass
+class Directory:
+    cache_max_age_seconds: int = 300
+    include_domain_validations: bool = True
+
+    @field_validator("cache_max_age_seconds")
+    @classmethod
+    def max_age_must_be_valid(cls, v):
+        if v < 0:
+            raise ValueError("Directory cache max age can not be negative")
+        return v
+
+@dataclass
+class Metrics:
+    enabled: bool = False
+
+@dataclass
+class Tracing:
+    enabled: bool = False
+    service_name: str = "vism-acme"
+    exporter: str = "otlp"
+    endpoint: Optional[str] = None
+
+    @field_validator("exporter")
+    @classmethod
+    def exporter_must_be_valid(cls, v):
+        if v not in ["otlp", "console"]:
+            raise ValueError("Tracing exporter must be one of otlp, console")
+        return v
+
+@dataclass
+class Orders:
+    page_size: int = 100
+
+    @field_validator("page_size")
+    @classmethod
+    def page_size_must_be_valid(cls, v):
+        if v < 1:
+            raise ValueError("Orders page size must be at least 1")
+        return v
+
 @dataclass
 class API:
     host: str = "0.0.0.0"
     port: int = 8080
+
+    server: str = "uvicorn"
+    workers: int = 1
+    loop: str = "auto"
+    http: str = "auto"
+    backlog: int = 2048
+    timeout_keep_alive: int = 5
+    timeout_graceful_shutdown: int = 30
+    reuse_port: bool = False
+
+    @field_validator("server")
+    @classmethod
+    def server_must_be_valid(cls, v):
+        if v not in ["uvicorn", "gunicorn"]:
+            raise ValueError("Server must be one of uvicorn, gunicorn")
+        return v
+
+    @field_validator("loop")
+    @classmethod
+    def loop_must_be_valid(cls, v):
+        if v not in ["auto", "asyncio", "uvloop"]:
+            raise ValueError("Loop must be one of auto, asyncio, uvloop")
+        return v
+
+    @field_validator("http")
+    @classmethod
+    def http_must_be_valid(cls, v):
+        if v not in ["auto", "h11", "httptools"]:
+            raise ValueError("HTTP implementation must be one of auto, h11, httptools")
+        return v
+
+    @field_validator("workers", "backlog")
+    @classmethod
+    def must_be_positive(cls, v):
+        if v < 1:
+            raise ValueError("Workers and backlog must be at least 1")
+        return v
     
     @field_validator("port")
     @classmethod
@@ -174,6 +393,15 @@ class AcmeConfig(Config):
         self.default_profile: Optional[Profile] = None
         self.server = API(**acme_config.get("server", {}))
         self.http01 = Http01(**acme_config.get("http01", {}))
+        self.validation_queue = ValidationQueue(**acme_config.get("validation_queue", {}))
+        self.dns = Dns(**acme_config.get("dns", {}))
+        self.directory = Directory(**acme_config.get("directory", {}))
+        self.orders = Orders(**acme_config.get("orders", {}))
+        self.ca = Ca(**acme_config.get("ca", {}))
+        self.sweeper = Sweeper(**acme_config.get("sweeper", {}))
+        self.rate_limits = RateLimits(**acme_config.get("rate_limits", {}))
+        self.metrics = Metrics(**acme_config.get("metrics", {}))
+        self.tracing = Tracing(**acme_config.get("tracing", {}))
         self.nonce_ttl_seconds = str(acme_config.get("nonce_ttl_seconds", 300))
         self.retry_after_seconds = str(acme_config.get("retry_after_seconds", 5))
 
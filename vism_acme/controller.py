@@ -0,0 +1,121 @@
+import os
+from contextlib import asynccontextmanager
+from fastapi import FastAPI
+
+from vism.tracing import setup_tracing, setup_tracing_middleware
+from vism.util.errors import VismException
+from vism_acme.config import AcmeConfig
+from vism_acme.db import AsyncVismDatabase
+from vism_acme.middleware import AcmeMiddleware
+from vism_acme.schema.response import ACMEProblemResponse
+from vism_acme.util.ca import CaClient
+from vism_acme.util.codec import AcmeJSONResponse
+from vism_acme.util.directory import DirectoryCache
+from vism_acme.util.dns import DnsResolver
+from vism_acme.util.nonce import NonceManager
+from vism_acme.util.rate_limit import RateLimiter
+from vism_acme.util.sweeper import ExpirySweeper
+
+
+class VismACMEController:
+    def __init__(self):
+        config_file_path = os.environ.get('CONFIG_FILE_PATH', './acme_config.yaml')
+
+        self.config = AcmeConfig(config_file_path)
+        setup_tracing(self.config.tracing)
+        self.database = AsyncVismDatabase(self.config.database)
+        self.nonce_manager = NonceManager(self.config)
+        self.resolver = DnsResolver(self.config.dns)
+        self.http01_client = self.setup_http01_client()
+        self.ca_client = CaClient(self.config.ca)
+        self.directory = DirectoryCache(self.config)
+        self.rate_limiter = RateLimiter(self.config.rate_limits, self.database)
+        self.sweeper = ExpirySweeper(self.config.sweeper, self.database, self.rate_limiter)
+        self.api = FastAPI(lifespan=self.lifespan, default_response_class=AcmeJSONResponse)
+        self.setup_exception_handlers()
+        self.setup_middleware()
+        self.setup_metrics()
+        self.setup_tracing_middleware()
+        self.setup_routes()
+
+    @asynccontextmanager
+    async def lifespan(self, api: FastAPI):
+        if self.config.database.migrate_on_startup:
+            await self.database.migrate()
+        self.sweeper.start()
+        yield
+        await self.sweeper.stop()
+        await self.http01_client.close()
+        await self.ca_client.close()
+        self.resolver.close()
+        await self.database.close()
+
+    def setup_http01_client(self):
+        from vism_acme.validators.http_01 import Http01Client
+
+        return Http01Client(self.config.http01)
+
+    def setup_middleware(self):
+        self.api.add_middleware(
+            AcmeMiddleware,
+            skip_paths=["/directory", "/new-nonce", "/health"],
+            jwk_paths=["/new-account", "/revoke-cert"],
+            kid_paths=["/account/", "/new-order", "/authz"],
+            controller=self,
+        )
+
+    def setup_metrics(self):
+        if not self.config.metrics.enabled:
+            return
+
+        from vism.metrics import instrument_engine, setup_metrics
+
+        setup_metrics(self.api, "acme")
+        instrument_engine(self.database.engine, "acme")
+
+    def setup_tracing_middleware(self):
+        if self.config.tracing.enabled:
+            setup_tracing_middleware(self.api)
+
+    def setup_exception_handlers(self):
+        @self.api.exception_handler(ACMEProblemResponse)
+        async def acme_problem_response_handler(request, exc: ACMEProblemResponse):
+            return AcmeJSONResponse(
+                status_code=exc.status_code,
+                content=exc.error_json,
+                headers={"Content-Type": "application/problem+json", **exc.headers}
+            )
+        @self.api.exception_handler(VismException)
+        async def acme_problem_response_handler(request, exc: VismException):
+            return AcmeJSONResponse(
+                status_code=500,
+                content={
+                    "type": "urn:ietf:params:acme:error:serverInternal",
+                    "title": "An internal server error occurred",
+                },
+                headers={"Content-Type": "application/problem+json"}
+            )
+
+    def setup_routes(self):
+        from vism_acme.routers.account import AccountRouter
+        from vism_acme.routers.base import BaseRouter
+        from vism_acme.routers.nonce import NonceRouter
+        from vism_acme.routers.order import OrderRouter
+        from vism_acme.routers.authz import AuthzRouter
+
+        base_router = BaseRouter(self)
+        nonce_router = NonceRouter(self)
+        account_router = AccountRouter(self)
+        order_router = OrderRouter(self)
+        authz_router = AuthzRouter(self)
+
+        self.api.include_router(account_router.router)
+        self.api.include_router(nonce_router.router)
+        self.api.include_router(base_router.router)
+        self.api.include_router(order_router.router)
+        self.api.include_router(authz_router.router)
+
+def create_app() -> FastAPI:
+    controller = VismACMEController()
+    controller.api.state.controller = controller
+    return controller.api
@@ -1,22 +1,96 @@
-from contextlib import contextmanager
-from typing import Any, Generator, Optional
+from contextlib import asynccontextmanager
+from datetime import datetime, timedelta
+from typing import AsyncGenerator, Optional
+from uuid import UUID
 from jwcrypto.jwk import JWK
-from sqlalchemy.orm import sessionmaker, Session
-from sqlalchemy.engine import URL, create_engine
+from sqlalchemy import select, update, delete, or_, and_, tuple_, func
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.orm import joinedload, load_only, contains_eager
+from sqlalchemy.engine import URL
+from vism.tracing import traced_methods
 from vism.util.errors import VismDatabaseException
 from vism_acme.config import Database
 from vism_acme.db.account import AccountEntity
 from vism_acme.db.base import Base
 from vism_acme.db.jwk import JWKEntity
-from .authz import AuthzEntity, ChallengeEntity
-from .order import OrderEntity
+from .authz import AuthzEntity, ChallengeEntity, ErrorEntity, AuthzStatus, ChallengeStatus
+from .order import OrderEntity, OrderStatus, order_authz
+from .validation import ValidationJobEntity, ValidationJobStatus
+from .rate_limit import RateLimitBucketEntity
 from .account import AccountEntity
 from .jwk import JWKEntity
+from .migrations import migrate
 
-class VismDatabase:
+
+# Relationships are lazy="raise"; each read below states the related rows and columns its route uses.
+def _account_query():
+    return select(AccountEntity).options(joinedload(AccountEntity._jwk))
+
+
+# The jwk join doubles as the lookup and the eager load, so the key is not joined twice.
+def _account_by_thumbprint_query(thumbprint: str):
+    return (
+        select(AccountEntity)
+        .join(AccountEntity._jwk)
+        .where(JWKEntity.thumbprint == thumbprint)
+        .options(contains_eager(AccountEntity._jwk))
+    )
+
+
+def _order_view_query():
+    return select(OrderEntity).options(
+        load_only(OrderEntity.account_id, OrderEntity.status, OrderEntity.expires, OrderEntity.not_before, OrderEntity.not_after, OrderEntity.error_id),
+        joinedload(OrderEntity.error).load_only(ErrorEntity.type, ErrorEntity.title, ErrorEntity.detail),
+    )
+
+
+def _order_authz_query(order_id: str):
+    return (
+        select(AuthzEntity)
+        .join(order_authz, order_authz.c.authz_id == AuthzEntity.id)
+        .where(order_authz.c.order_id == order_id)
+        .options(load_only(AuthzEntity.identifier_type, AuthzEntity.identifier_value, AuthzEntity.status))
+    )
+
+
+def _authz_query(authz_id: str):
+    return select(AuthzEntity).where(AuthzEntity.id == authz_id).options(
+        load_only(
+            AuthzEntity.identifier_type, AuthzEntity.identifier_value, AuthzEntity.status, AuthzEntity.expires,
+            AuthzEntity.account_id, AuthzEntity.error_id,
+        ),
+        joinedload(AuthzEntity.error).load_only(ErrorEntity.type, ErrorEntity.title, ErrorEntity.detail),
+        joinedload(AuthzEntity.challenges).load_only(ChallengeEntity.type, ChallengeEntity.key_authorization, ChallengeEntity.status),
+    )
+
+
+def _authz_challenges_query(authz_id: str):
+    return select(ChallengeEntity).where(ChallengeEntity.authz_id == authz_id).options(
+        load_only(ChallengeEntity.type, ChallengeEntity.key_authorization, ChallengeEntity.status)
+    )
+
+
+def _challenge_query(challenge_id: str):
+    return select(ChallengeEntity).where(ChallengeEntity.id == challenge_id).options(
+        load_only(ChallengeEntity.type, ChallengeEntity.key_authorization, ChallengeEntity.status, ChallengeEntity.authz_id),
+        joinedload(ChallengeEntity.authz).load_only(AuthzEntity.identifier_value, AuthzEntity.status, AuthzEntity.expires, AuthzEntity.account_id),
+    )
+
+
+# Keyset page over (created_at, id), served from ix_order_account_id_created_at_id without loading entities.
+def _order_page_query(account_id: UUID, limit: int, after: tuple[datetime, UUID] = None):
+    query = select(OrderEntity.id, OrderEntity.created_at).where(OrderEntity.account_id == account_id)
+    if after is not None:
+        query = query.where(tuple_(OrderEntity.created_at, OrderEntity.id) > tuple_(*after))
+    return query.order_by(OrderEntity.created_at, OrderEntity.id).limit(limit)
+
+@traced_methods
+class AsyncVismDatabase:
     def __init__(self, database_config: Database):
         self.db_url = URL.create(
-            drivername="postgresql+psycopg2",
+            drivername="postgresql+asyncpg",
             username=database_config.username,
             password=database_config.password,
             host=database_config.host,
@@ -24,74 +98,408 @@ class VismDatabase:
             database=database_config.database
         )
 
-        self.engine = create_engine(self.db_url, echo=False)
-        self.session_maker = sessionmaker(bind=self.engine)
-        self._create_tables()
+        self.engine = create_async_engine(self.db_url, echo=False, **database_config.engine_kwargs())
+        self.session_maker = async_sessionmaker(bind=self.engine, expire_on_commit=False)
 
-    def get_orders_by_account_kid(self, account_kid: str) -> Optional[list[OrderEntity]]:
-        with self._get_session() as session:
-            account_entity = session.query(AccountEntity).filter(AccountEntity.kid == account_kid).first()
-            if account_entity:
-                return session.query(OrderEntity).filter(OrderEntity.account_id == account_entity.id).all()
+    async def get_order_page_by_account_id(self, account_id: UUID, limit: int, after: tuple[datetime, UUID] = None) -> list[tuple[UUID, datetime]]:
+        async with self._get_session() as session:
+            result = await session.execute(_order_page_query(account_id, limit, after))
+            return [tuple(row) for row in result.all()]
 
-    def get_order_by_id(self, order_id: str) -> Optional[OrderEntity]:
-        with self._get_session() as session:
-            return session.query(OrderEntity).filter(OrderEntity.id == order_id).first()
+    async def get_order_by_id(self, order_id: str) -> Optional[OrderEntity]:
+        async with self._get_session() as session:
+            return await self._first(session, select(OrderEntity).where(OrderEntity.id == order_id))
 
-    def get_authz_by_order_id(self, order_id: str) -> Optional[list[AuthzEntity]]:
-        with self._get_session() as session:
-            return session.query(AuthzEntity).filter(AuthzEntity.order_id == order_id).all()
+    async def get_order_view_by_id(self, order_id: str) -> Optional[OrderEntity]:
+        async with self._get_session() as session:
+            return await self._first(session, _order_view_query().where(OrderEntity.id == order_id))
 
-    def get_challenges_by_authz_id(self, authz_id: str) -> Optional[list[ChallengeEntity]]:
-        with self._get_session() as session:
-            return session.query(ChallengeEntity).filter(ChallengeEntity.authz_id == authz_id).all()
+    async def get_open_order(self, account_id: UUID, profile_name: str, identifiers_hash: str, not_before=None, not_after=None) -> Optional[OrderEntity]:
+        async with self._get_session() as session:
+            return await self._first(
+                session,
+                _order_view_query()
+                .where(
+                    OrderEntity.account_id == account_id,
+                    OrderEntity.identifiers_hash == identifiers_hash,
+                    OrderEntity.profile_name == profile_name,
+                    OrderEntity.not_before.is_not_distinct_from(not_before),
+                    OrderEntity.not_after.is_not_distinct_from(not_after),
+                    OrderEntity.status.in_([OrderStatus.PENDING, OrderStatus.READY]),
+                    OrderEntity.expires > datetime.now(),
+                    # An order holding an authz that can no longer become valid is a dead end for the client.
+                    ~select(order_authz.c.order_id)
+                    .join(AuthzEntity, AuthzEntity.id == order_authz.c.authz_id)
+                    .where(
+                        order_authz.c.order_id == OrderEntity.id,
+                        AuthzEntity.status.not_in([AuthzStatus.PENDING, AuthzStatus.VALID]),
+                    )
+                    .exists(),
+                )
+                .order_by(OrderEntity.created_at.desc())
+                .limit(1)
+            )
 
-    def get_authz_by_id(self, authz_id: str) -> Optional[AuthzEntity]:
-        with self._get_session() as session:
-            return session.query(AuthzEntity).filter(AuthzEntity.id == authz_id).first()
+    async def get_authz_by_order_id(self, order_id: str) -> Optional[list[AuthzEntity]]:
+        async with self._get_session() as session:
+            result = await session.execute(_order_authz_query(order_id))
+            return list(result.scalars().all())
 
-    def get_challenge_by_id(self, challenge_id: str) -> Optional[ChallengeEntity]:
-        with self._get_session() as session:
-            return session.query(ChallengeEntity).filter(ChallengeEntity.id == challenge_id).first()
+    async def get_challenges_by_authz_id(self, authz_id: str) -> Optional[list[ChallengeEntity]]:
+        async with self._get_session() as session:
+            result = await session.execute(_authz_challenges_query(authz_id))
+            return list(result.scalars().all())
 
-    def get_account_by_jwk(self, jwk_data: JWK) -> Optional[AccountEntity]:
-        with self._get_session() as session:
-            if jwk_data['kty'] == 'oct':
-                jwk_entity = session.query(JWKEntity).filter(JWKEntity.k == jwk_data['k'], JWKEntity.kty == jwk_data['kty']).first()
-            if jwk_data['kty'] == 'EC':
-                jwk_entity = session.query(JWKEntity).filter(JWKEntity.crv == jwk_data['crv'], JWKEntity.x == jwk_data['x'], JWKEntity.y == jwk_data['y'], JWKEntity.kty == jwk_data['kty']).first()
-            if jwk_data['kty'] == 'RSA':
-                jwk_entity = session.query(JWKEntity).filter(JWKEntity.n == jwk_data['n'], JWKEntity.e == jwk_data['e'], JWKEntity.kty == jwk_data['kty']).first()
+    async def get_authz_by_id(self, authz_id: str) -> Optional[AuthzEntity]:
+        async with self._get_session() as session:
+            result = await session.execute(_authz_query(authz_id))
+            return result.unique().scalars().first()
 
-            if not jwk_entity:
-                return None
+    async def get_challenge_by_id(self, challenge_id: str) -> Optional[ChallengeEntity]:
+        async with self._get_session() as session:
+            return await self._first(session, _challenge_query(challenge_id))
 
-            return session.query(AccountEntity).filter(AccountEntity.jwk_id == jwk_entity.id).first()
+    async def get_account_by_jwk(self, jwk_data: JWK) -> Optional[AccountEntity]:
+        async with self._get_session() as session:
+            return await self._first(session, _account_by_thumbprint_query(jwk_data.thumbprint()))
 
-    def get_account_by_kid(self, kid: str) -> Optional[AccountEntity]:
-        with self._get_session() as session:
-            return session.query(AccountEntity).filter(AccountEntity.kid == kid).first()
+    async def get_account_by_kid(self, kid: str) -> Optional[AccountEntity]:
+        async with self._get_session() as session:
+            return await self._first(session, _account_query().where(AccountEntity.kid == kid))
 
-    def save_to_db(self, obj):
+    async def save_to_db(self, obj):
         try:
-            with self._get_session() as session:
-                merged = session.merge(obj)
-                session.flush()
+            async with self._get_session() as session:
+                merged = await session.merge(obj)
+                await session.flush()
                 return merged
         except Exception as e:
             raise VismDatabaseException(f"Failed to save to database: {e}")
 
-    def _create_tables(self):
-        Base.metadata.create_all(self.engine)
+    async def record_challenge_result(self, challenge_id: UUID, error: Optional[ErrorEntity] = None):
+        async with self.unit_of_work() as session:
+            await self._record_challenge_result(session, challenge_id, error)
+
+    async def claim_validation_jobs(self, limit: int, lease_seconds: int) -> list[ValidationJobEntity]:
+        now = datetime.now()
+        async with self.unit_of_work() as session:
+            result = await session.execute(
+                select(ValidationJobEntity)
+                .where(or_(
+                    and_(ValidationJobEntity.status == ValidationJobStatus.QUEUED, ValidationJobEntity.next_attempt_at <= now),
+                    and_(ValidationJobEntity.status == ValidationJobStatus.RUNNING, ValidationJobEntity.locked_until < now),
+                ))
+                .order_by(ValidationJobEntity.next_attempt_at)
+                .limit(limit)
+                .with_for_update(skip_locked=True)
+            )
+            jobs = list(result.scalars().all())
+            for job in jobs:
+                job.status = ValidationJobStatus.RUNNING
+                job.attempts += 1
+                job.locked_until = now + timedelta(seconds=lease_seconds)
+
+            return jobs
+
+    async def retry_validation_job(self, job_id: UUID, next_attempt_at: datetime, last_error: str = None):
+        async with self.unit_of_work() as session:
+            await session.execute(
+                update(ValidationJobEntity)
+                .where(ValidationJobEntity.id == job_id, ValidationJobEntity.status == ValidationJobStatus.RUNNING)
+                .values(status=ValidationJobStatus.QUEUED, next_attempt_at=next_attempt_at, locked_until=None, last_error=last_error)
+            )
+
+    async def finish_validation_job(self, job_id: UUID, challenge_id: UUID = None, error: Optional[ErrorEntity] = None):
+        async with self.unit_of_work() as session:
+            if challenge_id:
+                await self._record_challenge_result(session, challenge_id, error)
+
+            await session.execute(
+                update(ValidationJobEntity)
+                .where(ValidationJobEntity.id == job_id)
+                .values(status=ValidationJobStatus.DONE, locked_until=None, last_error=error.detail if error else None)
+            )
+
+    async def begin_order_processing(self, order_id: UUID, csr_pem: str) -> bool:
+        async with self.unit_of_work() as session:
+            updated_id = (await session.execute(
+                update(OrderEntity)
+                .where(OrderEntity.id == order_id, OrderEntity.status == OrderStatus.READY)
+                .values(status=OrderStatus.PROCESSING, csr_pem=csr_pem)
+                .returning(OrderEntity.id)
+            )).scalar_one_or_none()
+
+            return updated_id is not None
+
+    async def record_order_certificate(self, order_id: UUID, crt_pem: Optional[str] = None, error: Optional[ErrorEntity] = None):
+        async with self.unit_of_work() as session:
+            values = {"status": OrderStatus.VALID, "crt_pem": crt_pem}
+            if not crt_pem:
+                error = error or ErrorEntity(type="serverInternal", title="Certificate issuance failed.")
+                session.add(error)
+                await session.flush()
+                values = {"status": OrderStatus.INVALID, "error_id": error.id}
+
+            updated_id = (await session.execute(
+                update(OrderEntity)
+                .where(OrderEntity.id == order_id, OrderEntity.status == OrderStatus.PROCESSING)
+                .values(**values)
+                .returning(OrderEntity.id)
+            )).scalar_one_or_none()
+
+            # The sweeper already gave up on this order; its error stays the one it recorded.
+            if updated_id is None and error is not None:
+                await session.delete(error)
+
+    # Signing runs in the API process, so an order whose worker died mid-signing would stay processing forever.
+    async def fail_stale_processing_orders(self, before: datetime, batch_size: int) -> int:
+        async with self.unit_of_work() as session:
+            order_ids = list((await session.execute(
+                select(OrderEntity.id)
+                .where(OrderEntity.status == OrderStatus.PROCESSING, OrderEntity.updated_at < before)
+                .limit(batch_size)
+                .with_for_update(skip_locked=True)
+            )).scalars().all())
+            if not order_ids:
+                return 0
+
+            errors = [
+                ErrorEntity(
+                    type="serverInternal",
+                    title="Certificate issuance did not complete.",
+                    detail="The order was processing for too long, finalize a new order to retry.",
+                )
+                for _ in order_ids
+            ]
+            session.add_all(errors)
+            await session.flush()
+
+            await session.execute(
+                update(OrderEntity),
+                [{"id": order_id, "status": OrderStatus.INVALID, "error_id": error.id} for order_id, error in zip(order_ids, errors)],
+            )
+            return len(order_ids)
+
+    async def get_reusable_authzs(self, account_id: UUID, identifiers: list[tuple[str, str]], validated_after: datetime) -> dict[tuple[str, str], AuthzEntity]:
+        # A valid authz is not updated again until it expires or is deactivated, so updated_at is when it became valid.
+        async with self._get_session() as session:
+            result = await session.execute(
+                select(AuthzEntity)
+                .where(
+                    AuthzEntity.account_id == account_id,
+                    tuple_(AuthzEntity.identifier_type, AuthzEntity.identifier_value).in_(identifiers),
+                    AuthzEntity.status == AuthzStatus.VALID,
+                    AuthzEntity.expires > datetime.now(),
+                    AuthzEntity.updated_at >= validated_after,
+                )
+                .order_by(AuthzEntity.expires)
+                .options(load_only(AuthzEntity.identifier_type, AuthzEntity.identifier_value, AuthzEntity.status, AuthzEntity.expires))
+            )
+            # Ordered by expiry, so the longest lived authz per identifier wins.
+            return {(authz.identifier_type, authz.identifier_value): authz for authz in result.scalars().all()}
+
+    async def deactivate_authz(self, authz_id: UUID) -> Optional[str]:
+        async with self.unit_of_work() as session:
+            authz_status = await self._transition(session, AuthzEntity, authz_id, [AuthzStatus.PENDING, AuthzStatus.VALID], AuthzStatus.DEACTIVATED)
+            if authz_status is not None:
+                await self._invalidate_orders_with_authz(session, authz_id)
+
+            return authz_status
+
+    async def expire_authz(self, authz_id: UUID, now: datetime) -> Optional[str]:
+        async with self.unit_of_work() as session:
+            return await self._transition(session, AuthzEntity, authz_id, [AuthzStatus.PENDING, AuthzStatus.VALID], AuthzStatus.EXPIRED, AuthzEntity.expires < now)
+
+    async def take_rate_limit_token(self, key: str, capacity: int, rate: float, now: float) -> float:
+        # One atomic upsert per check: the row is refilled and debited only if a whole token is available.
+        # Returns 0 when the token was taken, otherwise the seconds until one is.
+        bucket = RateLimitBucketEntity.__table__
+        refilled = func.least(capacity, bucket.c.tokens + (now - bucket.c.updated_at) * rate)
+        async with self.unit_of_work() as session:
+            taken = (await session.execute(
+                pg_insert(bucket)
+                .values(key=key, tokens=capacity - 1, updated_at=now)
+                .on_conflict_do_update(
+                    index_elements=[bucket.c.key],
+                    set_={"tokens": refilled - 1, "updated_at": now},
+                    where=refilled >= 1,
+                )
+                .returning(bucket.c.tokens)
+            )).scalar_one_or_none()
+            if taken is not None:
+                return 0
+
+            available = (await session.execute(select(refilled).where(bucket.c.key == key))).scalar_one()
+            return (1 - available) / rate
+
+    async def purge_rate_limit_buckets(self, before: float, batch_size: int) -> int:
+        async with self.unit_of_work() as session:
+            ids = (
+                select(RateLimitBucketEntity.id)
+                .where(RateLimitBucketEntity.updated_at < before)
+                .limit(batch_size)
+                .with_for_update(skip_locked=True)
+                .scalar_subquery()
+            )
+            result = await session.execute(delete(RateLimitBucketEntity).where(RateLimitBucketEntity.id.in_(ids)).returning(RateLimitBucketEntity.id))
+            return len(result.all())
+
+    async def expire_orders(self, now: datetime, batch_size: int) -> int:
+        return await self._update_batch(
+            OrderEntity,
+            and_(OrderEntity.status.in_([OrderStatus.PENDING, OrderStatus.READY]), OrderEntity.expires < now),
+            {"status": OrderStatus.EXPIRED},
+            batch_size
+        )
+
+    async def expire_authzs(self, now: datetime, batch_size: int) -> int:
+        return await self._update_batch(
+            AuthzEntity,
+            and_(AuthzEntity.status.in_([AuthzStatus.PENDING, AuthzStatus.VALID]), AuthzEntity.expires < now),
+            {"status": AuthzStatus.EXPIRED},
+            batch_size
+        )
+
+    async def purge_orders(self, before: datetime, batch_size: int) -> int:
+        async with self.unit_of_work() as session:
+            order_ids = list((await session.execute(
+                select(OrderEntity.id)
+                .where(OrderEntity.status.in_([OrderStatus.INVALID, OrderStatus.EXPIRED]), OrderEntity.updated_at < before)
+                .limit(batch_size)
+                .with_for_update(skip_locked=True)
+            )).scalars().all())
+            if not order_ids:
+                return 0
+
+            authz_ids = list((await session.execute(
+                select(order_authz.c.authz_id).where(order_authz.c.order_id.in_(order_ids))
+            )).scalars().all())
+            await session.execute(delete(order_authz).where(order_authz.c.order_id.in_(order_ids)))
+
+            # Authzs reused by an order that is being kept stay behind.
+            orphaned = (
+                select(AuthzEntity.id)
+                .where(AuthzEntity.id.in_(authz_ids))
+                .where(~select(order_authz.c.authz_id).where(order_authz.c.authz_id == AuthzEntity.id).exists())
+            )
+            authz_ids = list((await session.execute(orphaned)).scalars().all())
+            challenge_ids = select(ChallengeEntity.id).where(ChallengeEntity.authz_id.in_(authz_ids))
+            error_ids = list((await session.execute(
+                select(AuthzEntity.error_id).where(AuthzEntity.id.in_(authz_ids), AuthzEntity.error_id.is_not(None))
+                .union_all(select(OrderEntity.error_id).where(OrderEntity.id.in_(order_ids), OrderEntity.error_id.is_not(None)))
+            )).scalars().all())
+
+            await session.execute(delete(ValidationJobEntity).where(ValidationJobEntity.challenge_id.in_(challenge_ids)))
+            await session.execute(delete(ChallengeEntity).where(ChallengeEntity.authz_id.in_(authz_ids)))
+            await session.execute(delete(AuthzEntity).where(AuthzEntity.id.in_(authz_ids)))
+            await session.execute(delete(OrderEntity).where(OrderEntity.id.in_(order_ids)))
+            await session.execute(delete(ErrorEntity).where(ErrorEntity.id.in_(error_ids)))
+
+            return len(order_ids)
+
+    # Postgres has no UPDATE ... LIMIT, so each batch selects its ids with SKIP LOCKED and
+    # updates them by primary key. Rows locked by a request in flight are left for the next run.
+    async def _update_batch(self, entity, condition, values: dict, batch_size: int) -> int:
+        async with self.unit_of_work() as session:
+            ids = (
+                select(entity.id)
+                .where(condition)
+                .limit(batch_size)
+                .with_for_update(skip_locked=True)
+                .scalar_subquery()
+            )
+            result = await session.execute(
+                update(entity)
+                .where(entity.id.in_(ids))
+                .values(**values)
+                .returning(entity.id)
+            )
+            return len(result.all())
+
+    # Returns the new status, or None when the row was not in one of from_statuses (or no longer matched).
+    @staticmethod
+    async def _transition(session: AsyncSession, entity, entity_id: UUID, from_statuses: list, to_status, *conditions) -> Optional[str]:
+        return (await session.execute(
+            update(entity)
+            .where(entity.id == entity_id, entity.status.in_(from_statuses), *conditions)
+            .values(status=to_status)
+            .returning(entity.status)
+        )).scalar_one_or_none()
+
+    @classmethod
+    async def _record_challenge_result(cls, session: AsyncSession, challenge_id: UUID, error: Optional[ErrorEntity]):
+        # Every transition is conditional on the current status, so a result that is
+        # recorded twice (a retried job, a re-POSTed challenge) is a no-op.
+        challenge_status = ChallengeStatus.INVALID if error else ChallengeStatus.VALID
+        authz_id = (await session.execute(
+            update(ChallengeEntity)
+            .where(ChallengeEntity.id == challenge_id, ChallengeEntity.status == ChallengeStatus.PROCESSING)
+            .values(status=challenge_status)
+            .returning(ChallengeEntity.authz_id)
+        )).scalar_one_or_none()
+        if authz_id is None:
+            return
+
+        if not error:
+            await session.execute(
+                update(AuthzEntity)
+                .where(AuthzEntity.id == authz_id, AuthzEntity.status == AuthzStatus.PENDING)
+                .values(status=AuthzStatus.VALID)
+            )
+            return
+
+        session.add(error)
+        await session.flush()
+        invalidated = (await session.execute(
+            update(AuthzEntity)
+            .where(AuthzEntity.id == authz_id, AuthzEntity.status == AuthzStatus.PENDING)
+            .values(status=AuthzStatus.INVALID, error_id=error.id)
+            .returning(AuthzEntity.id)
+        )).scalar_one_or_none()
+        if invalidated is None:
+            return
+
+        await cls._invalidate_orders_with_authz(session, authz_id)
+
+    @staticmethod
+    async def _invalidate_orders_with_authz(session: AsyncSession, authz_id: UUID):
+        await session.execute(
+            update(OrderEntity)
+            .where(
+                OrderEntity.id.in_(select(order_authz.c.order_id).where(order_authz.c.authz_id == authz_id)),
+                OrderEntity.status.in_([OrderStatus.PENDING, OrderStatus.READY]),
+            )
+            .values(status=OrderStatus.INVALID)
+        )
+
+    @asynccontextmanager
+    async def unit_of_work(self) -> AsyncGenerator[AsyncSession, None]:
+        try:
+            async with self._get_session() as session:
+                yield session
+        except SQLAlchemyError as e:
+            raise VismDatabaseException(f"Failed to commit unit of work: {e}")
+
+    async def migrate(self):
+        async with self.engine.begin() as connection:
+            await connection.run_sync(migrate)
+
+    async def close(self):
+        await self.engine.dispose()
+
+    @staticmethod
+    async def _first(session: AsyncSession, statement):
+        result = await session.execute(statement)
+        return result.scalars().first()
 
-    @contextmanager
-    def _get_session(self) -> Generator[Session, Any, None]:
-        session = self.session_maker(expire_on_commit=False)
+    @asynccontextmanager
+    async def _get_session(self) -> AsyncGenerator[AsyncSession, None]:
+        session = self.session_maker()
         try:
             yield session
-            session.commit()
+            await session.commit()
         except Exception:
-            session.rollback()
+            await session.rollback()
             raise
         finally:
-            session.close()
+            await session.close()
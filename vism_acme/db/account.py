@@ -12,15 +12,19 @@ from vism_acme.db.jwk import JWKEntity
 class AccountEntity(Base):
     __tablename__ = 'account'
 
-    kid: Mapped[str] = mapped_column(String)
+    kid: Mapped[str] = mapped_column(String, unique=True)
     status: Mapped[str] = mapped_column(String)
     contact: Mapped[str] = mapped_column(String, nullable=True, default=None)
     created_at: Mapped[datetime] = mapped_column(DateTime, server_default=func.now(), init=False)
     updated_at: Mapped[datetime] = mapped_column(DateTime, server_default=func.now(), onupdate=func.now(), init=False)
 
-    jwk_id: Mapped[UUID] = mapped_column(Uuid, ForeignKey('jwk.id'), init=False)
-    _jwk: Mapped[JWKEntity] = relationship("JWKEntity", lazy="joined", default=None)
+    jwk_id: Mapped[UUID] = mapped_column(Uuid, ForeignKey('jwk.id'), init=False, index=True)
+    _jwk: Mapped[JWKEntity] = relationship("JWKEntity", lazy="raise", default=None)
 
     @property
     def jwk(self):
-        return self._jwk.to_jwk()
\ No newline at end of file
+        return self._jwk.to_jwk()
+
+    @property
+    def thumbprint(self) -> str:
+        return self._jwk.thumbprint
@@ -1,11 +1,11 @@
-from datetime import datetime, timedelta
+from datetime import datetime
 from uuid import UUID
-from sqlalchemy import String, DateTime, func, ForeignKey, Uuid, Boolean, Text
+from sqlalchemy import String, DateTime, func, ForeignKey, Uuid, Boolean, Text, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.orm import Mapped
 from sqlalchemy.orm import mapped_column
 from vism_acme.db.base import Base
-from vism_acme.db.order import OrderEntity
+from vism_acme.db.order import default_expires
 from enum import Enum
 
 from vism_acme.routers import AcmeRequest
@@ -43,17 +43,22 @@ class ErrorEntity(Base):
 
 class AuthzEntity(Base):
     __tablename__ = 'authz'
+    __table_args__ = (
+        Index("ix_authz_status_expires", "status", "expires"),
+        Index("ix_authz_reuse", "account_id", "identifier_type", "identifier_value", "status", "expires"),
+    )
 
     identifier_type: Mapped[IdentifierType] = mapped_column(String)
     identifier_value: Mapped[str] = mapped_column(String)
     status: Mapped[AuthzStatus] = mapped_column(String)
     wildcard: Mapped[bool] = mapped_column(Boolean)
-    expires: Mapped[str] = mapped_column(String, default=(datetime.now() + timedelta(minutes=30)).isoformat(), init=False)
+    expires: Mapped[datetime] = mapped_column(DateTime, default_factory=default_expires, init=False)
+    validation_skipped_reason: Mapped[str] = mapped_column(Text, nullable=True, default=None)
 
     error_id: Mapped[UUID] = mapped_column(Uuid, ForeignKey('error.id'), init=False, nullable=True, default=None)
-    error: Mapped[ErrorEntity] = relationship("ErrorEntity", lazy="joined", init=False, default=None)
-    order_id: Mapped[UUID] = mapped_column(Uuid, ForeignKey('order.id'), init=False)
-    order: Mapped[OrderEntity] = relationship("OrderEntity", lazy="joined")
+    error: Mapped[ErrorEntity] = relationship("ErrorEntity", lazy="raise", init=False, default=None)
+    account_id: Mapped[UUID] = mapped_column(Uuid, ForeignKey('account.id'), default=None)
+    challenges: Mapped[list["ChallengeEntity"]] = relationship("ChallengeEntity", lazy="raise", viewonly=True, init=False, default_factory=list)
 
     created_at: Mapped[datetime] = mapped_column(DateTime, server_default=func.now(), init=False)
     updated_at: Mapped[datetime] = mapped_column(DateTime, server_default=func.now(), onupdate=func.now(), init=False)
@@ -65,8 +70,8 @@ class ChallengeEntity(Base):
     key_authorization: Mapped[str] = mapped_column(String)
     status: Mapped[ChallengeStatus] = mapped_column(String)
 
-    authz_id: Mapped[UUID] = mapped_column(Uuid, ForeignKey('authz.id'), init=False)
-    authz: Mapped[AuthzEntity] = relationship("AuthzEntity", lazy="joined")
+    authz_id: Mapped[UUID] = mapped_column(Uuid, ForeignKey('authz.id'), init=False, index=True)
+    authz: Mapped[AuthzEntity] = relationship("AuthzEntity", lazy="raise")
 
     created_at: Mapped[datetime] = mapped_column(DateTime, server_default=func.now(), init=False)
     updated_at: Mapped[datetime] = mapped_column(DateTime, server_default=func.now(), onupdate=func.now(), init=False)
@@ -23,6 +23,12 @@ class JWKEntity(Base):
     ### OCT ###
     k: Mapped[str] = mapped_column(Text, default=None, nullable=True)
 
+    # RFC 7638 SHA-256 thumbprint, the lookup key for JWK-authenticated requests.
+    thumbprint: Mapped[str] = mapped_column(String, unique=True, init=False, default=None)
+
+    def __post_init__(self):
+        self.thumbprint = self.to_jwk().thumbprint()
+
     def to_jwk(self) -> JWK:
         return JWK(**self.to_dict())
 
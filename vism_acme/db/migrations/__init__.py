@@ -0,0 +1,82 @@
+import logging
+from datetime import datetime
+
+from sqlalchemy import Column, DateTime, Integer, MetaData, String, Table, inspect, select, text
+from sqlalchemy.engine import Connection
+
+from vism_acme.db.base import Base
+from vism_acme.db.migrations import (
+    v0001_expires_timestamps,
+    v0002_lookup_indexes,
+    v0003_order_keyset_index,
+    v0004_order_authz,
+    v0005_authz_validation_skipped,
+    v0006_rate_limit_buckets,
+    v0007_order_identifiers_hash,
+    v0008_order_error,
+)
+
+logger = logging.getLogger(__name__)
+
+# Applied in order; each module exposes `version`, `description` and `upgrade(connection)`.
+MIGRATIONS = [
+    v0001_expires_timestamps,
+    v0002_lookup_indexes,
+    v0003_order_keyset_index,
+    v0004_order_authz,
+    v0005_authz_validation_skipped,
+    v0006_rate_limit_buckets,
+    v0007_order_identifiers_hash,
+    v0008_order_error,
+]
+
+HEAD = MIGRATIONS[-1].version
+
+# Arbitrary, fixed key so concurrent workers starting at once serialize on the same lock.
+ADVISORY_LOCK_KEY = 7_401_593_218
+
+schema_version = Table(
+    "schema_version",
+    MetaData(),
+    Column("version", Integer, primary_key=True),
+    Column("description", String),
+    Column("applied_at", DateTime),
+)
+
+
+def current_version(connection: Connection) -> int:
+    version = connection.execute(select(schema_version.c.version).order_by(schema_version.c.version.desc())).scalar()
+    return version or 0
+
+
+def migrate(connection: Connection):
+    if connection.dialect.name == "postgresql":
+        connection.execute(text("SELECT pg_advisory_xact_lock(:key)"), {"key": ADVISORY_LOCK_KEY})
+
+    existing_tables = set(inspect(connection).get_table_names())
+    schema_version.create(connection, checkfirst=True)
+
+    # A database without any ACME tables is created straight at head. One that has tables
+    # but no recorded version predates migrations and is upgraded from version 0.
+    if "account" not in existing_tables:
+        logger.info(f"Creating ACME schema at version {HEAD}")
+        Base.metadata.create_all(connection)
+        _record(connection, MIGRATIONS[-1])
+        return
+
+    version = current_version(connection)
+    for migration in MIGRATIONS:
+        if migration.version <= version:
+            continue
+
+        logger.info(f"Applying ACME schema migration {migration.version}: {migration.description}")
+        migration.upgrade(connection)
+        _record(connection, migration)
+
+
+def _record(connection: Connection, migration):
+    connection.execute(schema_version.insert().values(
+        version=migration.version,
+        description=migration.description,
+        applied_at=datetime.now(),
+    ))
@@ -0,0 +1,31 @@
+from sqlalchemy import text
+from sqlalchemy.engine import Connection
+
+version = 1
+description = "validation_job table, timestamp expires columns with status indexes"
+
+
+def upgrade(connection: Connection):
+    # validation_job was added before migrations existed, so it may already be there.
+    connection.execute(text(
+        'CREATE TABLE IF NOT EXISTS validation_job ('
+        ' id UUID NOT NULL PRIMARY KEY,'
+        ' challenge_id UUID NOT NULL REFERENCES challenge (id),'
+        ' status VARCHAR NOT NULL,'
+        ' attempts INTEGER NOT NULL,'
+        ' next_attempt_at TIMESTAMP NOT NULL,'
+        ' locked_until TIMESTAMP,'
+        ' last_error TEXT,'
+        ' created_at TIMESTAMP NOT NULL DEFAULT now(),'
+        ' updated_at TIMESTAMP NOT NULL DEFAULT now()'
+        ')'
+    ))
+    connection.execute(text(
+        'CREATE INDEX IF NOT EXISTS ix_validation_job_status_next_attempt_at ON validation_job (status, next_attempt_at)'
+    ))
+
+    connection.execute(text('ALTER TABLE "order" ALTER COLUMN expires TYPE TIMESTAMP USING expires::timestamp'))
+    connection.execute(text('ALTER TABLE authz ALTER COLUMN expires TYPE TIMESTAMP USING expires::timestamp'))
+    connection.execute(text('CREATE INDEX IF NOT EXISTS ix_order_status_expires ON "order" (status, expires)'))
+    connection.execute(text('CREATE INDEX IF NOT EXISTS ix_order_status_updated_at ON "order" (status, updated_at)'))
+    connection.execute(text('CREATE INDEX IF NOT EXISTS ix_authz_status_expires ON authz (status, expires)'))
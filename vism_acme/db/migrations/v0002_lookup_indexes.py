@@ -0,0 +1,27 @@
+from jwcrypto.jwk import JWK
+from sqlalchemy import text
+from sqlalchemy.engine import Connection
+
+version = 2
+description = "foreign key and lookup indexes, unique account kid and jwk thumbprint"
+
+
+def upgrade(connection: Connection):
+    connection.execute(text('CREATE UNIQUE INDEX IF NOT EXISTS account_kid_key ON account (kid)'))
+    connection.execute(text('CREATE INDEX IF NOT EXISTS ix_account_jwk_id ON account (jwk_id)'))
+    connection.execute(text('CREATE INDEX IF NOT EXISTS ix_order_account_id ON "order" (account_id)'))
+    connection.execute(text('CREATE INDEX IF NOT EXISTS ix_authz_order_id ON authz (order_id)'))
+    connection.execute(text('CREATE INDEX IF NOT EXISTS ix_challenge_authz_id ON challenge (authz_id)'))
+    connection.execute(text('CREATE INDEX IF NOT EXISTS ix_validation_job_challenge_id ON validation_job (challenge_id)'))
+
+    connection.execute(text('ALTER TABLE jwk ADD COLUMN IF NOT EXISTS thumbprint VARCHAR'))
+    rows = connection.execute(text('SELECT id, kty, n, e, crv, x, y, k FROM jwk WHERE thumbprint IS NULL')).mappings().all()
+    for row in rows:
+        members = {key: value for key, value in row.items() if key != "id" and value is not None}
+        connection.execute(
+            text('UPDATE jwk SET thumbprint = :thumbprint WHERE id = :id'),
+            {"thumbprint": JWK(**members).thumbprint(), "id": row["id"]}
+        )
+
+    # Fails if the same key was registered twice; those accounts have to be merged by hand first.
+    connection.execute(text('CREATE UNIQUE INDEX IF NOT EXISTS jwk_thumbprint_key ON jwk (thumbprint)'))
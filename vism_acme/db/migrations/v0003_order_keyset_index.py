@@ -0,0 +1,11 @@
+from sqlalchemy import text
+from sqlalchemy.engine import Connection
+
+version = 3
+description = "account order listing keyset index"
+
+
+def upgrade(connection: Connection):
+    connection.execute(text('CREATE INDEX IF NOT EXISTS ix_order_account_id_created_at_id ON "order" (account_id, created_at, id)'))
+    # The composite index leads with account_id, so the single column one only costs writes.
+    connection.execute(text('DROP INDEX IF EXISTS ix_order_account_id'))
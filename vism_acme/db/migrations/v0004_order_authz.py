@@ -0,0 +1,27 @@
+from sqlalchemy import text
+from sqlalchemy.engine import Connection
+
+version = 4
+description = "order_authz association and authz account_id for authz reuse"
+
+
+def upgrade(connection: Connection):
+    connection.execute(text('ALTER TABLE authz ADD COLUMN IF NOT EXISTS account_id UUID REFERENCES account (id)'))
+    connection.execute(text('UPDATE authz SET account_id = "order".account_id FROM "order" WHERE "order".id = authz.order_id AND authz.account_id IS NULL'))
+    connection.execute(text('ALTER TABLE authz ALTER COLUMN account_id SET NOT NULL'))
+    connection.execute(text(
+        'CREATE INDEX IF NOT EXISTS ix_authz_reuse ON authz (account_id, identifier_type, identifier_value, status, expires)'
+    ))
+
+    connection.execute(text(
+        'CREATE TABLE IF NOT EXISTS order_authz ('
+        ' order_id UUID NOT NULL REFERENCES "order" (id),'
+        ' authz_id UUID NOT NULL REFERENCES authz (id),'
+        ' PRIMARY KEY (order_id, authz_id)'
+        ')'
+    ))
+    connection.execute(text('CREATE INDEX IF NOT EXISTS ix_order_authz_authz_id ON order_authz (authz_id)'))
+    connection.execute(text('INSERT INTO order_authz (order_id, authz_id) SELECT order_id, id FROM authz ON CONFLICT DO NOTHING'))
+
+    connection.execute(text('DROP INDEX IF EXISTS ix_authz_order_id'))
+    connection.execute(text('ALTER TABLE authz DROP COLUMN order_id'))
@@ -0,0 +1,9 @@
+from sqlalchemy import text
+from sqlalchemy.engine import Connection
+
+version = 5
+description = "authz validation_skipped_reason for pre-validated identifiers"
+
+
+def upgrade(connection: Connection):
+    connection.execute(text('ALTER TABLE authz ADD COLUMN IF NOT EXISTS validation_skipped_reason TEXT'))
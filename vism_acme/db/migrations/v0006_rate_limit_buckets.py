@@ -0,0 +1,17 @@
+from sqlalchemy import text
+from sqlalchemy.engine import Connection
+
+version = 6
+description = "rate_limit_bucket table for the postgres rate limit backend"
+
+
+def upgrade(connection: Connection):
+    connection.execute(text(
+        'CREATE TABLE IF NOT EXISTS rate_limit_bucket ('
+        ' id UUID NOT NULL PRIMARY KEY,'
+        ' key VARCHAR NOT NULL UNIQUE,'
+        ' tokens FLOAT NOT NULL,'
+        ' updated_at FLOAT NOT NULL'
+        ')'
+    ))
+    connection.execute(text('CREATE INDEX IF NOT EXISTS ix_rate_limit_bucket_updated_at ON rate_limit_bucket (updated_at)'))
@@ -0,0 +1,11 @@
+from sqlalchemy import text
+from sqlalchemy.engine import Connection
+
+version = 7
+description = "order identifiers_hash for coalescing duplicate new-order requests"
+
+
+def upgrade(connection: Connection):
+    # Existing orders keep a NULL hash and are simply never coalesced.
+    connection.execute(text('ALTER TABLE "order" ADD COLUMN IF NOT EXISTS identifiers_hash VARCHAR'))
+    connection.execute(text('CREATE INDEX IF NOT EXISTS ix_order_account_id_identifiers_hash ON "order" (account_id, identifiers_hash)'))
@@ -0,0 +1,9 @@
+from sqlalchemy import text
+from sqlalchemy.engine import Connection
+
+version = 8
+description = "order error_id for failed certificate issuance"
+
+
+def upgrade(connection: Connection):
+    connection.execute(text('ALTER TABLE "order" ADD COLUMN IF NOT EXISTS error_id UUID REFERENCES error (id)'))
@@ -1,8 +1,9 @@
+import hashlib
 from datetime import datetime, timedelta
 from enum import Enum
 from uuid import UUID
 
-from sqlalchemy import Integer, String, DateTime, func, ForeignKey, Text, Uuid
+from sqlalchemy import Integer, String, DateTime, func, ForeignKey, Text, Uuid, Index, Table, Column
 from sqlalchemy.orm import relationship
 from sqlalchemy.orm import Mapped
 from sqlalchemy.orm import mapped_column
@@ -17,21 +18,47 @@ class OrderStatus(str, Enum):
     INVALID = "invalid"
     EXPIRED = "expired"
 
+# Orders reference authzs through this table, so a still valid authz can be attached to later orders.
+order_authz = Table(
+    "order_authz",
+    Base.metadata,
+    Column("order_id", Uuid, ForeignKey("order.id"), primary_key=True),
+    Column("authz_id", Uuid, ForeignKey("authz.id"), primary_key=True, index=True),
+)
+
+def default_expires() -> datetime:
+    return datetime.now() + timedelta(minutes=30)
+
+def identifier_set_hash(identifiers: list[tuple[str, str]]) -> str:
+    normalized = sorted({f"{identifier_type}:{identifier_value.lower()}" for identifier_type, identifier_value in identifiers})
+    return hashlib.sha256("\n".join(normalized).encode("utf-8")).hexdigest()
+
 class OrderEntity(Base):
     __tablename__ = 'order'
+    __table_args__ = (
+        Index("ix_order_status_expires", "status", "expires"),
+        Index("ix_order_status_updated_at", "status", "updated_at"),
+        Index("ix_order_account_id_created_at_id", "account_id", "created_at", "id"),
+        Index("ix_order_account_id_identifiers_hash", "account_id", "identifiers_hash"),
+    )
 
     profile_name: Mapped[str] = mapped_column(String)
     status: Mapped[str] = mapped_column(String, default="pending")
 
     not_before: Mapped[str] = mapped_column(Integer, default=None, nullable=True)
     not_after: Mapped[str] = mapped_column(Integer, default=None, nullable=True)
-    expires: Mapped[str] = mapped_column(String, default=(datetime.now() + timedelta(minutes=30)).isoformat(), init=False)
+    identifiers_hash: Mapped[str] = mapped_column(String, default=None, nullable=True)
+    expires: Mapped[datetime] = mapped_column(DateTime, default_factory=default_expires, init=False)
 
     csr_pem: Mapped[str] = mapped_column(Text, init=False, default=None, nullable=True)
     crt_pem: Mapped[str] = mapped_column(Text, init=False, default=None, nullable=True)
 
+    error_id: Mapped[UUID] = mapped_column(Uuid, ForeignKey('error.id'), init=False, nullable=True, default=None)
+    error: Mapped["ErrorEntity"] = relationship("ErrorEntity", lazy="raise", init=False, default=None)
+
     created_at: Mapped[datetime] = mapped_column(DateTime, server_default=func.now(), init=False)
     updated_at: Mapped[datetime] = mapped_column(DateTime, server_default=func.now(), onupdate=func.now(), init=False)
 
     account_id: Mapped[UUID] = mapped_column(Uuid, ForeignKey('account.id'), init=False)
-    account: Mapped[AccountEntity] = relationship("AccountEntity", lazy="joined", default=None)
+    account: Mapped[AccountEntity] = relationship("AccountEntity", lazy="raise", default=None)
+    authzs: Mapped[list["AuthzEntity"]] = relationship("AuthzEntity", secondary=order_authz, lazy="raise", init=False, default_factory=list)
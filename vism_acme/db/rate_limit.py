@@ -0,0 +1,13 @@
+from sqlalchemy import String, Float
+from sqlalchemy.orm import Mapped
+from sqlalchemy.orm import mapped_column
+from vism_acme.db.base import Base
+
+
+class RateLimitBucketEntity(Base):
+    __tablename__ = 'rate_limit_bucket'
+
+    key: Mapped[str] = mapped_column(String, unique=True)
+    tokens: Mapped[float] = mapped_column(Float)
+    # Unix time, so every worker refills against the same clock without interval arithmetic.
+    updated_at: Mapped[float] = mapped_column(Float, index=True)
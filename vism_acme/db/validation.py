@@ -0,0 +1,30 @@
+from datetime import datetime
+from enum import Enum
+from uuid import UUID
+
+from sqlalchemy import String, DateTime, func, ForeignKey, Uuid, Integer, Text, Index
+from sqlalchemy.orm import Mapped
+from sqlalchemy.orm import mapped_column
+from vism_acme.db.base import Base
+
+
+class ValidationJobStatus(str, Enum):
+    QUEUED = "queued"
+    RUNNING = "running"
+    DONE = "done"
+
+class ValidationJobEntity(Base):
+    __tablename__ = 'validation_job'
+    __table_args__ = (
+        Index("ix_validation_job_status_next_attempt_at", "status", "next_attempt_at"),
+    )
+
+    challenge_id: Mapped[UUID] = mapped_column(Uuid, ForeignKey('challenge.id'), index=True)
+    status: Mapped[ValidationJobStatus] = mapped_column(String, default=ValidationJobStatus.QUEUED)
+    attempts: Mapped[int] = mapped_column(Integer, default=0)
+    next_attempt_at: Mapped[datetime] = mapped_column(DateTime, default_factory=datetime.now)
+    locked_until: Mapped[datetime] = mapped_column(DateTime, nullable=True, default=None)
+    last_error: Mapped[str] = mapped_column(Text, nullable=True, default=None)
+
+    created_at: Mapped[datetime] = mapped_column(DateTime, server_default=func.now(), init=False)
+    updated_at: Mapped[datetime] = mapped_column(DateTime, server_default=func.now(), onupdate=func.now(), init=False)
@@ -2,4 +2,7 @@ from vism.util.errors import VismException
 
 
 class JWTException(VismException):
-    pass
\ No newline at end of file
+    pass
+
+class CaSigningException(VismException):
+    pass
@@ -1,4 +1,4 @@
-from .jwt import JWSMiddleware
+from .acme import AcmeMiddleware
 from .acme_request import AcmeProtectedPayload, AcmeIdentifier, AcmeProtectedHeader
 
-__all__ = ["JWSMiddleware", "AcmeProtectedPayload", "AcmeIdentifier", "AcmeProtectedHeader"]
+__all__ = ["AcmeMiddleware", "AcmeProtectedPayload", "AcmeIdentifier", "AcmeProtectedHeader"]
@@ -0,0 +1,188 @@
+import logging
+from enum import Enum
+from typing import Optional
+
+from starlette.requests import Request
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from vism.tracing import span
+from vism_acme.middleware.jwt import AcmeJWSEnvelope
+from vism_acme.schema.response import ACMEProblemResponse
+from vism_acme.util import get_client_ip
+from vism_acme.util.codec import AcmeJSONResponse
+from vism_acme.util.enum import IdentifierType
+
+logger = logging.getLogger(__name__)
+
+
+class PathClass(str, Enum):
+    SKIP = "skip"
+    JWK = "jwk"
+    KID = "kid"
+    ANY = "any"
+
+
+class PrefixTable:
+    def __init__(self, prefixes: dict[str, PathClass], default: PathClass):
+        self.default = default
+        self.buckets: dict[str, list[tuple[str, PathClass]]] = {}
+        for prefix, path_class in prefixes.items():
+            first_segment = prefix.lstrip("/").split("/", 1)[0]
+            self.buckets.setdefault(first_segment, []).append((prefix, path_class))
+
+        for bucket in self.buckets.values():
+            bucket.sort(key=lambda entry: len(entry[0]), reverse=True)
+
+    def lookup(self, path: str) -> PathClass:
+        first_segment = path.lstrip("/").split("/", 1)[0]
+        for prefix, path_class in self.buckets.get(first_segment, ()):
+            if path.startswith(prefix):
+                return path_class
+
+        return self.default
+
+
+class AcmeMiddleware:
+    def __init__(
+            self,
+            app: ASGIApp,
+            skip_paths: Optional[list] = None,
+            jwk_paths: Optional[list] = None,
+            kid_paths: Optional[list] = None,
+            controller=None,
+    ):
+        self.app = app
+        self.controller = controller
+
+        prefixes = {}
+        prefixes.update({path: PathClass.KID for path in kid_paths or []})
+        prefixes.update({path: PathClass.JWK for path in jwk_paths or []})
+        prefixes.update({path: PathClass.SKIP for path in skip_paths or []})
+        self.path_classes = PrefixTable(prefixes, default=PathClass.ANY)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["method"] != "POST":
+            return await self.app(scope, receive, send)
+
+        path = scope["path"]
+        path_class = self.path_classes.lookup(path)
+        if path_class == PathClass.SKIP:
+            return await self.app(scope, receive, send)
+
+        body = await self._read_body(receive)
+
+        # The client IP is limited before anything touches the database, the account and
+        # identifiers once the request is authenticated.
+        try:
+            await self.controller.rate_limiter.check(client_ip=get_client_ip(Request(scope)))
+            with span("AcmeMiddleware.verify_jws"):
+                jws_envelope = self._parse_jws_envelope(body)
+            with span("AcmeMiddleware.get_account"):
+                account = await self._get_account(path, path_class, jws_envelope)
+            await self.controller.rate_limiter.check(
+                account_id=account.id if account else None,
+                identifiers=self._new_order_identifiers(path, jws_envelope),
+            )
+        except ACMEProblemResponse as exc:
+            response = await self._problem_response(exc.status_code, exc.error_json, headers=exc.headers)
+            return await response(scope, receive, send)
+
+        account_id = account.id if account else None
+        nonce_provided = jws_envelope.headers.nonce
+        popped_nonce = await self.controller.nonce_manager.pop_nonce(nonce_provided, account_id)
+        if not nonce_provided or not popped_nonce:
+            response = await self._problem_response(
+                400,
+                {
+                    "type": "urn:ietf:params:acme:error:badNonce",
+                    "title": "Invalid/missing replay-nonce"
+                },
+                account_id
+            )
+            return await response(scope, receive, send)
+
+        state = scope.setdefault("state", {})
+        state["jws_envelope"] = jws_envelope
+        state["account"] = account
+        state["nonce"] = nonce_provided
+
+        await self.app(scope, self._replay_body(body, receive), send)
+
+    @staticmethod
+    async def _read_body(receive: Receive) -> bytes:
+        chunks = []
+        more_body = True
+        while more_body:
+            message = await receive()
+            chunks.append(message.get("body", b""))
+            more_body = message.get("more_body", False)
+
+        return b"".join(chunks)
+
+    @staticmethod
+    def _replay_body(body: bytes, receive: Receive) -> Receive:
+        replayed = False
+
+        async def replay() -> Message:
+            nonlocal replayed
+            if replayed:
+                return await receive()
+
+            replayed = True
+            return {"type": "http.request", "body": body, "more_body": False}
+
+        return replay
+
+    @staticmethod
+    def _new_order_identifiers(path: str, jws_envelope: AcmeJWSEnvelope) -> Optional[list[tuple[str, str]]]:
+        if path != "/new-order" or not jws_envelope.payload or not jws_envelope.payload.identifiers:
+            return None
+
+        return [(IdentifierType(identifier.type).value, identifier.value) for identifier in jws_envelope.payload.identifiers]
+
+    @staticmethod
+    def _parse_jws_envelope(raw: bytes) -> AcmeJWSEnvelope:
+        try:
+            jws_envelope = AcmeJWSEnvelope.parse(raw)
+        except ACMEProblemResponse:
+            raise
+        except Exception as e:
+            raise ACMEProblemResponse(type="malformed", title=f"Invalid JSON body", detail=str(e))
+
+        if not jws_envelope.headers:
+            raise ACMEProblemResponse(type="malformed", title=f"Missing protected header.")
+
+        return jws_envelope
+
+    async def _get_account(self, path: str, path_class: PathClass, jws_envelope: AcmeJWSEnvelope):
+        if path_class == PathClass.JWK and not jws_envelope.headers.jwk:
+            raise ACMEProblemResponse(type="malformed", title=f"{path} requests must contain a jwk key.")
+
+        if path_class == PathClass.KID and not jws_envelope.headers.kid:
+            raise ACMEProblemResponse(type="malformed", title=f"{path} requests must contain a kid.")
+
+        if jws_envelope.headers.kid:
+            account = await self.controller.database.get_account_by_kid(jws_envelope.headers.kid)
+            if not account:
+                raise ACMEProblemResponse(type="accountDoesNotExist", title=f"Account {jws_envelope.headers.kid} does not exist.", status_code=403)
+        elif jws_envelope.headers.jwk:
+            account = await self.controller.database.get_account_by_jwk(jws_envelope.headers.jwk)
+        else:
+            raise ACMEProblemResponse(type="malformed", title=f"Must provide either kid or jwk.")
+
+        if account and account.status != "valid":
+            raise ACMEProblemResponse(type="unauthorized", title=f"Account is not valid.", status_code=403)
+
+        return account
+
+    async def _problem_response(self, status_code: int, content: dict, account_id=None, headers: dict = None) -> AcmeJSONResponse:
+        return AcmeJSONResponse(
+            status_code=status_code,
+            content=content,
+            headers={
+                "Content-Type": "application/problem+json",
+                "Replay-Nonce": await self.controller.nonce_manager.new_nonce(account_id),
+                "Retry-After": self.controller.config.retry_after_seconds,
+                **(headers or {}),
+            }
+        )
@@ -1,20 +1,38 @@
 import logging
 
 from datetime import datetime
-from typing import Optional, Callable
+from typing import Optional
 from jwcrypto.jwk import JWK
 from pydantic import field_validator
 from pydantic.dataclasses import dataclass as pydantic_dataclass
-from starlette.middleware.base import BaseHTTPMiddleware
-from starlette.responses import Response, JSONResponse
 from vism.util import is_valid_ip
 from vism_acme.schema.response import ACMEProblemResponse
-from vism_acme.structs.account import Account
 from vism_acme.util.enum import IdentifierType
 
 logger = logging.getLogger(__name__)
 
 
+# Builds a dataclass instance without running the pydantic validation pass. Only used by the
+# parse() fast paths below once the input has been checked to already have the right shape.
+def _construct(cls, values: dict):
+    instance = cls.__new__(cls)
+    for name, field in cls.__dataclass_fields__.items():
+        setattr(instance, name, values.get(name, field.default))
+    return instance
+
+def _is_well_formed(values, field_types: dict) -> bool:
+    if not isinstance(values, dict):
+        return False
+
+    for name, value in values.items():
+        # Unknown members are ignored, same as the validating constructor does.
+        expected = field_types.get(name)
+        if expected is not None and value is not None and type(value) not in expected:
+            return False
+
+    return True
+
+
 class Config:
     arbitrary_types_allowed = True
 
@@ -33,6 +51,15 @@ class AcmeProtectedHeader:
         if self.jwk:
             self.jwk = JWK(**self.jwk)
 
+    @classmethod
+    def parse(cls, values: dict) -> "AcmeProtectedHeader":
+        if not _is_well_formed(values, HEADER_FIELD_TYPES):
+            return cls(**values)
+
+        header = _construct(cls, values)
+        header.__post_init__()
+        return header
+
 @pydantic_dataclass
 class AcmeIdentifier:
     type: IdentifierType
@@ -65,6 +92,23 @@ class AcmeIdentifier:
             "value": self.value,
         }
 
+    @classmethod
+    def parse(cls, values: dict) -> "AcmeIdentifier":
+        if not _is_well_formed(values, IDENTIFIER_FIELD_TYPES) or values.get("type") is None or values.get("value") is None:
+            return cls(**values)
+
+        try:
+            identifier_type = IdentifierType(values["type"])
+        except ValueError:
+            return cls(**values)
+
+        identifier = _construct(cls, {
+            "type": cls.type_must_be_valid(identifier_type),
+            "value": cls.value_must_be_valid(values["value"]),
+        })
+        identifier.__post_init__()
+        return identifier
+
 
 @pydantic_dataclass
 class AcmeProtectedPayload:
@@ -114,6 +158,27 @@ class AcmeProtectedPayload:
                 raise ACMEProblemResponse(type="malformed", title=f"Invalid notAfter value", detail="notAfter must be a valid date/time string in ISO 8601 format and in the future")
         return v
 
+    @classmethod
+    def parse(cls, values: dict) -> "AcmeProtectedPayload":
+        identifiers = values.get("identifiers") if isinstance(values, dict) else None
+        if not _is_well_formed(values, PAYLOAD_FIELD_TYPES) or \
+                (identifiers is not None and not all(isinstance(identifier, dict) for identifier in identifiers)):
+            return cls(**values)
+
+        if identifiers is not None:
+            identifiers = [AcmeIdentifier.parse(identifier) for identifier in identifiers]
+
+        return _construct(cls, {
+            "identifiers": identifiers,
+            "csr": values.get("csr"),
+            "profile": values.get("profile"),
+            "onlyReturnExisting": cls.onlyReturnExisting_must_be_bool(values.get("onlyReturnExisting")),
+            "contact": values.get("contact"),
+            "status": cls.status_must_be_valid(values.get("status")),
+            "notBefore": cls.notBefore_must_be_valid(values.get("notBefore")),
+            "notAfter": cls.notAfter_must_be_valid(values.get("notAfter")),
+        })
+
     def __bool__(self):
         return bool(self.identifiers) or \
             bool(self.csr) or \
@@ -124,79 +189,27 @@ class AcmeProtectedPayload:
             bool(self.notBefore) or \
             bool(self.notAfter)
 
-class AcmeAccountMiddleware(BaseHTTPMiddleware):
-    def __init__(
-            self,
-            app,
-            jwk_paths: Optional[list],
-            kid_paths: Optional[list],
-            controller=None,
-    ):
-        super().__init__(app)
-        self.jwk_paths = jwk_paths
-        self.kid_paths = kid_paths
-        self.controller = controller
-
-    async def dispatch(self, request, call_next: Callable) -> Response:
-        if not hasattr(request.state, "jws_envelope"):
-            return await call_next(request)
-
-        if request.method != "POST":
-            return await call_next(request)
 
-        try:
-            account = await self._get_account(request)
-        except ACMEProblemResponse as exc:
-            return JSONResponse(
-                status_code=exc.status_code,
-                content=exc.error_json,
-                headers={
-                    "Content-Type": "application/problem+json",
-                    "Replay-Nonce": await self.controller.nonce_manager.new_nonce(),
-                    "Retry-After": self.controller.config.retry_after_seconds
-                }
-            )
-
-        nonce_provided = request.state.jws_envelope.headers.nonce
-        popped_nonce = await self.controller.nonce_manager.pop_nonce(nonce_provided, account.id if account else None)
-        if not nonce_provided or not popped_nonce:
-            return JSONResponse(
-                status_code=400,
-                content={
-                    "type": "urn:ietf:params:acme:error:badNonce",
-                    "title": "Invalid/missing replay-nonce"
-                },
-                headers={
-                    "Content-Type": "application/problem+json",
-                    "Replay-Nonce": await self.controller.nonce_manager.new_nonce(account.id if account else None),
-                    "Retry-After": self.controller.config.retry_after_seconds
-                }
-            )
-
-        request.state.nonce = nonce_provided or popped_nonce
-        request.state.account = account
-
-        return await call_next(request)
-
-    async def _get_account(self, request) -> Account:
-        jws_envelope = request.state.jws_envelope
-
-        if any(request.url.path.startswith(path) for path in self.jwk_paths) and not jws_envelope.headers.jwk:
-            raise ACMEProblemResponse(type="malformed", title=f"{request.url.path} requests must contain a jwk key.")
-
-        if any(request.url.path.startswith(path) for path in self.kid_paths) and not jws_envelope.headers.kid:
-            raise ACMEProblemResponse(type="malformed", title=f"{request.url.path} requests must contain a kid.")
-
-        if jws_envelope.headers.kid:
-            account = self.controller.database.get_account_by_kid(jws_envelope.headers.kid)
-            if not account:
-                raise ACMEProblemResponse(type="accountDoesNotExist", title=f"Account {jws_envelope.headers.kid} does not exist.", status_code=403)
-        elif jws_envelope.headers.jwk:
-            account = self.controller.database.get_account_by_jwk(jws_envelope.headers.jwk)
-        else:
-            raise ACMEProblemResponse(type="malformed", title=f"Must provide either kid or jwk.")
-
-        if account and account.status != "valid":
-            raise ACMEProblemResponse(type="unauthorized", title=f"Account is not valid.", status_code=403)
-
-        return account
+HEADER_FIELD_TYPES = {
+    "alg": (str,),
+    "nonce": (str,),
+    "url": (str,),
+    "jwk": (dict,),
+    "kid": (str,),
+}
+
+IDENTIFIER_FIELD_TYPES = {
+    "type": (str,),
+    "value": (str,),
+}
+
+PAYLOAD_FIELD_TYPES = {
+    "identifiers": (list,),
+    "csr": (str,),
+    "profile": (str,),
+    "onlyReturnExisting": (bool,),
+    "contact": (list,),
+    "status": (str,),
+    "notBefore": (str,),
+    "notAfter": (str,),
+}
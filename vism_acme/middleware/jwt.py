@@ -1,15 +1,11 @@
-import json
 import logging
-from typing import Optional, Callable
-from fastapi import Request
+from typing import Optional
 from jwcrypto import jws as _jws
 from pydantic.dataclasses import dataclass
-from starlette.middleware.base import BaseHTTPMiddleware
-from starlette.responses import Response, JSONResponse
 
-from vism.util import b64u_decode
 from vism_acme.middleware.acme_request import AcmeProtectedPayload, AcmeProtectedHeader
 from vism_acme.schema.response import ACMEProblemResponse
+from vism_acme.util.codec import b64u_decode_json, json_loads
 
 logger = logging.getLogger(__name__)
 
@@ -27,14 +23,29 @@ class AcmeJWSEnvelope:
     def is_post_as_get(self):
         return self.encoded_payload == ""
 
+    @classmethod
+    def parse(cls, raw: bytes) -> "AcmeJWSEnvelope":
+        envelope_json = json_loads(raw)
+        if not isinstance(envelope_json, dict):
+            raise ValueError("JWS must be a JSON object")
+
+        encoded = (envelope_json.get("payload"), envelope_json.get("protected"), envelope_json.get("signature"))
+        if not all(value is None or isinstance(value, str) for value in encoded):
+            return cls(*encoded)
+
+        envelope = cls.__new__(cls)
+        envelope.encoded_payload, envelope.encoded_protected, envelope.encoded_signature = encoded
+        envelope.payload = None
+        envelope.headers = None
+        envelope.__post_init__()
+        return envelope
+
     def __post_init__(self):
         if self.encoded_payload:
-            decoded_payload = json.loads(b64u_decode(self.encoded_payload).decode("utf-8"))
-            self.payload = AcmeProtectedPayload(**decoded_payload)
+            self.payload = AcmeProtectedPayload.parse(b64u_decode_json(self.encoded_payload.strip()))
 
         if self.encoded_protected:
-            decoded = json.loads(b64u_decode(self.encoded_protected).decode("utf-8"))
-            self.headers = AcmeProtectedHeader(**decoded)
+            self.headers = AcmeProtectedHeader.parse(b64u_decode_json(self.encoded_protected.strip()))
 
         if not self.headers:
             return None
@@ -63,53 +74,3 @@ class AcmeJWSEnvelope:
                 title=f"Invalid JWK.",
                 detail=str(e)
             )
-
-
-class JWSMiddleware(BaseHTTPMiddleware):
-    def __init__(
-            self,
-            app,
-            skip_paths: Optional[list] = None,
-            controller=None,
-    ):
-        super().__init__(app)
-        self.skip_paths = skip_paths or []
-        self.controller = controller
-
-    async def dispatch(self, request: Request, call_next: Callable) -> Response:
-        if any(request.url.path.startswith(path) for path in self.skip_paths):
-            return await call_next(request)
-
-        if request.method != "POST":
-            return await call_next(request)
-
-        try:
-            jws_envelope = await self._parse_jws_envelope(request)
-        except ACMEProblemResponse as exc:
-            return JSONResponse(
-                status_code=exc.status_code,
-                content=exc.error_json,
-                headers={
-                    "Content-Type": "application/problem+json",
-                    "Replay-Nonce": await self.controller.nonce_manager.new_nonce(),
-                    "Retry-After": self.controller.config.retry_after_seconds
-                }
-            )
-
-        request.state.jws_envelope = jws_envelope
-
-        return await call_next(request)
-
-    async def _parse_jws_envelope(self, request: Request) -> AcmeJWSEnvelope:
-        raw = await request.body()
-        try:
-            envelope_json = json.loads(raw)
-            jws_envelope = AcmeJWSEnvelope(
-                encoded_protected=envelope_json.get("protected", None),
-                encoded_payload=envelope_json.get("payload", None),
-                encoded_signature=envelope_json.get("signature", None),
-            )
-        except Exception as e:
-            raise ACMEProblemResponse(type="malformed", title=f"Invalid JSON body", detail=str(e))
-
-        return jws_envelope
@@ -1,11 +1,12 @@
 import secrets
 
 from fastapi import APIRouter
-from starlette.responses import JSONResponse
+from vism_acme.util.codec import AcmeJSONResponse
 
 from vism_acme.db import AccountEntity, JWKEntity
-from vism_acme import VismACMEController
+from vism_acme.controller import VismACMEController
 from vism_acme.routers import AcmeRequest
+from vism_acme.routers.order import orders_page
 from vism_acme.schema.response import ACMEProblemResponse
 from vism_acme.util import absolute_url
 
@@ -20,17 +21,10 @@ class AccountRouter:
         self.router.post("/account/{account_kid}/orders")(self.account_orders)
 
     async def account_orders(self, request: AcmeRequest, account_kid: str):
-        account_orders = self.controller.database.get_orders_by_account_kid(account_kid)
-        return JSONResponse(
-            content={
-                "orders": [absolute_url(request, f"/order/{order.id}") for order in account_orders]
-            },
-            status_code=200,
-            headers={
-                "Content-Type": "application/json",
-                "Replay-Nonce": await self.controller.nonce_manager.new_nonce(request.state.account.id),
-            }
-        )
+        if account_kid != request.state.account.kid:
+            raise ACMEProblemResponse(type="unauthorized", title="Account is not authorized.")
+
+        return await orders_page(self.controller, request, f"/account/{account_kid}/orders")
 
     async def update_account(self, request: AcmeRequest, account_kid: str):
         if not request.state.jws_envelope.payload:
@@ -42,9 +36,9 @@ class AccountRouter:
         if request.state.jws_envelope.payload.status:
             request.state.account.status = request.state.jws_envelope.payload.status
 
-        account = self.controller.database.save_to_db(request.state.account)
+        account = await self.controller.database.save_to_db(request.state.account)
         location = absolute_url(request, f"/account/{request.state.account.kid}")
-        return JSONResponse(
+        return AcmeJSONResponse(
             content={
                 "id": account.kid, # required for acme.sh, i dont know where they got this from, but i cant see it in the RFC
                 "status": account.status,
@@ -68,7 +62,6 @@ class AccountRouter:
             status = "valid"
 
             jwk = JWKEntity(**request.state.jws_envelope.headers.jwk)
-            jwk = self.controller.database.save_to_db(jwk)
             account = AccountEntity(
                 kid=kid,
                 status=status,
@@ -77,14 +70,15 @@ class AccountRouter:
             if request.state.jws_envelope.payload.contact:
                 account.contact = ','.join(request.state.jws_envelope.payload.contact)
 
-            self.controller.database.save_to_db(account)
+            async with self.controller.database.unit_of_work() as session:
+                session.add_all([jwk, account])
             return_code = 201
         else:
             account = request.state.account
             return_code = 200
 
         location = absolute_url(request, f"/account/{account.kid}")
-        return JSONResponse(
+        return AcmeJSONResponse(
             content={
                 "id": account.kid, # required for acme.sh, i dont know where they got this from, but i cant see it in the RFC
                 "status": account.status,
@@ -1,10 +1,10 @@
 from datetime import datetime
 from fastapi import APIRouter, BackgroundTasks
-from starlette.responses import JSONResponse
+from vism_acme.util.codec import AcmeJSONResponse
 
+from vism_acme.db import ValidationJobEntity
 from vism_acme.db.authz import AuthzStatus, ChallengeStatus
-from vism_acme.db.order import OrderStatus
-from vism_acme import VismACMEController
+from vism_acme.controller import VismACMEController
 from vism_acme.routers import AcmeRequest
 from vism_acme.schema.response import ACMEProblemResponse
 from vism_acme.validators.http_01 import Http01Validator
@@ -19,30 +19,37 @@ class AuthzRouter:
         self.router.post("/challenge/{challenge_id}")(self.challenge)
 
     async def challenge(self, request: AcmeRequest, background_tasks: BackgroundTasks, challenge_id: str):
-        challenge_entity = self.controller.database.get_challenge_by_id(challenge_id)
+        challenge_entity = await self.controller.database.get_challenge_by_id(challenge_id)
         if not challenge_entity:
             raise ACMEProblemResponse(type="malformed", title="Invalid challenge ID.")
 
-        if challenge_entity.authz.order.account.id != request.state.account.id:
+        if challenge_entity.authz.account_id != request.state.account.id:
             raise ACMEProblemResponse(type="unauthorized", title="Account is not authorized to access this challenge.")
 
-        authz_expired = challenge_entity.authz.status == AuthzStatus.EXPIRED
-        if not authz_expired:
-            authz_expired = datetime.fromisoformat(challenge_entity.authz.expires) < datetime.now()
-            if authz_expired:
-                challenge_entity.authz.status = AuthzStatus.EXPIRED
-                challenge_entity.authz = self.controller.database.save_to_db(challenge_entity.authz)
-                challenge_entity.status = ChallengeStatus.INVALID
-                challenge_entity = self.controller.database.save_to_db(challenge_entity)
+        validator = None
+        async with self.controller.database.unit_of_work() as session:
+            session.add(challenge_entity)
 
-        if not authz_expired and not challenge_entity.status == ChallengeStatus.VALID:
-            challenge_entity.status = ChallengeStatus.PROCESSING
-            challenge_entity = self.controller.database.save_to_db(challenge_entity)
+            authz_expired = challenge_entity.authz.status == AuthzStatus.EXPIRED
+            if not authz_expired:
+                authz_expired = challenge_entity.authz.expires < datetime.now()
+                if authz_expired:
+                    challenge_entity.authz.status = AuthzStatus.EXPIRED
+                    challenge_entity.status = ChallengeStatus.INVALID
+
+            # Only the pending to processing transition starts a validation; re-POSTing a processing challenge reports it.
+            if not authz_expired and challenge_entity.status == ChallengeStatus.PENDING:
+                if self.controller.config.validation_queue.enabled:
+                    session.add(ValidationJobEntity(challenge_id=challenge_entity.id))
+                else:
+                    validator = Http01Validator(self.controller, challenge_entity)
 
-            validator = Http01Validator(self.controller, challenge_entity)
+                challenge_entity.status = ChallengeStatus.PROCESSING
+
+        if validator:
             background_tasks.add_task(validator.validate)
 
-        return JSONResponse(
+        return AcmeJSONResponse(
             status_code=200,
             content={
                 "status": challenge_entity.status,
@@ -57,49 +64,34 @@ class AuthzRouter:
         )
 
     async def authz(self, request: AcmeRequest, authz_id: str):
-        authz_entity = self.controller.database.get_authz_by_id(authz_id)
+        authz_entity = await self.controller.database.get_authz_by_id(authz_id)
         if not authz_entity:
             raise ACMEProblemResponse(type="malformed", title="Invalid authz ID.")
 
-        if authz_entity.order.account.id != request.state.account.id:
+        if authz_entity.account_id != request.state.account.id:
             raise ACMEProblemResponse(type="unauthorized", title="Account is not authorized to access this authz.")
 
-        if request.state.jws_envelope.payload and request.state.jws_envelope.payload.status:
-            authz_entity.status = request.state.jws_envelope.payload.status
-            authz_entity = self.controller.database.save_to_db(authz_entity)
-            authz_entity.order.status = OrderStatus.INVALID
-            authz_entity.order = self.controller.database.save_to_db(authz_entity.order)
-
-        authz_deactivated = authz_entity.status == AuthzStatus.DEACTIVATED
-        order_invalid = authz_entity.order.status == OrderStatus.INVALID
-
-        if not authz_deactivated and not order_invalid:
-            authz_expired = authz_entity.status == AuthzStatus.EXPIRED
-            if not authz_expired:
-                authz_expired = datetime.fromisoformat(authz_entity.expires) < datetime.now()
-                if authz_expired:
-                    authz_entity.status = AuthzStatus.EXPIRED
-                    authz_entity = self.controller.database.save_to_db(authz_entity)
-
-            order_expired = authz_entity.order.status == OrderStatus.EXPIRED
-            if not order_expired:
-                order_expiry = datetime.fromisoformat(authz_entity.order.expires)
-                order_expired = datetime.now() > order_expiry
-                if order_expired:
-                    authz_entity.order.status = OrderStatus.EXPIRED
-                    authz_entity.order = self.controller.database.save_to_db(authz_entity.order)
+        # A poll is the single read above; the status only changes (conditionally, in the
+        # database) when the client deactivates the authz or an expiry is due.
+        now = datetime.now()
+        payload_status = request.state.jws_envelope.payload.status if request.state.jws_envelope.payload else None
+        if payload_status:
+            if payload_status != AuthzStatus.DEACTIVATED:
+                raise ACMEProblemResponse(type="malformed", title="Authorizations can only be deactivated.")
 
-        authz_challenges = self.controller.database.get_challenges_by_authz_id(authz_entity.id)
+            authz_entity.status = await self.controller.database.deactivate_authz(authz_entity.id) or authz_entity.status
+        elif authz_entity.status in [AuthzStatus.PENDING, AuthzStatus.VALID] and authz_entity.expires < now:
+            authz_entity.status = await self.controller.database.expire_authz(authz_entity.id, now) or authz_entity.status
 
         response_code = 200
         response = {
             "status": authz_entity.status,
-            "expires": authz_entity.expires,
+            "expires": authz_entity.expires.isoformat(),
             "identifier": {
                 "type": authz_entity.identifier_type,
                 "value": authz_entity.identifier_value
             },
-            "challenges": [challenge.to_dict(request) for challenge in authz_challenges],
+            "challenges": [challenge.to_dict(request) for challenge in authz_entity.challenges],
         }
 
         if authz_entity.error:
@@ -110,7 +102,7 @@ class AuthzRouter:
                 "detail": authz_entity.error.detail,
             }
 
-        return JSONResponse(
+        return AcmeJSONResponse(
             status_code=response_code,
             content=response,
             headers={
@@ -1,6 +1,6 @@
 from fastapi import APIRouter
-from starlette.responses import JSONResponse
-from vism_acme import VismACMEController
+from starlette.responses import Response
+from vism_acme.controller import VismACMEController
 from vism_acme.routers import AcmeRequest
 
 
@@ -11,15 +11,12 @@ class BaseRouter:
         self.router.get("/directory")(self.directory)
 
     async def directory(self, request: AcmeRequest):
-        base = str(request.base_url).rstrip("/")
-        dir_obj = {
-            "newNonce": f"{base}/new-nonce",
-            "newAccount": f"{base}/new-account",
-            "newOrder": f"{base}/new-order",
-            "revokeCert": f"{base}/revoke-cert",
-            "keyChange": None,
-            "meta": {
-                "profiles": {profile.name: profile.to_dict() for profile in self.controller.config.profiles}
-            }
-        }
-        return JSONResponse(dir_obj)
+        directory = self.controller.directory
+        document = directory.get(str(request.base_url).rstrip("/"))
+        headers = {"ETag": document.etag, "Cache-Control": directory.cache_control}
+
+        if_none_match = request.headers.get("if-none-match")
+        if if_none_match and document.etag in [etag.strip() for etag in if_none_match.split(",")]:
+            return Response(status_code=304, headers=headers)
+
+        return Response(document.body, media_type="application/json", headers=headers)
@@ -1,6 +1,6 @@
 from fastapi import APIRouter
 from starlette.responses import Response
-from vism_acme import VismACMEController
+from vism_acme.controller import VismACMEController
 
 
 class NonceRouter:
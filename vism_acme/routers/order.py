@@ -1,20 +1,34 @@
+import asyncio
 import base64
+import hashlib
+import logging
 import secrets
 import socket
+from datetime import datetime, timedelta
 from typing import Optional
+from uuid import UUID
 
 from cryptography import x509
 from cryptography.hazmat.backends import default_backend
-from fastapi import APIRouter
-from starlette.responses import JSONResponse
+from cryptography.hazmat.primitives import serialization
+from fastapi import APIRouter, BackgroundTasks
+from starlette.responses import Response
+from vism_acme.util.codec import AcmeJSONResponse
 
+from vism.metrics import SIGNING_QUEUE_DEPTH
+from vism.tracing import traced
 from vism_acme.config import Profile
-from vism_acme.db.authz import ChallengeEntity, AuthzEntity, AuthzStatus, ChallengeStatus
-from vism_acme.db.order import OrderEntity
-from vism_acme import VismACMEController
+from vism_acme.db.authz import ChallengeEntity, AuthzEntity, AuthzStatus, ChallengeStatus, ErrorEntity
+from vism_acme.db.order import OrderEntity, OrderStatus, identifier_set_hash
+from vism_acme.errors import CaSigningException
+from vism_acme.controller import VismACMEController
 from vism_acme.routers import AcmeRequest
 from vism_acme.schema.response import ACMEProblemResponse
 from vism_acme.util import get_client_ip, absolute_url, fix_base64_padding
+from vism_acme.util.enum import IdentifierType
+from vism_acme.util.pagination import decode_cursor, next_link
+
+logger = logging.getLogger(__name__)
 
 
 class OrderRouter:
@@ -26,24 +40,26 @@ class OrderRouter:
         self.router.post("/orders/{account_kid}")(self.account_orders)
         self.router.post("/order/{order_id}")(self.order)
         self.router.post("/order/{order_id}/finalize")(self.order_finalize)
+        self.router.post("/order/{order_id}/certificate")(self.certificate)
 
-    async def order_finalize(self, request: AcmeRequest, order_id: str):
-        order = self.controller.database.get_order_by_id(order_id)
+    async def order_finalize(self, request: AcmeRequest, background_tasks: BackgroundTasks, order_id: str):
+        order = await self.controller.database.get_order_by_id(order_id)
         if not order:
             raise ACMEProblemResponse(type="malformed", title="Invalid order ID.")
 
-        if order.account.id != request.state.account.id:
+        if order.account_id != request.state.account.id:
             raise ACMEProblemResponse(type="unauthorized", title="Account is not authorized to access this order.")
 
-        if order.status != "ready":
-            order_authz_entities = self.controller.database.get_authz_by_order_id(order_id)
-            order_ready = all(authz.status == AuthzStatus.VALID for authz in order_authz_entities)
-            if order_ready:
-                order.status = "ready"
-                order = self.controller.database.save_to_db(order)
+        order_authz = await self.controller.database.get_authz_by_order_id(order.id)
+        if order.status == OrderStatus.PENDING and all(authz.status == AuthzStatus.VALID for authz in order_authz):
+            order.status = OrderStatus.READY
+            order = await self.controller.database.save_to_db(order)
+
+        if order.status != OrderStatus.READY:
+            raise ACMEProblemResponse(type="orderNotReady", title="Order is not ready.", status_code=403)
 
-        if order.status != "ready":
-            raise ACMEProblemResponse(type="orderNotReady", title="Order is not ready.")
+        if not request.state.jws_envelope.payload or not request.state.jws_envelope.payload.csr:
+            raise ACMEProblemResponse(type="malformed", title="Finalize requests must contain a csr.")
 
         csr_der_b64 = request.state.jws_envelope.payload.csr
 
@@ -53,8 +69,6 @@ class OrderRouter:
         except Exception as e:
             raise ACMEProblemResponse(type="badCSR", title="Invalid CSR.", detail=str(e))
 
-        order_authz = self.controller.database.get_authz_by_order_id(order.id)
-
         try:
             csr_domains = [str(name.value) for name in csr.extensions.get_extension_for_class(x509.SubjectAlternativeName).value]
         except Exception as e:
@@ -68,61 +82,110 @@ class OrderRouter:
                 detail=f"CSR domains: {csr_domains}, Authorized domains: {list(authz_domains)}"
             )
 
+        csr_pem = csr.public_bytes(serialization.Encoding.PEM).decode("utf-8")
+        if not await self.controller.database.begin_order_processing(order.id, csr_pem):
+            raise ACMEProblemResponse(type="orderNotReady", title="Order is already being finalized.", status_code=403)
+
+        order.status = OrderStatus.PROCESSING
+        profile = self.controller.config.get_profile_by_name(order.profile_name)
+        background_tasks.add_task(self._issue_certificate, order.id, profile, csr_pem)
+
+        return await self._order_response(request, order, order_authz)
+
     async def order(self, request: AcmeRequest, order_id: str):
-        order = self.controller.database.get_order_by_id(order_id)
+        order = await self.controller.database.get_order_view_by_id(order_id)
         if not order:
             raise ACMEProblemResponse(type="malformed", title="Invalid order ID.")
 
-        if order.account.id != request.state.account.id:
+        if order.account_id != request.state.account.id:
             raise ACMEProblemResponse(type="unauthorized", title="Account is not authorized to access this order.")
 
-        authz_entities = self.controller.database.get_authz_by_order_id(order_id)
+        authz_entities = await self.controller.database.get_authz_by_order_id(order_id)
 
-        return JSONResponse(
-            content={
-                "status": order.status,
-                "expires": order.expires,
-                "notBefore": order.not_before,
-                "notAfter": order.not_after,
-                "identifiers": [identifier.to_dict() for identifier in request.state.jws_envelope.payload.identifiers],
-                "authorizations": [absolute_url(request, f"/authz/{authz.id}") for authz in authz_entities],
-                "finalize": absolute_url(request, f"/order/{order.id}/finalize"),
-                "certificate": absolute_url(request, f"/order/{order.id}/certificate") if order.cert_pem else None
-            },
-            status_code=201,
-            headers={
-                "Content-Type": "application/json",
-                "Location": absolute_url(request, f"/order/{order.id}"),
-                "Replay-Nonce": await self.controller.nonce_manager.new_nonce(request.state.account.id),
+        return await self._order_response(request, order, authz_entities)
+
+    async def certificate(self, request: AcmeRequest, order_id: str):
+        order = await self.controller.database.get_order_by_id(order_id)
+        if not order:
+            raise ACMEProblemResponse(type="malformed", title="Invalid order ID.")
+
+        if order.account_id != request.state.account.id:
+            raise ACMEProblemResponse(type="unauthorized", title="Account is not authorized to access this certificate.")
+
+        if order.status != OrderStatus.VALID or not order.crt_pem:
+            raise ACMEProblemResponse(type="orderNotReady", title="Certificate has not been issued.", status_code=403)
+
+        headers = {
+            "ETag": f'"{hashlib.sha256(order.crt_pem.encode("utf-8")).hexdigest()[:32]}"',
+            "Replay-Nonce": await self.controller.nonce_manager.new_nonce(request.state.account.id),
+        }
+
+        if_none_match = request.headers.get("if-none-match")
+        if if_none_match and headers["ETag"] in [etag.strip() for etag in if_none_match.split(",")]:
+            return Response(status_code=304, headers=headers)
+
+        return Response(order.crt_pem, media_type="application/pem-certificate-chain", headers=headers)
+
+    async def _issue_certificate(self, order_id: UUID, profile: Profile, csr_pem: str):
+        crt_pem = None
+        error = None
+        try:
+            with SIGNING_QUEUE_DEPTH.labels(app="acme").track_inprogress():
+                crt_pem = await self.controller.ca_client.sign(profile.ca, csr_pem, profile.module_args)
+        except CaSigningException as e:
+            logger.warning(f"CA {profile.ca} failed to sign the certificate for order {order_id}: {e}")
+            error = ErrorEntity(type="serverInternal", title="Certificate issuance failed.", detail=str(e))
+        except Exception as e:
+            logger.exception(f"Unexpected error while issuing certificate for order {order_id}: {e}")
+            error = ErrorEntity(type="serverInternal", title="Certificate issuance failed.", detail=f"{e.__class__.__name__}: {e}")
+
+        await self.controller.database.record_order_certificate(order_id, crt_pem, error)
+
+    async def _order_response(self, request: AcmeRequest, order: OrderEntity, authz_entities: list[AuthzEntity], status_code: int = 200):
+        headers = {
+            "Content-Type": "application/json",
+            "Location": absolute_url(request, f"/order/{order.id}"),
+            "Replay-Nonce": await self.controller.nonce_manager.new_nonce(request.state.account.id),
+        }
+        if order.status == OrderStatus.PROCESSING:
+            headers["Retry-After"] = str(self.controller.config.ca.retry_after_seconds)
+
+        content = {
+            "status": order.status,
+            "expires": order.expires.isoformat(),
+            "notBefore": order.not_before,
+            "notAfter": order.not_after,
+            "identifiers": [{"type": authz.identifier_type, "value": authz.identifier_value} for authz in authz_entities],
+            "authorizations": [absolute_url(request, f"/authz/{authz.id}") for authz in authz_entities],
+            "finalize": absolute_url(request, f"/order/{order.id}/finalize"),
+            "certificate": absolute_url(request, f"/order/{order.id}/certificate") if order.status == OrderStatus.VALID else None
+        }
+        # Only order views load the error; any other order reaching here is not invalid.
+        if order.status == OrderStatus.INVALID and order.error:
+            content["error"] = {
+                "type": f"urn:ietf:params:acme:error:{order.error.type}",
+                "title": order.error.title,
+                "detail": order.error.detail,
             }
-        )
+
+        return AcmeJSONResponse(content=content, status_code=status_code, headers=headers)
 
     async def account_orders(self, request: AcmeRequest, account_kid: str):
         if account_kid != request.state.account.kid:
             raise ACMEProblemResponse(type="unauthorized", title="Account is not authorized.")
 
-        account_orders = self.controller.database.get_orders_by_account_kid(account_kid)
-        return JSONResponse(
-            content={
-                "orders": [absolute_url(request, f"/order/{order.id}") for order in account_orders]
-            },
-            status_code=200,
-            headers={
-                "Content-Type": "application/json",
-                "Replay-Nonce": await self.controller.nonce_manager.new_nonce(request.state.account.id),
-            }
-        )
+        return await orders_page(self.controller, request, f"/orders/{account_kid}")
 
     async def new_order(self, request: AcmeRequest):
         profile = self.controller.config.get_profile_by_name(request.state.jws_envelope.payload.profile)
 
-        errors = []
         client_ip = get_client_ip(request)
-        for identifier in request.state.jws_envelope.payload.identifiers:
-            err = await self._validate_client(profile, client_ip, identifier.value)
-            if err:
-                errors.append(err)
-                continue
+        client_hostnames = await self.controller.resolver.reverse(client_ip) if profile.has_domain_validations else []
+        results = await asyncio.gather(*(
+            self._validate_client(profile, client_ip, client_hostnames, identifier.value)
+            for identifier in request.state.jws_envelope.payload.identifiers
+        ))
+        errors = [err for err, _ in results if err]
 
         if errors:
             raise ACMEProblemResponse(
@@ -131,43 +194,94 @@ class OrderRouter:
                 subproblems=errors
             )
 
+        identifiers = list(dict.fromkeys(
+            (IdentifierType(identifier.type).value, identifier.value) for identifier in request.state.jws_envelope.payload.identifiers
+        ))
+        pre_validated = {
+            identifier.value
+            for identifier, (_, client_is_valid) in zip(request.state.jws_envelope.payload.identifiers, results)
+            if client_is_valid
+        }
+        # A client retrying new-order after a timeout gets the order its first attempt created.
+        identifiers_hash = identifier_set_hash(identifiers)
+        open_order = await self.controller.database.get_open_order(
+            request.state.account.id,
+            profile.name,
+            identifiers_hash,
+            request.state.jws_envelope.payload.notBefore,
+            request.state.jws_envelope.payload.notAfter,
+        )
+        if open_order:
+            open_order_authzs = await self.controller.database.get_authz_by_order_id(open_order.id)
+            return await self._order_response(request, open_order, open_order_authzs, status_code=201)
+
+        reusable_authzs = {}
+        if profile.authz_reuse_seconds:
+            reusable_authzs = await self.controller.database.get_reusable_authzs(
+                request.state.account.id,
+                identifiers,
+                datetime.now() - timedelta(seconds=profile.authz_reuse_seconds),
+            )
+
         order = OrderEntity(
             account=request.state.account,
             status="pending",
             profile_name=profile.name,
             not_before=request.state.jws_envelope.payload.notBefore,
-            not_after=request.state.jws_envelope.payload.notAfter
+            not_after=request.state.jws_envelope.payload.notAfter,
+            identifiers_hash=identifiers_hash,
         )
 
-        order = self.controller.database.save_to_db(order)
+        thumbprint = request.state.account.thumbprint
+        authz_entities = []
+        challenge_entities = []
+        for identifier_type, identifier_value in identifiers:
+            authz_entity = reusable_authzs.get((identifier_type, identifier_value))
+            if authz_entity:
+                authz_entities.append(authz_entity)
+                continue
 
-        authz_urls = []
-        for identifier in request.state.jws_envelope.payload.identifiers:
             authz_entity = AuthzEntity(
-                identifier_type=identifier.type,
-                identifier_value=identifier.value,
+                identifier_type=identifier_type,
+                identifier_value=identifier_value,
                 status=AuthzStatus.PENDING,
                 wildcard=False,
-                order=order,
+                account_id=request.state.account.id,
             )
-            authz_entity = self.controller.database.save_to_db(authz_entity)
-            authz_urls.append(absolute_url(request, f"/authz/{authz_entity.id}"))
+            authz_entities.append(authz_entity)
+
+            if profile.pre_validated_skip_challenges and identifier_value in pre_validated:
+                authz_entity.status = AuthzStatus.VALID
+                authz_entity.validation_skipped_reason = (
+                    f"pre_validated by profile '{profile.name}' for client {client_ip}"
+                    + (f" ({', '.join(client_hostnames)})" if client_hostnames else "")
+                )
+                logger.info(f"Skipping validation of {identifier_type} '{identifier_value}' for account {request.state.account.kid}: {authz_entity.validation_skipped_reason}")
+                continue
 
             for challenge_type in profile.supported_challenge_types:
                 token = secrets.token_urlsafe(32)
-                key_authorization = token + "." + request.state.account.jwk.thumbprint()
-                challenge = ChallengeEntity(
+                key_authorization = token + "." + thumbprint
+                challenge_entities.append(ChallengeEntity(
                     type=challenge_type,
                     status=ChallengeStatus.PENDING,
                     key_authorization=key_authorization,
                     authz=authz_entity,
-                )
-                self.controller.database.save_to_db(challenge)
+                ))
+
+        order.authzs = authz_entities
+        if all(authz_entity.status == AuthzStatus.VALID for authz_entity in authz_entities):
+            order.status = OrderStatus.READY
+
+        async with self.controller.database.unit_of_work() as session:
+            session.add_all([order, *authz_entities, *challenge_entities])
 
-        return JSONResponse(
+        authz_urls = [absolute_url(request, f"/authz/{authz_entity.id}") for authz_entity in authz_entities]
+
+        return AcmeJSONResponse(
             content={
                 "status": order.status,
-                "expires": order.expires,
+                "expires": order.expires.isoformat(),
                 "identifiers": [identifier.to_dict() for identifier in request.state.jws_envelope.payload.identifiers],
                 "authorizations": authz_urls,
                 "finalize": absolute_url(request, f"/order/{order.id}/finalize")
@@ -180,36 +294,63 @@ class OrderRouter:
             }
         )
 
-    async def _validate_client(self, profile: Profile, client_ip: str, domain: str) -> Optional[ACMEProblemResponse]:
+    @traced("OrderRouter._validate_client")
+    # Returns the identifier's problem, if any, and whether pre_validated matched the client.
+    async def _validate_client(self, profile: Profile, client_ip: str, client_hostnames: list[str], domain: str) -> tuple[Optional[ACMEProblemResponse], bool]:
         try:
-            domain_ips = set([x[4][0] for x in socket.getaddrinfo(domain, None)])
+            domain_ips = await self.controller.resolver.resolve(domain)
         except socket.gaierror as e:
             return ACMEProblemResponse(
                 type="dns",
                 title=f"Domain {domain} does not exist",
                 detail=str(e)
-            )
+            ), False
         except Exception as e:
             return ACMEProblemResponse(
                 type="serverInternal",
                 title=f"Unknown error occurred while validating domain",
                 detail=str(e)
-            )
+            ), False
 
         if len(domain_ips) == 0:
             return ACMEProblemResponse(
                 type="dns",
                 title=f"Domain exists but has no IPs",
-            )
+            ), False
 
-        pre_validated = profile.client_is_valid(client_ip, domain)
-        client_allowed = profile.client_is_allowed(client_ip, domain)
+        pre_validated = profile.client_is_valid(client_ip, domain, client_hostnames)
+        client_allowed = profile.client_is_allowed(client_ip, domain, client_hostnames)
 
         if not pre_validated and not client_allowed and client_ip not in domain_ips:
             return ACMEProblemResponse(
                 type="unauthorized",
                 title=f"Client IP '{client_ip}' has not authority over '{domain}'",
                 detail=f"Pre-validated: {pre_validated}, Client Allowed: {client_allowed}",
-            )
-
-        return None
+            ), False
+
+        return None, pre_validated
+
+
+async def orders_page(controller: VismACMEController, request: AcmeRequest, path: str):
+    page_size = controller.config.orders.page_size
+    rows = await controller.database.get_order_page_by_account_id(
+        request.state.account.id,
+        page_size + 1,
+        after=decode_cursor(request.query_params.get("cursor")),
+    )
+
+    headers = {
+        "Content-Type": "application/json",
+        "Replay-Nonce": await controller.nonce_manager.new_nonce(request.state.account.id),
+    }
+    link = next_link(request, path, rows, page_size)
+    if link:
+        headers["Link"] = link
+
+    return AcmeJSONResponse(
+        content={
+            "orders": [absolute_url(request, f"/order/{order_id}") for order_id, _ in rows[:page_size]]
+        },
+        status_code=200,
+        headers=headers
+    )
@@ -2,7 +2,7 @@ from typing import Any
 
 
 class ACMEProblemResponse(Exception):
-    def __init__(self, type: str, title: str, detail: str = None, subproblems: list['ACMEProblemResponse'] = None, status_code: int = 400):
+    def __init__(self, type: str, title: str, detail: str = None, subproblems: list['ACMEProblemResponse'] = None, status_code: int = 400, headers: dict[str, str] = None):
         self.error_json: dict[str, Any] = {
             "type": f"urn:ietf:params:acme:error:{type}",
             "title": title,
@@ -16,5 +16,6 @@ class ACMEProblemResponse(Exception):
                 self.error_json['subproblems'].append(problem.error_json)
 
         self.status_code: int = status_code
+        self.headers: dict[str, str] = headers or {}
         super().__init__(title)
 
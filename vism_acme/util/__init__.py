@@ -1,5 +1,5 @@
 import base64
-from fastapi import Request
+from starlette.requests import Request
 
 def absolute_url(request: Request, path: str) -> str:
     base = str(request.base_url).rstrip("/")
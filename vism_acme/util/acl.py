@@ -0,0 +1,112 @@
+import ipaddress
+from bisect import bisect_right
+from typing import Optional
+
+from vism.util import is_valid_subnet
+
+
+class NetworkSet:
+    def __init__(self, networks: list[str]):
+        intervals = {4: [], 6: []}
+        for network in networks:
+            if not is_valid_subnet(network):
+                continue
+            parsed = ipaddress.ip_network(network, strict=False)
+            intervals[parsed.version].append((int(parsed.network_address), int(parsed.broadcast_address)))
+
+        self.starts: dict[int, list[int]] = {}
+        self.ends: dict[int, list[int]] = {}
+        for version, version_intervals in intervals.items():
+            merged = []
+            for start, end in sorted(version_intervals):
+                if merged and start <= merged[-1][1] + 1:
+                    merged[-1][1] = max(merged[-1][1], end)
+                else:
+                    merged.append([start, end])
+            self.starts[version] = [start for start, _ in merged]
+            self.ends[version] = [end for _, end in merged]
+
+    def __contains__(self, ip: str) -> bool:
+        try:
+            address = ipaddress.ip_address(ip)
+        except ValueError:
+            return False
+
+        if address.version == 6 and address.ipv4_mapped:
+            address = address.ipv4_mapped
+
+        value = int(address)
+        index = bisect_right(self.starts[address.version], value) - 1
+        return index >= 0 and value <= self.ends[address.version][index]
+
+
+class ClientMatcher:
+    def __init__(self, clients: list[str]):
+        clients = clients or []
+        self.any_client = clients == ["*"]
+        self.names = {client.lower() for client in clients}
+        self.networks = NetworkSet(clients)
+
+    def matches(self, client_ip: str, client_hostnames: list[str]) -> bool:
+        if self.any_client or client_ip in self.names:
+            return True
+
+        if any(hostname.lower() in self.names for hostname in client_hostnames):
+            return True
+
+        return client_ip in self.networks
+
+
+class DomainTrieNode:
+    __slots__ = ("children", "exact", "suffix")
+
+    def __init__(self):
+        self.children: dict[str, DomainTrieNode] = {}
+        self.exact: Optional[ClientMatcher] = None
+        self.suffix: Optional[ClientMatcher] = None
+
+
+class DomainValidationIndex:
+    def __init__(self, domain_validations: list = None):
+        self.root = DomainTrieNode()
+        for domain_validation in domain_validations or []:
+            self.add(domain_validation.domain, domain_validation.clients)
+
+    # Domains are exact ("example.com") or suffix matches ("*.example.com", any name below
+    # example.com). An exact entry wins over a suffix entry, a longer suffix over a shorter one.
+    def add(self, domain: str, clients: list[str]):
+        domain = domain.lower().rstrip(".")
+        suffix = domain.startswith("*.")
+        if suffix:
+            domain = domain[2:]
+
+        node = self.root
+        for label in reversed(domain.split(".")):
+            node = node.children.setdefault(label, DomainTrieNode())
+
+        if suffix and node.suffix is None:
+            node.suffix = ClientMatcher(clients)
+        if not suffix and node.exact is None:
+            node.exact = ClientMatcher(clients)
+
+    def match(self, domain: str) -> Optional[ClientMatcher]:
+        labels = domain.lower().rstrip(".").split(".")
+
+        node = self.root
+        best_suffix = None
+        for position, label in enumerate(reversed(labels)):
+            node = node.children.get(label)
+            if node is None:
+                return best_suffix
+
+            if node.suffix is not None and position < len(labels) - 1:
+                best_suffix = node.suffix
+
+        return node.exact or best_suffix
+
+    def client_matches(self, domain: str, client_ip: str, client_hostnames: list[str]) -> bool:
+        matcher = self.match(domain)
+        if matcher is None:
+            return False
+
+        return matcher.matches(client_ip, client_hostnames)
@@ -0,0 +1,42 @@
+import logging
+
+import httpx
+
+from vism.tracing import inject_context, span
+from vism_acme.config import Ca
+from vism_acme.errors import CaSigningException
+
+logger = logging.getLogger(__name__)
+
+
+class CaClient:
+    def __init__(self, config: Ca):
+        self.config = config
+        self.client = httpx.AsyncClient(
+            base_url=self.config.url,
+            timeout=httpx.Timeout(self.config.timeout_seconds),
+            limits=httpx.Limits(
+                max_connections=self.config.max_connections,
+                max_keepalive_connections=self.config.max_connections,
+            ),
+            trust_env=False,
+        )
+
+    async def sign(self, ca_name: str, csr_pem: str, module_args: dict = None) -> str:
+        with span("CaClient.sign", kind="client", **{"vism.ca": ca_name}):
+            try:
+                response = await self.client.post(
+                    f"/certificates/{ca_name}/sign",
+                    json={"csr_pem": csr_pem, "module_args": module_args},
+                    headers=inject_context({}),
+                )
+            except httpx.HTTPError as e:
+                raise CaSigningException(f"Failed to reach CA API for '{ca_name}': {e.__class__.__name__}: {e}")
+
+        if response.status_code != 201:
+            raise CaSigningException(f"CA '{ca_name}' failed to sign csr: {response.status_code} {response.text}")
+
+        return response.json()["chain_pem"]
+
+    async def close(self):
+        await self.client.aclose()
@@ -0,0 +1,29 @@
+import base64
+import json
+from typing import Any
+
+from starlette.responses import JSONResponse
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def json_loads(data: bytes | str) -> Any:
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+def json_dumps(content: Any) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(content)
+    return json.dumps(content, ensure_ascii=False, allow_nan=False, separators=(",", ":")).encode("utf-8")
+
+def b64u_decode_json(data: str) -> Any:
+    return json_loads(base64.urlsafe_b64decode(data + "=" * (-len(data) % 4)))
+
+
+class AcmeJSONResponse(JSONResponse):
+    def render(self, content: Any) -> bytes:
+        return json_dumps(content)
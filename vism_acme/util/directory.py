@@ -0,0 +1,49 @@
+import hashlib
+from dataclasses import dataclass
+
+from cachetools import LRUCache
+
+from vism_acme.config import AcmeConfig
+from vism_acme.util.codec import json_dumps
+
+
+@dataclass
+class DirectoryDocument:
+    body: bytes
+    etag: str
+
+
+class DirectoryCache:
+    # The base URL comes from the Host header, so the number of cached variants is bounded.
+    max_base_urls = 64
+
+    # Built once from the startup config; profile and directory changes take effect on restart.
+    def __init__(self, config: AcmeConfig):
+        self.config = config
+        self.cache_control = f"public, max-age={config.directory.cache_max_age_seconds}"
+        self.profiles = {
+            profile.name: profile.to_dict(config.directory.include_domain_validations)
+            for profile in config.profiles
+        }
+        self.documents: LRUCache = LRUCache(maxsize=self.max_base_urls)
+
+    def get(self, base_url: str) -> DirectoryDocument:
+        document = self.documents.get(base_url)
+        if document is None:
+            document = self.build(base_url)
+            self.documents[base_url] = document
+
+        return document
+
+    def build(self, base_url: str) -> DirectoryDocument:
+        body = json_dumps({
+            "newNonce": f"{base_url}/new-nonce",
+            "newAccount": f"{base_url}/new-account",
+            "newOrder": f"{base_url}/new-order",
+            "revokeCert": f"{base_url}/revoke-cert",
+            "keyChange": None,
+            "meta": {
+                "profiles": self.profiles
+            }
+        })
+        return DirectoryDocument(body=body, etag=f'"{hashlib.sha256(body).hexdigest()[:32]}"')
@@ -0,0 +1,95 @@
+import asyncio
+import logging
+import socket
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Any, Callable, Optional
+
+from cachetools import TLRUCache
+
+from vism.metrics import DNS_LOOKUP_DURATION
+from vism_acme.config import Dns
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class CacheEntry:
+    ttl: float
+    value: Any = None
+    error: Optional[socket.error] = None
+
+
+class DnsResolver:
+    def __init__(self, config: Dns):
+        self.config = config
+        self.executor = ThreadPoolExecutor(max_workers=config.max_workers, thread_name_prefix="vism-dns")
+        self.cache = TLRUCache(maxsize=config.max_entries, ttu=lambda key, entry, now: now + entry.ttl)
+        self.in_flight: dict[tuple[str, str], asyncio.Future] = {}
+
+    async def resolve(self, domain: str) -> set[str]:
+        return await self._lookup("forward", domain, self._getaddrinfo)
+
+    async def reverse(self, ip: str) -> list[str]:
+        try:
+            return await self._lookup("reverse", ip, self._gethostbyaddr)
+        except socket.error:
+            return []
+
+    async def _lookup(self, kind: str, name: str, query: Callable[[str], Any]):
+        key = (kind, name)
+        start = time.perf_counter()
+
+        entry = self.cache.get(key)
+        cache_hit = entry is not None
+        try:
+            if not cache_hit:
+                future = self.in_flight.get(key)
+                if future is None:
+                    future = asyncio.ensure_future(self._query(key, query, name))
+                    self.in_flight[key] = future
+                    future.add_done_callback(lambda _: self.in_flight.pop(key, None))
+                entry = await asyncio.shield(future)
+        except Exception:
+            self._observe(kind, cache_hit, "error", time.perf_counter() - start)
+            raise
+
+        elapsed = time.perf_counter() - start
+        self._observe(kind, cache_hit, "error" if entry.error is not None else "ok", elapsed)
+        logger.debug(f"DNS {kind} lookup for {name} took {elapsed * 1000:.2f}ms (cache {'hit' if cache_hit else 'miss'})")
+
+        if entry.error is not None:
+            raise entry.error.__class__(*entry.error.args)
+
+        return entry.value
+
+    @staticmethod
+    def _observe(kind: str, cache_hit: bool, outcome: str, seconds: float):
+        DNS_LOOKUP_DURATION.labels(kind=kind, cache="hit" if cache_hit else "miss", outcome=outcome).observe(seconds)
+
+    async def _query(self, key: tuple[str, str], query: Callable[[str], Any], name: str) -> CacheEntry:
+        loop = asyncio.get_running_loop()
+        try:
+            value = await asyncio.wait_for(
+                loop.run_in_executor(self.executor, query, name),
+                timeout=self.config.timeout_seconds
+            )
+            entry = CacheEntry(ttl=self.config.positive_ttl_seconds, value=value)
+        except (socket.gaierror, socket.herror) as e:
+            entry = CacheEntry(ttl=self.config.negative_ttl_seconds, error=e)
+
+        self.cache[key] = entry
+        return entry
+
+    @staticmethod
+    def _getaddrinfo(domain: str) -> set[str]:
+        return set([x[4][0] for x in socket.getaddrinfo(domain, None)])
+
+    @staticmethod
+    def _gethostbyaddr(ip: str) -> list[str]:
+        hostname, aliases, _ = socket.gethostbyaddr(ip)
+        return [hostname] + aliases
+
+    def close(self):
+        self.executor.shutdown(wait=False, cancel_futures=True)
@@ -1,6 +1,8 @@
 import secrets
 import asyncio
 from cachetools import TTLCache
+
+from vism.metrics import NONCE_LOOKUPS, NONCE_STORE_SIZE
 from vism_acme.config import AcmeConfig
 
 
@@ -16,13 +18,17 @@ class NonceManager:
             account_id = -1
         async with self.lock:
             self.nonces[nonce] = account_id
+            NONCE_STORE_SIZE.set(len(self.nonces))
 
         return nonce
 
     async def pop_nonce(self, nonce: str, account_id: int = None) -> bool:
         async with self.lock:
             nonce_account = self.nonces.pop(nonce, None)
+            NONCE_STORE_SIZE.set(len(self.nonces))
             if nonce_account is None or (nonce_account != account_id and nonce_account != -1):
+                NONCE_LOOKUPS.labels(result="miss").inc()
                 return False
 
+            NONCE_LOOKUPS.labels(result="hit").inc()
             return True
\ No newline at end of file
@@ -0,0 +1,34 @@
+import base64
+from datetime import datetime
+from typing import Optional
+from uuid import UUID
+
+from fastapi import Request
+
+from vism_acme.schema.response import ACMEProblemResponse
+from vism_acme.util import absolute_url, fix_base64_padding
+
+
+def encode_cursor(created_at: datetime, order_id: UUID) -> str:
+    raw = f"{created_at.isoformat()}|{order_id}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: Optional[str]) -> Optional[tuple[datetime, UUID]]:
+    if not cursor:
+        return None
+
+    try:
+        created_at, order_id = base64.urlsafe_b64decode(fix_base64_padding(cursor)).decode().split("|")
+        return datetime.fromisoformat(created_at), UUID(order_id)
+    except ValueError:
+        raise ACMEProblemResponse(type="malformed", title="Invalid orders cursor.")
+
+
+def next_link(request: Request, path: str, rows: list[tuple[UUID, datetime]], page_size: int) -> Optional[str]:
+    # One row more than the page size is fetched only to learn whether another page exists.
+    if len(rows) <= page_size:
+        return None
+
+    order_id, created_at = rows[page_size - 1]
+    return f'<{absolute_url(request, path)}?cursor={encode_cursor(created_at, order_id)}>;rel="next"'
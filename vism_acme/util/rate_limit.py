@@ -0,0 +1,88 @@
+import logging
+import math
+import time
+from datetime import datetime
+from typing import Optional
+
+from cachetools import LRUCache
+
+from vism_acme.config import RateLimit, RateLimits
+from vism_acme.db import AsyncVismDatabase
+from vism_acme.schema.response import ACMEProblemResponse
+
+logger = logging.getLogger(__name__)
+
+
+# Per-process buckets; with several workers each one enforces the limits on its own.
+class MemoryBucketStore:
+    def __init__(self, max_keys: int):
+        self.buckets: LRUCache = LRUCache(maxsize=max_keys)
+
+    async def take(self, key: str, limit: RateLimit) -> float:
+        now = time.monotonic()
+        tokens, updated_at = self.buckets.get(key, (limit.requests, now))
+        tokens = min(limit.requests, tokens + (now - updated_at) * limit.rate)
+        if tokens >= 1:
+            self.buckets[key] = (tokens - 1, now)
+            return 0
+
+        self.buckets[key] = (tokens, now)
+        return (1 - tokens) / limit.rate
+
+    async def purge(self, before: float, batch_size: int) -> int:
+        return 0
+
+
+class DatabaseBucketStore:
+    def __init__(self, database: AsyncVismDatabase):
+        self.database = database
+
+    async def take(self, key: str, limit: RateLimit) -> float:
+        return await self.database.take_rate_limit_token(key, limit.requests, limit.rate, time.time())
+
+    async def purge(self, before: float, batch_size: int) -> int:
+        return await self.database.purge_rate_limit_buckets(before, batch_size)
+
+
+class RateLimiter:
+    def __init__(self, config: RateLimits, database: AsyncVismDatabase):
+        self.config = config
+        if config.backend == "postgres":
+            self.store = DatabaseBucketStore(database)
+        else:
+            self.store = MemoryBucketStore(config.max_keys)
+
+    async def check(self, client_ip: str = None, account_id=None, identifiers: list[tuple[str, str]] = None):
+        if not self.config.enabled:
+            return
+
+        if client_ip and self.config.ip:
+            await self._take(f"ip:{client_ip}", self.config.ip, f"client {client_ip}")
+
+        if account_id and self.config.account:
+            await self._take(f"account:{account_id}", self.config.account, f"account {account_id}")
+
+        if identifiers and self.config.identifier:
+            for identifier_type, identifier_value in identifiers:
+                await self._take(f"identifier:{identifier_type}:{identifier_value}", self.config.identifier, f"{identifier_type} identifier '{identifier_value}'")
+
+    # A bucket idle for longer than the longest period has refilled completely, so dropping it changes nothing.
+    async def purge_idle(self, now: datetime, batch_size: int) -> int:
+        if not self.config.enabled:
+            return 0
+
+        return await self.store.purge(now.timestamp() - self.config.longest_period_seconds, batch_size)
+
+    async def _take(self, key: str, limit: RateLimit, subject: str):
+        retry_after = await self.store.take(key, limit)
+        if not retry_after:
+            return
+
+        logger.info(f"Rate limited {subject}, retry after {retry_after:.1f}s")
+        raise ACMEProblemResponse(
+            type="rateLimited",
+            title=f"Too many requests for {subject}.",
+            detail=f"Limit is {limit.requests} requests per {limit.period_seconds:g} seconds.",
+            status_code=429,
+            headers={"Retry-After": str(math.ceil(retry_after))},
+        )
@@ -0,0 +1,73 @@
+import asyncio
+import logging
+from datetime import datetime, timedelta
+
+from vism_acme.config import Sweeper
+from vism_acme.db import AsyncVismDatabase
+from vism_acme.util.rate_limit import RateLimiter
+
+logger = logging.getLogger(__name__)
+
+
+class ExpirySweeper:
+    def __init__(self, config: Sweeper, database: AsyncVismDatabase, rate_limiter: RateLimiter = None):
+        self.config = config
+        self.database = database
+        self.rate_limiter = rate_limiter
+        self.task: asyncio.Task = None
+
+    def start(self):
+        if self.config.enabled and self.task is None:
+            self.task = asyncio.create_task(self.run())
+
+    async def stop(self):
+        if self.task is None:
+            return
+
+        self.task.cancel()
+        try:
+            await self.task
+        except asyncio.CancelledError:
+            pass
+        self.task = None
+
+    async def run(self):
+        while True:
+            try:
+                await self.sweep()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Expiry sweep failed: {e.__class__.__name__}: {e}")
+
+            await asyncio.sleep(self.config.interval_seconds)
+
+    async def sweep(self) -> dict[str, int]:
+        now = datetime.now()
+        counts = {
+            "orders_expired": await self._drain(self.database.expire_orders, now),
+            "authzs_expired": await self._drain(self.database.expire_authzs, now),
+            "orders_failed": await self._drain(self.database.fail_stale_processing_orders, now - timedelta(seconds=self.config.processing_timeout_seconds)),
+            "orders_purged": 0,
+            "rate_limit_buckets_purged": 0,
+        }
+
+        if self.config.retention_days > 0:
+            counts["orders_purged"] = await self._drain(self.database.purge_orders, now - timedelta(days=self.config.retention_days))
+
+        if self.rate_limiter:
+            counts["rate_limit_buckets_purged"] = await self._drain(self.rate_limiter.purge_idle, now)
+
+        if any(counts.values()):
+            logger.info(f"Expiry sweep: {', '.join(f'{key}={value}' for key, value in counts.items())}")
+
+        return counts
+
+    # Each batch is its own transaction, so a large backlog never holds locks for long.
+    async def _drain(self, step, cutoff: datetime) -> int:
+        total = 0
+        while True:
+            count = await step(cutoff, self.config.batch_size)
+            total += count
+            if count < self.config.batch_size:
+                return total
@@ -1,16 +1,78 @@
-import time
+import asyncio
 import logging
-import requests
-from requests import ReadTimeout
-from requests.adapters import HTTPAdapter, Retry
-from requests.exceptions import RequestException, TooManyRedirects, ChunkedEncodingError, ContentDecodingError, \
-    RetryError, SSLError, ProxyError, ConnectTimeout, ConnectionError, Timeout
-from urllib3.exceptions import MaxRetryError, NewConnectionError
+import time
+from contextlib import asynccontextmanager
+
+from typing import Optional
+
+import httpx
+
+from vism.metrics import HTTP01_VALIDATION_DURATION
+from vism.tracing import span
+from vism_acme.controller import VismACMEController
+from vism_acme.config import Http01
+from vism_acme.db import ChallengeEntity
+from vism_acme.db.authz import ErrorEntity
+
+logger = logging.getLogger(__name__)
+
+RETRY_STATUS_CODES = [500, 502, 503, 504, 404, 400]
+
+
+class Http01Client:
+    def __init__(self, config: Http01):
+        self.config = config
+        self.semaphore = asyncio.Semaphore(config.max_concurrency)
+        self.host_semaphores: dict[str, asyncio.Semaphore] = {}
+        self.host_users: dict[str, int] = {}
+        self.client = httpx.AsyncClient(
+            timeout=httpx.Timeout(
+                self.config.timeout_seconds,
+                connect=self.config.connect_timeout_seconds,
+                read=self.config.read_timeout_seconds,
+            ),
+            limits=httpx.Limits(
+                max_connections=self.config.max_concurrency,
+                max_keepalive_connections=0,
+            ),
+            follow_redirects=self.config.follow_redirect,
+            max_redirects=self.config.max_redirects,
+            trust_env=False,
+        )
+
+    async def get(self, host: str, url: str) -> httpx.Response:
+        async with self._host_slot(host), self.semaphore:
+            return await self._get_with_retries(url)
 
-from vism_acme import VismACMEController
-from vism_acme.db import AuthzEntity, ChallengeEntity
-from vism_acme.db.authz import AuthzStatus, ChallengeStatus, ErrorEntity
-from vism_acme.db.order import OrderStatus
+    @asynccontextmanager
+    async def _host_slot(self, host: str):
+        semaphore = self.host_semaphores.setdefault(host, asyncio.Semaphore(self.config.max_concurrency_per_host))
+        self.host_users[host] = self.host_users.get(host, 0) + 1
+        try:
+            async with semaphore:
+                yield
+        finally:
+            self.host_users[host] -= 1
+            if self.host_users[host] == 0:
+                del self.host_users[host]
+                del self.host_semaphores[host]
+
+    async def _get_with_retries(self, url: str) -> httpx.Response:
+        attempt = 0
+        while True:
+            try:
+                response = await self.client.get(url)
+                if response.status_code not in RETRY_STATUS_CODES or attempt >= self.config.retries:
+                    return response
+            except (httpx.TransportError, httpx.TooManyRedirects):
+                if attempt >= self.config.retries:
+                    raise
+
+            await asyncio.sleep(self.config.retry_delay_seconds * (2 ** attempt))
+            attempt += 1
+
+    async def close(self):
+        await self.client.aclose()
 
 
 class Http01Validator:
@@ -18,85 +80,55 @@ class Http01Validator:
         self.controller = controller
         self.challenge = challenge
 
-    async def get_session(self):
-        retries_count = self.controller.config.http01.retries
-        retry_delay_seconds = self.controller.config.http01.retry_delay_seconds
-
-        session = requests.Session()
-        retries = Retry(
-            total=retries_count,
-            backoff_factor=retry_delay_seconds,
-            status_forcelist=[500, 502, 503, 504, 404, 400],
-            allowed_methods=["GET"],
-            raise_on_status=False,
-        )
-        adapter = HTTPAdapter(max_retries=retries)
-        session.mount("http://", adapter)
-        session.mount("https://", adapter)
-        return session
-
     async def validate(self):
+        with span("Http01Validator.validate", **{"acme.identifier": self.challenge.authz.identifier_value}):
+            error = await self.check()
+            await self.controller.database.record_challenge_result(self.challenge.id, error)
+
+    async def check(self) -> Optional[ErrorEntity]:
+        start = time.perf_counter()
+        with span("Http01Validator.check"):
+            error = await self._check()
+        HTTP01_VALIDATION_DURATION.labels(outcome=error.type if error else "valid").observe(time.perf_counter() - start)
+        return error
+
+    async def _check(self) -> Optional[ErrorEntity]:
+        host = self.challenge.authz.identifier_value
         token = self.challenge.key_authorization.split(".")[0]
-        validation_url = f"http://{self.challenge.authz.identifier_value}:{self.controller.config.http01.port}/.well-known/acme-challenge/{token}"
-        timeout_seconds = self.controller.config.http01.timeout_seconds
+        validation_url = f"http://{host}:{self.controller.config.http01.port}/.well-known/acme-challenge/{token}"
 
         error = None
         error_detail = None
-        with await self.get_session() as session:
-            self.challenge.status = ChallengeStatus.PROCESSING
-            self.challenge: ChallengeEntity = self.controller.database.save_to_db(self.challenge)
-
-            try:
-                response = session.get(validation_url, timeout=timeout_seconds)
-                if response.status_code != 200 or response.text.strip() != self.challenge.key_authorization:
-                    error = "incorrectResponse"
-                    error_detail = f"Invalid response from {validation_url}: {response.status_code} {response.text}"
-                elif response.status_code == 200 and response.text.strip() == self.challenge.key_authorization:
-                    self.challenge.status = ChallengeStatus.VALID
-                    self.challenge.authz.status = AuthzStatus.VALID
-                    self.challenge = self.controller.database.save_to_db(self.challenge)
-                    self.challenge.authz = self.controller.database.save_to_db(self.challenge.authz)
-                else:
-                    error = "this should never happen"
-                    error_detail = f"Unknown error when trying to validate challenge: {response.status_code} {response.text}"
-            except (ConnectionError, NewConnectionError) as e:
-                error = "connection"
-                error_detail = f"Failed to connect to {validation_url}: {e.args[0].reason._message}"
-            except (Timeout, ConnectTimeout, ReadTimeout) as e:
-                error = "connection"
-                error_detail = f"Timed out waiting for response, this is most likely due to a firewall blocking the request."
-            except TooManyRedirects as e:
-                error = "connection"
-                error_detail = f"Too many redirects when trying to validate challenge."
-            except (ChunkedEncodingError, ContentDecodingError) as e:
+        try:
+            response = await self.controller.http01_client.get(host, validation_url)
+            if response.is_redirect:
+                error = "incorrectResponse"
+                error_detail = f"Redirects are not followed when validating challenges: {response.status_code} from {validation_url}"
+            elif response.status_code != 200 or response.text.strip() != self.challenge.key_authorization:
                 error = "incorrectResponse"
-                error_detail = f"Failed to decode response from {validation_url}: {e.args[0].reason._message}"
-            except RetryError as e:
-                error = "connection"
-                error_detail = f"Max retries exceeded when trying to validate challenge."
-            except SSLError as e:
-                error = "connection"
-                error_detail = f"SSL error when trying to validate challenge: {e.args[0].reason._message}"
-            except ProxyError as e:
-                error = "connection"
-                error_detail = f"Proxy error when trying to validate challenge: {e.args[0].reason._message}"
-            except MaxRetryError as e:
-                error = "connection"
-                error_detail = f"Max retries exceeded when trying to validate challenge."
-            except (RequestException, Exception) as e:
-                error = "connection"
-                error_detail = f"Unknown error when trying to validate challenge: {e.__class__.__name__}: {e}"
-
-        if error:
-            self.challenge.status = ChallengeStatus.INVALID
-            self.challenge.authz.status = AuthzStatus.INVALID
-            self.challenge.authz.order.status = OrderStatus.INVALID
-
-            error_entity = ErrorEntity(type=error, detail=error_detail, title="Failed to validate challenge.")
-            self.controller.database.save_to_db(error_entity)
-
-            self.challenge = self.controller.database.save_to_db(self.challenge)
-            self.challenge.authz.error = error_entity
-            self.challenge.authz = self.controller.database.save_to_db(self.challenge.authz)
-            self.challenge.authz.order = self.controller.database.save_to_db(self.challenge.authz.order)
+                error_detail = f"Invalid response from {validation_url}: {response.status_code} {response.text}"
+            elif response.status_code == 200 and response.text.strip() == self.challenge.key_authorization:
+                return None
+            else:
+                error = "this should never happen"
+                error_detail = f"Unknown error when trying to validate challenge: {response.status_code} {response.text}"
+        except httpx.TimeoutException as e:
+            error = "connection"
+            error_detail = f"Timed out waiting for response, this is most likely due to a firewall blocking the request."
+        except httpx.ProxyError as e:
+            error = "connection"
+            error_detail = f"Proxy error when trying to validate challenge: {e}"
+        except httpx.ConnectError as e:
+            error = "connection"
+            error_detail = f"Failed to connect to {validation_url}: {e}"
+        except httpx.TooManyRedirects as e:
+            error = "connection"
+            error_detail = f"Too many redirects when trying to validate challenge."
+        except (httpx.DecodingError, httpx.RemoteProtocolError) as e:
+            error = "incorrectResponse"
+            error_detail = f"Failed to decode response from {validation_url}: {e}"
+        except Exception as e:
+            error = "connection"
+            error_detail = f"Unknown error when trying to validate challenge: {e.__class__.__name__}: {e}"
 
+        return ErrorEntity(type=error, detail=error_detail, title="Failed to validate challenge.")
@@ -0,0 +1,80 @@
+import asyncio
+import logging
+import signal
+from datetime import datetime, timedelta
+
+from vism.tracing import traced
+from vism_acme.controller import VismACMEController
+from vism_acme.db import ValidationJobEntity
+from vism_acme.db.authz import ChallengeStatus
+from vism_acme.validators.http_01 import Http01Validator
+
+logger = logging.getLogger(__name__)
+
+
+class ValidationWorker:
+    def __init__(self, controller: VismACMEController):
+        self.controller = controller
+        self.config = controller.config.validation_queue
+        self.stop_event = asyncio.Event()
+
+    async def run(self):
+        loop = asyncio.get_running_loop()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            loop.add_signal_handler(sig, self.stop_event.set)
+
+        if self.controller.config.database.migrate_on_startup:
+            await self.controller.database.migrate()
+        logger.info("Validation worker started.")
+
+        try:
+            while not self.stop_event.is_set():
+                try:
+                    jobs = await self.controller.database.claim_validation_jobs(self.config.batch_size, self.config.lease_seconds)
+                except Exception as e:
+                    logger.exception(f"Failed to claim validation jobs: {e}")
+                    jobs = []
+
+                if jobs:
+                    await asyncio.gather(*(self.process_safely(job) for job in jobs))
+                    continue
+
+                try:
+                    await asyncio.wait_for(self.stop_event.wait(), timeout=self.config.poll_interval_seconds)
+                except asyncio.TimeoutError:
+                    pass
+        finally:
+            logger.info("Validation worker stopping.")
+            await self.controller.http01_client.close()
+            await self.controller.database.close()
+
+    # One failing job must not take the worker, or the other jobs it claimed, down with it.
+    async def process_safely(self, job: ValidationJobEntity):
+        try:
+            await self.process(job)
+        except Exception as e:
+            delay = self._retry_delay(job)
+            logger.exception(f"Validation job {job.id} failed, retrying in {delay} seconds: {e}")
+            try:
+                await self.controller.database.retry_validation_job(job.id, datetime.now() + timedelta(seconds=delay), f"{e.__class__.__name__}: {e}")
+            except Exception as retry_error:
+                logger.error(f"Failed to requeue validation job {job.id}, it is claimed again once its lease expires: {retry_error}")
+
+    def _retry_delay(self, job: ValidationJobEntity) -> float:
+        return min(self.config.retry_backoff_seconds * 2 ** (job.attempts - 1), self.config.max_backoff_seconds)
+
+    @traced("ValidationWorker.process")
+    async def process(self, job: ValidationJobEntity):
+        challenge = await self.controller.database.get_challenge_by_id(job.challenge_id)
+        if not challenge or challenge.status != ChallengeStatus.PROCESSING:
+            await self.controller.database.finish_validation_job(job.id)
+            return
+
+        error = await Http01Validator(self.controller, challenge).check()
+        if error and error.type == "connection" and job.attempts < self.config.max_attempts:
+            delay = self._retry_delay(job)
+            logger.info(f"Validation of challenge {challenge.id} failed, retrying in {delay} seconds: {error.detail}")
+            await self.controller.database.retry_validation_job(job.id, datetime.now() + timedelta(seconds=delay), error.detail)
+            return
+
+        await self.controller.database.finish_validation_job(job.id, challenge.id, error)
@@ -1,7 +1,11 @@
 import os
+from contextlib import asynccontextmanager
+from typing import Optional
 
 from fastapi import FastAPI
 
+from vism.metrics import instrument_engine, setup_metrics
+from vism.tracing import setup_tracing, setup_tracing_middleware
 from vism_ca.api.routers import CertificateRouter
 from vism_ca.ca import VismCA
 from vism_ca.config import APIConfig
@@ -11,18 +15,38 @@ class VismCAApi:
     def __init__(self):
         config_file_path = os.environ.get('CONFIG_FILE_PATH', './config.yaml')
         self.config = APIConfig(config_file_path)
+        setup_tracing(self.config.tracing)
 
-        self.ca = VismCA()
-        self.api = FastAPI()
+        self.ca: Optional[VismCA] = None
+        self.api = FastAPI(lifespan=self.lifespan)
+        self.setup_metrics()
+        self.setup_tracing_middleware()
         self.setup_routes()
 
+    @asynccontextmanager
+    async def lifespan(self, api: FastAPI):
+        self.ca = VismCA()
+        if self.config.metrics.enabled:
+            instrument_engine(self.ca.database.engine, "ca")
+        yield
+
+    def setup_metrics(self):
+        if self.config.metrics.enabled:
+            setup_metrics(self.api, "ca")
+
+    def setup_tracing_middleware(self):
+        if self.config.tracing.enabled:
+            setup_tracing_middleware(self.api)
+
     def setup_routes(self):
-        cert_router = CertificateRouter(self.ca)
+        cert_router = CertificateRouter(self)
         self.api.include_router(
             cert_router.router,
             prefix="/certificates",
             tags=["certificates"]
         )
 
-vism_ca_api = VismCAApi()
-app = vism_ca_api.api
\ No newline at end of file
+def create_app() -> FastAPI:
+    vism_ca_api = VismCAApi()
+    vism_ca_api.api.state.vism_ca_api = vism_ca_api
+    return vism_ca_api.api
@@ -2,11 +2,13 @@ import logging
 import traceback
 
 from fastapi import APIRouter
+from starlette.concurrency import run_in_threadpool
 from starlette.responses import JSONResponse
 
-from vism_ca.api.schema.requests import CreateCertificatesRequest
+from vism.metrics import SIGNING_QUEUE_DEPTH
+from vism_ca.api.schema.requests import CreateCertificatesRequest, SignCSRRequest
 from vism_ca.api.schema.responses import CertificateResponse, CreatedCertificatesResponse, ErrorResponse, \
-    CertificateStatusResponse, CertificateStatusesResponse
+    CertificateStatusResponse, CertificateStatusesResponse, SignedCertificateResponse
 from vism_ca.ca import VismCA
 from vism_ca.ca.crypto.certificate import Certificate
 from vism_ca.errors import CertConfigNotFound, GenCertException
@@ -14,13 +16,52 @@ from vism_ca.errors import CertConfigNotFound, GenCertException
 logger = logging.getLogger(__name__)
 
 class CertificateRouter:
-    def __init__(self, ca: VismCA):
-        self.ca = ca
+    def __init__(self, ca_api):
+        self.ca_api = ca_api
         self.router = APIRouter()
 
         self.router.get("/status")(self.cert_status)
         self.router.post("/create")(self.create_certificates)
         self.router.get("/{certificate_name}")(self.get_certificate)
+        self.router.post("/{certificate_name}/sign")(self.sign_csr)
+
+    @property
+    def ca(self) -> VismCA:
+        return self.ca_api.ca
+
+    # Requests waiting for a threadpool slot count towards the queue depth as well as the one being signed.
+    async def sign_csr(self, certificate_name: str, data: SignCSRRequest):
+        with SIGNING_QUEUE_DEPTH.labels(app="ca").track_inprogress():
+            return await run_in_threadpool(self._sign_csr, certificate_name, data)
+
+    def _sign_csr(self, certificate_name: str, data: SignCSRRequest):
+        logger.debug(f"Received request to sign csr with '{certificate_name}'")
+
+        try:
+            signed = Certificate(self.ca, certificate_name).sign_csr(data.csr_pem, data.module_args)
+        except CertConfigNotFound as e:
+            error_response = ErrorResponse(err=e.__class__.__name__, detail=str(e))
+            return JSONResponse(
+                status_code=404,
+                content=error_response.model_dump(),
+                headers={
+                    "Content-Type": "application/json",
+                }
+            )
+        except Exception as e:
+            error_response = ErrorResponse(err=e.__class__.__name__, detail=str(e), traceback=traceback.format_exc())
+            return JSONResponse(
+                status_code=500,
+                content=error_response.model_dump(),
+            )
+
+        return JSONResponse(
+            status_code=201,
+            content=SignedCertificateResponse(crt_pem=signed.crt_pem, chain_pem=signed.chain_pem).model_dump(),
+            headers={
+                "Content-Type": "application/json",
+            }
+        )
 
     def get_certificate(self, certificate_name: str):
         cert_entity = self.ca.database.get_cert_by_name(name=certificate_name)
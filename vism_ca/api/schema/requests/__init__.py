@@ -2,3 +2,7 @@ from pydantic import BaseModel
 
 class CreateCertificatesRequest(BaseModel):
     certificate_names: list[str]
+
+class SignCSRRequest(BaseModel):
+    csr_pem: str
+    module_args: dict = None
@@ -18,4 +18,8 @@ class CertificateStatusResponse(BaseModel):
     status: str
 
 class CertificateStatusesResponse(BaseModel):
-    statuses: list[CertificateStatusResponse]
\ No newline at end of file
+    statuses: list[CertificateStatusResponse]
+
+class SignedCertificateResponse(BaseModel):
+    crt_pem: str
+    chain_pem: str
@@ -0,0 +1,237 @@
+import argparse
+import copy
+import functools
+import inspect
+import secrets
+import statistics
+import time
+from collections import Counter, defaultdict
+from contextlib import contextmanager
+from typing import Optional
+
+from cryptography import x509
+from cryptography.hazmat.primitives import hashes, serialization
+from cryptography.hazmat.primitives.asymmetric import ec, ed25519, rsa
+from cryptography.x509.oid import NameOID
+
+import vism.util
+from modules.openssl.db import OpenSSLData
+from modules.openssl.openssl import OpenSSL
+from vism_ca.ca import VismCA
+from vism_ca.ca.crypto.certificate import Certificate
+from vism_ca.ca.crypto.chroot import Chroot
+from vism_ca.ca.db import CertificateEntity, VismDatabase
+from vism_ca.config import CertificateConfig
+
+KEY_TYPES = {
+    "rsa2048": {"algorithm": "RSA", "bits": 2048},
+    "rsa4096": {"algorithm": "RSA", "bits": 4096},
+    "p256": {"algorithm": "EC", "curve": "P-256"},
+    "p384": {"algorithm": "EC", "curve": "P-384"},
+    "ed25519": {"algorithm": "ED25519"},
+}
+
+PHASES = ["chroot", "template", "subprocess", "kdf", "db read", "db save"]
+
+
+# Time spent in a nested phase is taken out of the phase around it, so the columns add up.
+class PhaseTimer:
+    def __init__(self):
+        self.totals: Counter = Counter()
+        self.stack: list[list] = []
+
+    @contextmanager
+    def phase(self, name: str):
+        now = time.perf_counter()
+        if self.stack:
+            self.stack[-1][1] = self._charge(self.stack[-1], now)
+        self.stack.append([name, now])
+        try:
+            yield
+        finally:
+            end = time.perf_counter()
+            self._charge(self.stack.pop(), end)
+            if self.stack:
+                self.stack[-1][1] = end
+
+    def _charge(self, frame: list, now: float) -> float:
+        self.totals[frame[0]] += now - frame[1]
+        return now
+
+    def take(self) -> Counter:
+        totals = self.totals
+        self.totals = Counter()
+        return totals
+
+    def instrument(self, owner, attribute: str, phase: str):
+        static = inspect.getattr_static(owner, attribute)
+        original = static.__func__ if isinstance(static, (classmethod, staticmethod)) else static
+
+        @functools.wraps(original)
+        def timed(*args, **kwargs):
+            with self.phase(phase):
+                return original(*args, **kwargs)
+
+        if isinstance(static, classmethod):
+            timed = classmethod(timed)
+        elif isinstance(static, staticmethod):
+            timed = staticmethod(timed)
+        setattr(owner, attribute, timed)
+
+
+def instrument(timer: PhaseTimer):
+    for attribute in ["read_file", "write_file", "create_folder", "copy_file", "delete_folder", "delete_file"]:
+        timer.instrument(Chroot, attribute, "chroot")
+    timer.instrument(OpenSSL, "create_chroot_environment", "chroot")
+    timer.instrument(OpenSSL, "_write_openssl_config", "template")
+    timer.instrument(Chroot, "run_command", "subprocess")
+    timer.instrument(vism.util, "derive_key", "kdf")
+    timer.instrument(VismDatabase, "get_cert_by_name", "db read")
+    timer.instrument(OpenSSLData, "get_by_cert_name", "db read")
+    timer.instrument(VismDatabase, "create_module_tables", "db read")
+    timer.instrument(VismDatabase, "save_to_db", "db save")
+
+
+def build_csr(key_type: dict, private_key, common_name: str) -> str:
+    csr = (
+        x509.CertificateSigningRequestBuilder()
+        .subject_name(x509.Name([x509.NameAttribute(NameOID.COMMON_NAME, common_name)]))
+        .add_extension(x509.SubjectAlternativeName([x509.DNSName(common_name)]), critical=False)
+        .sign(private_key, None if key_type["algorithm"] == "ED25519" else hashes.SHA256())
+    )
+    return csr.public_bytes(serialization.Encoding.PEM).decode("utf-8")
+
+
+def generate_leaf_key(key_type: dict):
+    if key_type["algorithm"] == "RSA":
+        return rsa.generate_private_key(public_exponent=65537, key_size=key_type["bits"])
+    if key_type["algorithm"] == "EC":
+        return ec.generate_private_key({"P-256": ec.SECP256R1(), "P-384": ec.SECP384R1()}[key_type["curve"]])
+    return ed25519.Ed25519PrivateKey.generate()
+
+
+class CaBenchmark:
+    def __init__(self, ca: VismCA, timer: PhaseTimer, run_id: str):
+        self.ca = ca
+        self.timer = timer
+        self.run_id = run_id
+        self.names: list[str] = []
+        self.samples: dict[tuple[str, str], list[tuple[float, Counter]]] = defaultdict(list)
+
+        raw_certificates = self.ca.config.raw_config_data.get("vism_ca", {}).get("x509_certificates", [])
+        self.root_template = next((cert for cert in raw_certificates if not cert.get("signed_by") and not cert.get("externally_managed")), None)
+        if self.root_template is None:
+            raise ValueError("config.yaml has no self-signed, internally managed certificate to use as the root profile.")
+
+        self.intermediate_template = next((cert for cert in raw_certificates if cert.get("signed_by") == self.root_template["name"]), None)
+        if self.intermediate_template is None:
+            raise ValueError(f"config.yaml has no certificate signed by '{self.root_template['name']}' to use as the intermediate profile.")
+
+    def openssl_profile(self, name: str) -> dict:
+        profiles = self.ca.config.raw_config_data.get("openssl", {}).get("ca_profiles", [])
+        return next((profile for profile in profiles if profile["name"] == name), {})
+
+    # Leaves get the first extension of the intermediate's profile that is not its own self-sign extension.
+    def default_leaf_extension(self) -> Optional[str]:
+        profile = self.openssl_profile(self.intermediate_template["module_args"].get("profile"))
+        self_sign_extension = profile.get("req", {}).get("x509_extensions")
+        return next((extension["name"] for extension in profile.get("cert_extensions", []) if extension["name"] != self_sign_extension), None)
+
+    def override_digest(self, digest: str):
+        for template in [self.root_template, self.intermediate_template]:
+            profile = self.openssl_profile(template["module_args"].get("profile"))
+            for section in ["default_ca", "req"]:
+                profile.setdefault(section, {})["default_md"] = digest
+
+    def add_certificate_config(self, template: dict, role: str, key_name: str, index: int, signed_by: str = None) -> str:
+        raw = copy.deepcopy(template)
+        raw["name"] = f"bench-{self.run_id}-{key_name}-{role}-{index}"
+        raw["signed_by"] = signed_by
+        raw["module_args"]["key"] = {**raw["module_args"].get("key", {}), **KEY_TYPES[key_name]}
+
+        self.ca.config.x509_certificates.append(CertificateConfig(**raw))
+        self.names.append(raw["name"])
+        return raw["name"]
+
+    def measure(self, key_name: str, operation: str, function):
+        self.timer.take()
+        start = time.perf_counter()
+        result = function()
+        self.samples[(key_name, operation)].append((time.perf_counter() - start, self.timer.take()))
+        return result
+
+    def run_key_type(self, key_name: str, hierarchies: int, leaves: int, leaf_module_args: dict):
+        intermediate_name = None
+        for index in range(hierarchies):
+            root_name = self.add_certificate_config(self.root_template, "root", key_name, index)
+            intermediate_name = self.add_certificate_config(self.intermediate_template, "intermediate", key_name, index, root_name)
+
+            self.measure(key_name, "root create", lambda: Certificate(self.ca, root_name).create())
+            self.measure(key_name, "intermediate create", lambda: Certificate(self.ca, intermediate_name).create())
+
+        leaf_key = generate_leaf_key(KEY_TYPES[key_name])
+        for index in range(leaves):
+            csr_pem = build_csr(KEY_TYPES[key_name], leaf_key, f"leaf-{index}.{key_name}.bench.test")
+            self.measure(key_name, "leaf sign", lambda: Certificate(self.ca, intermediate_name).sign_csr(csr_pem, leaf_module_args))
+
+    def cleanup(self):
+        if not self.names:
+            return
+
+        with self.ca.database.get_session() as session:
+            session.query(CertificateEntity).filter(CertificateEntity.name.in_(self.names)).delete(synchronize_session=False)
+            if OpenSSLData.__name__ in self.ca.database.registered_modules:
+                session.query(OpenSSLData).filter(OpenSSLData.cert_name.in_(self.names)).delete(synchronize_session=False)
+
+    def report(self):
+        print(f"{'key':<8} {'operation':<20} {'ops':>4} {'ops/s':>7} {'p50 ms':>8} {'p95 ms':>8}  " + " ".join(f"{phase:>10}" for phase in PHASES + ["other"]))
+        for (key_name, operation), samples in self.samples.items():
+            durations = sorted(duration for duration, _ in samples)
+            phases = Counter()
+            for _, totals in samples:
+                phases.update(totals)
+
+            mean_ms = {phase: phases[phase] / len(samples) * 1e3 for phase in PHASES}
+            mean_ms["other"] = statistics.mean(durations) * 1e3 - sum(mean_ms.values())
+            print(
+                f"{key_name:<8} {operation:<20} {len(samples):>4} {len(samples) / sum(durations):>7.2f} "
+                f"{durations[len(durations) // 2] * 1e3:>8.1f} {durations[min(len(durations) - 1, int(len(durations) * 0.95))] * 1e3:>8.1f}  "
+                + " ".join(f"{mean_ms[phase]:>10.1f}" for phase in PHASES + ["other"])
+            )
+        print("phase columns are mean ms per operation")
+
+
+def main(argv: list[str] = None):
+    parser = argparse.ArgumentParser(prog="vism.py ca bench", description="Certificate creation and CSR signing throughput of the CA, per key type.")
+    parser.add_argument("--key-types", nargs="+", choices=list(KEY_TYPES), default=list(KEY_TYPES))
+    parser.add_argument("--hierarchies", type=int, default=1, help="Root and intermediate pairs created per key type.")
+    parser.add_argument("--leaves", type=int, default=20, help="Leaf CSRs signed by the intermediate per key type.")
+    parser.add_argument("--leaf-extension", default=None, help="Extension section used when signing leaves, taken from the intermediate's profile by default.")
+    parser.add_argument("--digest", default=None, help="Override the profiles' default_md, e.g. sha256 where the openssl build can not verify the profile digest with every key type.")
+    parser.add_argument("--keep", action="store_true", default=False, help="Keep the benchmark certificates in the database.")
+    args = parser.parse_args(argv)
+
+    ca = VismCA()
+    timer = PhaseTimer()
+    instrument(timer)
+
+    benchmark = CaBenchmark(ca, timer, secrets.token_hex(4))
+    if args.digest:
+        benchmark.override_digest(args.digest)
+    leaf_extension = args.leaf_extension or benchmark.default_leaf_extension()
+    leaf_module_args = {"extension": leaf_extension} if leaf_extension else {}
+    try:
+        for key_name in args.key_types:
+            try:
+                benchmark.run_key_type(key_name, args.hierarchies, args.leaves, leaf_module_args)
+            except Exception as e:
+                print(f"{key_name}: {e.__class__.__name__}: {e}")
+    finally:
+        if not args.keep:
+            benchmark.cleanup()
+
+    benchmark.report()
+
+
+if __name__ == '__main__':
+    main()
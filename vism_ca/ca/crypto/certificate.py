@@ -2,6 +2,7 @@ import logging
 from dataclasses import dataclass
 from typing import Optional
 
+from vism.tracing import span
 from vism.util import aes256_decrypt, aes256_encrypt
 from vism_ca.ca import CertificateEntity, CryptoModule, VismCA
 from vism_ca.config import CertificateConfig
@@ -22,6 +23,11 @@ class CertificateData:
             "crl_pem": self.crl_pem
         }
 
+@dataclass
+class SignedCertificateData:
+    crt_pem: str
+    chain_pem: str
+
 class Certificate:
     def __init__(self, ca: VismCA, name: str):
         self.ca = ca
@@ -37,10 +43,56 @@ class Certificate:
         self.db_entity: Optional['CertificateEntity'] = self.ca.database.get_cert_by_name(self.name)
 
     def create(self) -> CertificateData:
-        try:
-            return self._create()
-        finally:
-            self.crypto_module.cleanup(full=True)
+        with span("Certificate.create", **{"vism.certificate": self.name}):
+            try:
+                return self._create()
+            finally:
+                self.crypto_module.cleanup(full=True)
+
+    def sign_csr(self, csr_pem: str, module_args: dict = None) -> SignedCertificateData:
+        with span("Certificate.sign_csr", **{"vism.certificate": self.name}):
+            try:
+                return self._sign_csr(csr_pem, module_args)
+            finally:
+                self.crypto_module.cleanup(full=True)
+
+    def _sign_csr(self, csr_pem: str, module_args: dict = None) -> SignedCertificateData:
+        logger.info(f"Signing csr with '{self.name}'")
+
+        if self.db_entity is None:
+            raise GenCertException(f"Signing certificate '{self.name}' not found in database.")
+
+        if self.config.externally_managed or not self.db_entity.pkey_pem:
+            raise GenCertException(f"Signing certificate '{self.name}' is externally managed and can not sign csrs.")
+
+        module_args_class = CryptoModule.get_crypto_module_imports(self.config.module).ModuleArgsConfig
+        signing_private_key_encrypted = self.db_entity.pkey_pem
+        if self.ca.config.security.data_encryption.enabled:
+            signing_private_key_decrypted = aes256_decrypt(signing_private_key_encrypted, self.ca.config.security.data_encryption.password)
+        else:
+            signing_private_key_decrypted = signing_private_key_encrypted
+
+        crt_pem = self.crypto_module.sign_csr(
+            self.config,
+            self.db_entity.crt_pem,
+            signing_private_key_decrypted,
+            csr_pem,
+            module_args_class(**(module_args or {}))
+        )
+        del signing_private_key_decrypted
+        del signing_private_key_encrypted
+
+        return SignedCertificateData(crt_pem=crt_pem, chain_pem=crt_pem + self.chain_pem())
+
+    # The issuing certificate followed by its intermediates; the root is left to the client's trust store.
+    def chain_pem(self) -> str:
+        chain = [self.db_entity.crt_pem]
+        issuer = self.signing_cert
+        while issuer is not None and issuer.signing_cert is not None:
+            chain.append(issuer.db_entity.crt_pem)
+            issuer = issuer.signing_cert
+
+        return "".join(pem if pem.endswith("\n") else pem + "\n" for pem in chain)
 
     def _create(self) -> 'CertificateData':
         logger.info(f"Creating certificate '{self.name}'")
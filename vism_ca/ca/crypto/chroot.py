@@ -2,7 +2,10 @@ import logging
 import os
 import shutil
 import subprocess
+import time
 
+from vism.metrics import CHROOT_COMMAND_DURATION
+from vism.tracing import span
 from vism_ca.errors import ChrootWriteFileExists, ChrootOpenFileException, ChrootWriteToFileException
 
 logger = logging.getLogger(__name__)
@@ -60,12 +63,21 @@ class Chroot:
 
     def run_command(self, command: str, stdin: str = None, environment: dict = None) -> subprocess.CompletedProcess:
         logger.debug(f"Running command: {command}")
-        result = subprocess.run(
-            self.unshare_cmd + command.split(" "),
-            stdout=subprocess.PIPE,
-            stderr=subprocess.PIPE,
-            input=stdin,
-            text=True,
-            env=environment
-        )
+        args = command.split(" ")
+        program = os.path.basename(args[0])
+        subcommand = args[1] if len(args) > 1 and not args[1].startswith("-") else ""
+
+        start = time.perf_counter()
+        with span("Chroot.run_command", **{"process.executable.name": program, "vism.subcommand": subcommand}) as command_span:
+            result = subprocess.run(
+                self.unshare_cmd + args,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.PIPE,
+                input=stdin,
+                text=True,
+                env=environment
+            )
+            if command_span is not None:
+                command_span.set_attribute("process.exit.code", result.returncode)
+        CHROOT_COMMAND_DURATION.labels(program=program, subcommand=subcommand).observe(time.perf_counter() - start)
         return result
\ No newline at end of file
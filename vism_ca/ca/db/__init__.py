@@ -2,11 +2,12 @@ from contextlib import contextmanager
 from datetime import datetime
 from typing import Any, Generator, Optional
 from sqlalchemy import Integer, String, Text, Boolean, DateTime, func
-from sqlalchemy.orm import sessionmaker, registry, Session, MappedAsDataclass, DeclarativeBase
+from sqlalchemy.orm import sessionmaker, Session, MappedAsDataclass, DeclarativeBase
 from sqlalchemy.engine import URL, create_engine
 from sqlalchemy.orm import Mapped
 from sqlalchemy.orm import mapped_column
 
+from vism.tracing import traced_methods
 from vism.util.errors import VismDatabaseException
 from vism_ca.config import Database
 
@@ -14,6 +15,8 @@ class Base(MappedAsDataclass, DeclarativeBase):
     pass
 
 class ModuleData(Base):
+    __abstract__ = True
+
     id: Mapped[int] = mapped_column(Integer, primary_key=True, init=False)
 
 class CertificateEntity(Base):
@@ -41,6 +44,7 @@ class CertificateEntity(Base):
         }
 
 
+@traced_methods
 class VismDatabase:
     def __init__(self, database_config: Database):
         self.db_url = URL.create(
@@ -54,7 +58,6 @@ class VismDatabase:
 
         self.engine = create_engine(self.db_url, echo=False)
         self.session_maker = sessionmaker(bind=self.engine)
-        self.mapper_registry = registry()
 
         self.registered_modules = []
 
@@ -62,13 +65,11 @@ class VismDatabase:
 
     def create_module_tables(self, module_data: type[ModuleData]):
         if module_data.__name__ not in self.registered_modules:
-            self.mapper_registry.mapped_as_dataclass(module_data)
-            self.mapper_registry.metadata.create_all(self.engine)
+            Base.metadata.create_all(self.engine, tables=[module_data.__table__])
             self.registered_modules.append(module_data.__name__)
 
     def create_tables(self):
-        self.mapper_registry.mapped_as_dataclass(CertificateEntity)
-        self.mapper_registry.metadata.create_all(self.engine)
+        Base.metadata.create_all(self.engine, tables=[CertificateEntity.__table__])
 
     def get_cert_by_name(self, name: str) -> Optional[CertificateEntity]:
         with self.get_session() as session:
@@ -3,6 +3,8 @@ from typing import Optional, Any
 
 import yaml
 import logging
+from pydantic import field_validator
+from pydantic.dataclasses import dataclass as pydantic_dataclass
 
 from vism import Config
 from vism_ca.errors import CertConfigNotFound
@@ -55,16 +57,80 @@ class CertificateConfig:
         module_import = __import__(f'modules.{self.module}', fromlist=['ModuleArgsConfig'])
         self.module_args = module_import.ModuleArgsConfig(**self.module_args)
 
-@dataclass
+@pydantic_dataclass
 class API:
     host: str = "0.0.0.0"
     port: int = 8080
 
+    server: str = "uvicorn"
+    workers: int = 1
+    loop: str = "auto"
+    http: str = "auto"
+    backlog: int = 2048
+    timeout_keep_alive: int = 5
+    timeout_graceful_shutdown: int = 30
+    reuse_port: bool = False
+
+    @field_validator("server")
+    @classmethod
+    def server_must_be_valid(cls, v):
+        if v not in ["uvicorn", "gunicorn"]:
+            raise ValueError("Server must be one of uvicorn, gunicorn")
+        return v
+
+    @field_validator("loop")
+    @classmethod
+    def loop_must_be_valid(cls, v):
+        if v not in ["auto", "asyncio", "uvloop"]:
+            raise ValueError("Loop must be one of auto, asyncio, uvloop")
+        return v
+
+    @field_validator("http")
+    @classmethod
+    def http_must_be_valid(cls, v):
+        if v not in ["auto", "h11", "httptools"]:
+            raise ValueError("HTTP implementation must be one of auto, h11, httptools")
+        return v
+
+    @field_validator("workers", "backlog")
+    @classmethod
+    def must_be_positive(cls, v):
+        if v < 1:
+            raise ValueError("Workers and backlog must be at least 1")
+        return v
+
+    @field_validator("port")
+    @classmethod
+    def port_must_be_valid(cls, v):
+        if v < 1 or v > 65535:
+            raise ValueError("Port must be between 1 and 65535")
+        return v
+
+@dataclass
+class Metrics:
+    enabled: bool = False
+
+@pydantic_dataclass
+class Tracing:
+    enabled: bool = False
+    service_name: str = "vism-ca"
+    exporter: str = "otlp"
+    endpoint: Optional[str] = None
+
+    @field_validator("exporter")
+    @classmethod
+    def exporter_must_be_valid(cls, v):
+        if v not in ["otlp", "console"]:
+            raise ValueError("Tracing exporter must be one of otlp, console")
+        return v
+
 class APIConfig(Config):
     def __init__(self, config_file_path: str):
         super().__init__(config_file_path)
 
         self.api: Optional[API] = API(**self.raw_config_data.get("api", {}))
+        self.metrics = Metrics(**self.raw_config_data.get("metrics", {}))
+        self.tracing = Tracing(**self.raw_config_data.get("tracing", {}))
 
 class CAConfig(Config):
     def __init__(self, config_file_path: str):